@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List, Optional
@@ -8,11 +9,20 @@ import logging
 from app.infrastructure.database.database import get_db
 from app.infrastructure.database.models import PortfolioSnapshot, TradeLog
 from app.infrastructure.hyperliquid.client import HyperliquidClient
+from app.infrastructure.hyperliquid.ingestor import TIMEFRAME_MS
+from app.infrastructure.hyperliquid.candle_cache import CandleResponseCache, etag_matches
+from app.infrastructure.hyperliquid.rate_limit import Priority, rate_scheduler, request_priority
+from app.infrastructure.hyperliquid.mids import mid_prices
+from app.infrastructure.archive.candle_archive import candle_archive, contiguous_rows
+from app.infrastructure.database.candles import read_candles
+from app.infrastructure.database.analytics import analytics
 from app.core.bot import BotManager
+from app.core.config import settings
 from app.core.dummy_data import DummyDataManager
 from app.core.websocket import manager
-import pandas as pd
-from app.domain.strategies.indicators import Indicators
+from app.domain.charting import format_candles
+from app.domain.analytics import EquityHistory, PortfolioBags
+from app.domain.aggregation import live_bars
 
 logger = logging.getLogger(__name__)
 
@@ -22,14 +32,14 @@ dummy_data = DummyDataManager()
 hyperliquid_client = HyperliquidClient()
 
 @router.websocket("/ws/feed")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, encoding: str = "json"):
+    # ?encoding=msgpack selects binary MessagePack frames instead of JSON text
+    await manager.connect(websocket, encoding)
     try:
         while True:
-            # Keep connection alive and handle incoming messages if any (e.g. ping/pong)
-            # For now we just wait for disconnection
+            # Client commands: subscribe/unsubscribe to topics (see ConnectionManager), ping
             data = await websocket.receive_text()
-            # Optional: Handle client commands via WS
+            await manager.handle_message(websocket, data)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
@@ -46,18 +56,21 @@ async def get_health():
         "ws_connected": True
     }
 
+@router.get("/status/rate-limit")
+async def get_rate_limit():
+    """Hyperliquid REST budget: remaining weight, queue depth and wait times per priority."""
+    return rate_scheduler.stats()
+
 @router.get("/portfolio/summary")
 async def get_portfolio_summary():
     """Get real portfolio summary from connected wallet"""
     try:
         portfolio_state = await bot.executor.get_portfolio_state()
         
-        # Calculate totals
-        total_crypto_value = 0.0
-        for pos in portfolio_state.positions:
-            # We use entry_price as proxy since we don't have current prices yet
-            # In a full implementation, fetch current prices here
-            total_crypto_value += pos.size * (pos.entry_price if pos.entry_price > 0 else 1.0)
+        # Calculate totals at current mids (one allMids request only if the stream is stale)
+        with request_priority(Priority.DASHBOARD):
+            await mid_prices.refresh()
+        total_crypto_value = sum(mid_prices.value(pos.symbol, pos.size, pos.entry_price) for pos in portfolio_state.positions)
         
         total_equity = portfolio_state.available_balance + total_crypto_value
         crypto_pct = (total_crypto_value / total_equity * 100) if total_equity > 0 else 0
@@ -82,27 +95,27 @@ async def get_portfolio_bags():
         portfolio_state = await bot.executor.get_portfolio_state()
         
         # Calculate values for compatibility with frontend
-        total_crypto_value = 0.0
-        for pos in portfolio_state.positions:
-            total_crypto_value += pos.size * (pos.entry_price if pos.entry_price > 0 else 1.0)
+        with request_priority(Priority.DASHBOARD):
+            await mid_prices.refresh()
+        bags = PortfolioBags.from_state(portfolio_state, lambda pos: mid_prices.value(pos.symbol, pos.size, pos.entry_price))
         
         # Return structure compatible with frontend expectations
-        # While using real data from the wallet
+        # While using real data from the wallet (same split as the stored equity snapshots)
         return {
             "short_term": {
-                "value_usd": round(portfolio_state.available_balance, 2),
-                "available_usdt": round(portfolio_state.available_balance, 2),
+                "value_usd": round(bags.short_term, 2),
+                "available_usdt": round(bags.stable, 2),
                 "assigned_btc": 0.0,  # Would need to calculate from positions
                 "pnl_24h": 0.0,  # Would need historical data
                 "active_strategy": "Live Trading" if bot.running else "Inactive"
             },
             "long_term": {
-                "value_btc": sum(pos.size for pos in portfolio_state.positions if pos.symbol == "BTC"),
-                "value_usd": round(total_crypto_value, 2),
-                "accumulated_btc": sum(pos.size for pos in portfolio_state.positions if pos.symbol == "BTC"),
+                "value_btc": bags.btc_amount,
+                "value_usd": round(bags.long_term, 2),
+                "accumulated_btc": bags.btc_amount,
                 "reserved_usdt": 0.0,
                 "total_yield_btc": 0.0,  # Would need historical data
-                "active_strategy": "HODL" if len(portfolio_state.positions) > 0 else "No Positions"
+                "active_strategy": "HODL" if bags.long_term > 0 else "No Positions"
             }
         }
     except Exception as e:
@@ -125,102 +138,130 @@ async def get_logs(
 
 # --- Analytics Endpoints ---
 
+async def _history(timeframe: str) -> Optional[EquityHistory]:
+    """Bucketed snapshot history, or None when there is none (dummy data is served instead)."""
+    if not settings.JOURNAL_ENABLED:
+        return None
+    try:
+        history = await analytics.history(timeframe)
+    except Exception as e:
+        logger.error(f"Error loading analytics history: {e}")
+        return None
+    return history if len(history) else None
+
 @router.get("/analytics/equity-curve")
-async def get_equity_curve(timeframe: str = "6m", db: AsyncSession = Depends(get_db)):
-    return dummy_data.get_equity_curve()
+async def get_equity_curve(timeframe: str = "6m"):
+    history = await _history(timeframe)
+    return history.equity_curve() if history else dummy_data.get_equity_curve()
 
 @router.get("/analytics/composition")
-async def get_composition(timeframe: str = "6m", db: AsyncSession = Depends(get_db)):
-    return dummy_data.get_composition()
+async def get_composition(timeframe: str = "6m"):
+    history = await _history(timeframe)
+    return history.composition() if history else dummy_data.get_composition()
 
 @router.get("/analytics/performance/short-term")
-async def get_short_term_performance(db: AsyncSession = Depends(get_db)):
-    return dummy_data.get_short_term_performance()
+async def get_short_term_performance(timeframe: str = "6m"):
+    history = await _history(timeframe)
+    return history.short_term_pnl() if history else dummy_data.get_short_term_performance()
 
 @router.get("/analytics/performance/long-term")
-async def get_long_term_performance(db: AsyncSession = Depends(get_db)):
-    return dummy_data.get_long_term_performance()
+async def get_long_term_performance(timeframe: str = "6m"):
+    history = await _history(timeframe)
+    return history.long_term_growth() if history else dummy_data.get_long_term_performance()
 
 @router.get("/analytics/benchmarks")
-async def get_benchmarks():
-    return dummy_data.get_benchmarks()
+async def get_benchmarks(timeframe: str = "6m"):
+    history = await _history(timeframe)
+    return history.benchmarks() if history else dummy_data.get_benchmarks()
 
 @router.get("/analytics/session")
 async def get_session_health():
-    return dummy_data.get_session_health()
+    history = await _history("1m")
+    if not history:
+        return dummy_data.get_session_health()
+    health = history.session_health()
+    try:
+        trades = await analytics.trade_count(datetime.utcnow() - timedelta(days=1))
+        health.append({"label": "Trades (24h)", "value": str(trades), "status": "good"})
+    except Exception as e:
+        logger.error(f"Error counting trades: {e}")
+    return health
 
 # --- Market Data Endpoints ---
 
+async def _load_candles(symbol: str, timeframe: str, start: Optional[int], end: Optional[int]) -> List[dict]:
+    """
+    Raw Hyperliquid-format candles for [start, end] (ms). Archived bars are read from the
+    local memory-mapped archive, then closed bars stored in TimescaleDB (if enabled);
+    only the remaining tail hits REST.
+    """
+    fetch_from = start
+    candles: List[dict] = []
+    tf_ms = TIMEFRAME_MS.get(timeframe, 3600 * 1000)
+    now_ms = int(datetime.utcnow().timestamp() * 1000)
+    end_ms = end if end is not None else now_ms
+    start_ms = start if start is not None else end_ms - tf_ms * 1000  # Same default window as REST
+    if candle_archive:
+        cols = candle_archive.read(symbol, timeframe, start_ms, end_ms)
+        ts = cols['timestamp']
+        # Use the archive only if it covers the start of the requested range, and only
+        # up to its first hole (downtime); the rest is fetched again
+        if len(ts) and ts[0] <= start_ms + tf_ms:
+            rows = contiguous_rows(ts, tf_ms)
+            keys = ('t', 'o', 'h', 'l', 'c', 'v')
+            columns = (cols[name][:rows].tolist() for name in ('timestamp', 'open', 'high', 'low', 'close', 'volume'))
+            candles = [dict(zip(keys, row)) for row in zip(*columns)]
+            fetch_from = candles[-1]['t'] + tf_ms
+            if fetch_from > end_ms:
+                return candles
+    
+    if settings.CANDLE_DB_ENABLED:
+        db_from = fetch_from if fetch_from is not None else start_ms
+        try:
+            stored = await read_candles(symbol, timeframe, db_from, end_ms)
+        except Exception as e:
+            logger.error(f"Error reading candles from database: {e}")
+            stored = []
+        # Closed bars only (the forming one comes from REST), only if they continue the range,
+        # and only up to the first missing bar
+        stored = [bar for bar in stored if bar['t'] + tf_ms <= now_ms]
+        stored = stored[:contiguous_rows([bar['t'] for bar in stored], tf_ms)]
+        if stored and stored[0]['t'] <= db_from + tf_ms:
+            candles += stored
+            fetch_from = stored[-1]['t'] + tf_ms
+            if fetch_from > end_ms:
+                return candles
+    
+    # Chart requests yield the REST budget to the bot
+    with request_priority(Priority.DASHBOARD):
+        return candles + await hyperliquid_client.get_candles(symbol, timeframe, fetch_from, end)
+
+# Open-ended (live) charts get the stream-built forming bar between REST refreshes
+candle_cache = CandleResponseCache(_load_candles, format_candles, live=live_bars.overlay_raw)
+
 @router.get("/market/candles")
-def get_candles(timeframe: str = "1h", start: Optional[int] = None, end: Optional[int] = None):
+async def get_candles(
+    request: Request,
+    timeframe: str = "1h",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    symbol: Optional[str] = None,
+    max_points: Optional[int] = Query(None, ge=1, description="Downsample to at most this many OHLC buckets"),
+):
     # Map timeframe to Hyperliquid format if needed, or pass directly
     # Hyperliquid supports: 15m, 1h, 4h, 1d, etc.
     
-    # Default symbol for now
-    symbol = "BTC" 
+    # Any traded coin; defaults to the primary symbol
+    symbol = symbol or settings.SYMBOL
     
-    candles = hyperliquid_client.get_candles(symbol, timeframe, start, end)
-    
-    # Transform to frontend format if necessary
     # Hyperliquid returns: {'t': 163..., 'o': '...', 'h': '...', 'l': '...', 'c': '...', 'v': '...'}
     # Frontend expects: { time: number, open: number, high: number, low: number, close: number, state: string }
-    
-    if not candles:
-        return []
-
-    # Calculate Indicators for State
-    try:
-        df = pd.DataFrame(candles)
-        df['close'] = df['c'].astype(float)
-        
-        # Calculate EMA 50 for Trend
-        # We need enough data. If not enough, state will be 'chop' or default.
-        if len(df) >= 50:
-            df['ema_50'] = Indicators.ema(df['close'], 50)
-            
-            # Determine State
-            # Bull: Close > EMA 50
-            # Bear: Close < EMA 50
-            # Chop: (Optional enhancement later)
-            
-            def get_state(row):
-                if pd.isna(row['ema_50']):
-                    return "chop"
-                return "bull" if row['close'] > row['ema_50'] else "bear"
-                
-            df['state'] = df.apply(get_state, axis=1)
-        else:
-            df['state'] = "chop"
-            
-        formatted_candles = []
-        for index, row in df.iterrows():
-            # Match original candle data by index or assume order is preserved
-            c = candles[index]
-            formatted_candles.append({
-                "time": int(c['t'] / 1000), # Convert ms to s
-                "open": float(c['o']),
-                "high": float(c['h']),
-                "low": float(c['l']),
-                "close": float(c['c']),
-                "state": row['state']
-            })
-            
-        return formatted_candles
-        
-    except Exception as e:
-        logger.error(f"Error calculating candle state: {e}")
-        # Fallback to raw data without state
-        formatted_candles = []
-        for c in candles:
-            formatted_candles.append({
-                "time": int(c['t'] / 1000),
-                "open": float(c['o']),
-                "high": float(c['h']),
-                "low": float(c['l']),
-                "close": float(c['c']),
-                "state": "chop"
-            })
-        return formatted_candles
+    # Served from the shared cache: closed bars are reused, only the forming bar is refetched
+    candles, etag = await candle_cache.get(symbol, timeframe, start, end, max_points)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(candles, headers=headers)
 
 @router.get("/market/trades")
 async def get_trades(db: AsyncSession = Depends(get_db)):
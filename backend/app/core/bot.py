@@ -1,11 +1,17 @@
 import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.domain.strategies.dual_core import StrategyEngine
 from app.domain.risk import RiskManager
 from app.domain.execution import OrderExecutor
-from app.domain.schemas import TradeAction, OrderRequest, PortfolioState, Candle
+from app.domain.schemas import TradeAction, OrderRequest, PortfolioState, Candle, TradingSignal
+from app.domain.aggregation import live_bars
+from app.domain.analytics import PortfolioBags
 from app.infrastructure.hyperliquid.stream import HyperliquidStream
+from app.infrastructure.hyperliquid.mids import mid_prices
+from app.infrastructure.database.candles import candle_writer
+from app.infrastructure.database.journal import journal
+from app.core.config import settings
 from app.core.websocket import manager
 
 logger = logging.getLogger(__name__)
@@ -23,14 +29,32 @@ class BotManager:
         if self._initialized:
             return
             
-        self.strategy = StrategyEngine()
+        # One strategy engine (indicator state + candle ingestor) per traded symbol
+        self.symbols = settings.symbols
+        self.engines: Dict[str, StrategyEngine] = {symbol: StrategyEngine(symbol=symbol) for symbol in self.symbols}
+        self.strategy = self.engines[self.symbols[0]]  # Primary symbol
         self.risk = RiskManager()
         self.executor = OrderExecutor()
         
-        # Initialize Stream with callbacks
+        # Bounds how many symbols fetch candles / analyze at the same time
+        self.semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_SYMBOLS)
+        self.signals: Dict[str, Dict[str, Any]] = {}  # Last signal per symbol
+        
+        # Event mode: run the strategy on each closed execution bar instead of polling
+        self.event_driven = settings.STRATEGY_MODE == "event"
+        # Forming 15m/1h/4h/1d bars per symbol, built from the 1m stream (shared with the API)
+        self.live_bars = live_bars
+        if self.event_driven:
+            for engine in self.engines.values():
+                engine.use_stream()
+        self.cycle_tasks: Dict[str, asyncio.Task] = {}
+        
+        # Initialize Stream with callbacks (one connection, one candle subscription per symbol)
         self.stream = HyperliquidStream(
             on_candle=self._on_candle,
-            on_user_event=self._on_user_event
+            on_user_event=self._on_user_event,
+            coins=self.symbols,
+            on_mids=mid_prices.on_stream
         )
         self.stream_task = None
         
@@ -47,7 +71,12 @@ class BotManager:
             return {"status": "already_running"}
             
         self.running = True
-        self.task = asyncio.create_task(self._loop())
+        if self.event_driven:
+            # Warm up once, then every cycle is triggered by a closed stream candle
+            self._schedule_cycle("startup")
+            self._log(f"⚡ Event-Driven Mode: strategy runs on each {self.strategy.execution_timeframe} close ({len(self.symbols)} symbols)")
+        else:
+            self.task = asyncio.create_task(self._loop())
         self.stream_task = asyncio.create_task(self.stream.connect())
         self._log("🚀 Strategy Engine & Stream Started")
         return {"status": "started"}
@@ -59,6 +88,8 @@ class BotManager:
         self.running = False
         if self.task:
             self.task.cancel()
+        for task in self.cycle_tasks.values():
+            task.cancel()
         
         if self.stream:
             self.stream.stop()
@@ -81,13 +112,17 @@ class BotManager:
             "running": self.running,
             "logs": self.logs[-50:], # Return last 50 logs
             "portfolio": self.portfolio,
+            "symbols": self.symbols,
+            "signals": self.signals,
         }
 
-    def _log(self, message: str):
+    def _log(self, message: str, type: str = "SYSTEM", metadata: Optional[Dict[str, Any]] = None):
         logger.info(message)
         self.logs.append(message)
         if len(self.logs) > 100:
             self.logs.pop(0)
+        # Persisted by the background journal writer (queued, never awaited here)
+        journal.log(type, message, metadata)
         
         # Broadcast via WS
         try:
@@ -110,21 +145,55 @@ class BotManager:
                 "data": candle.model_dump(),
                 "timestamp": asyncio.get_event_loop().time()
             })
-            # Optionally trigger strategy here in the future
-            # await self.strategy.analyze([candle], ...) 
         except Exception as e:
             logger.error(f"Error in _on_candle: {e}")
+        
+        # Persist the 1m bar (batched upsert; no-op unless CANDLE_DB_ENABLED)
+        candle_writer.add(candle)
+        
+        # Build 15m/1h/4h/1d bars from the 1m stream
+        engine = self.engines.get(candle.symbol)
+        if engine is None:
+            return
+        for timeframe, bar, complete in self.live_bars.add(candle):
+            if complete and timeframe in self.live_bars.timeframes:
+                engine.ingestor.store.append(candle.symbol, timeframe, bar)
+            if self.event_driven and self.running and timeframe == engine.execution_timeframe:
+                self._schedule_cycle(f"{candle.symbol} {timeframe} close", [candle.symbol])
+
+    def _schedule_cycle(self, trigger: str, symbols: Optional[List[str]] = None):
+        """
+        Runs one strategy cycle in the background so the stream reader never waits on it.
+        Cycles for different symbols may overlap; a symbol is never analyzed twice at once.
+        """
+        key = ",".join(symbols) if symbols else "*"
+        task = self.cycle_tasks.get(key)
+        if task and not task.done():
+            logger.warning(f"Strategy cycle still running, skipping trigger: {trigger}")
+            return
+        self.cycle_tasks[key] = asyncio.create_task(self._event_cycle(trigger, symbols))
+
+    async def _event_cycle(self, trigger: str, symbols: Optional[List[str]] = None):
+        try:
+            logger.info(f"⚡ Strategy triggered by {trigger}")
+            await self._run_cycle(symbols)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Cycle Error: {e}")
+            self._log(f"❌ Error: {str(e)}", "ERROR")
 
     async def _on_user_event(self, event: dict):
         """Callback for user events (fills, etc)"""
-        self._log(f"🔔 User Event: {event}")
+        self._log(f"🔔 User Event: {event}", "TRADE", {"event": event})
         try:
             await manager.broadcast({
                 "type": "user_event",
                 "data": event,
                 "timestamp": asyncio.get_event_loop().time()
             })
-            # Refresh portfolio state immediately
+            # Fills/transfers change balances: drop the cached state and refresh immediately
+            self.executor.invalidate_portfolio()
             portfolio_state = await self.executor.get_portfolio_state()
             self.portfolio = portfolio_state.model_dump()
             await manager.broadcast({
@@ -136,56 +205,11 @@ class BotManager:
             logger.error(f"Error in _on_user_event: {e}")
 
     async def _loop(self):
-        self._log("🔄 Bot Loop Active (Interval: 15s)")
+        self._log(f"🔄 Bot Loop Active (Interval: 15s, Symbols: {', '.join(self.symbols)})")
         
         while self.running:
             try:
-                # 1. Fetch State
-                portfolio_state = await self.executor.get_portfolio_state()
-                
-                # 2. Analyze
-                # Strategy fetches its own data internally for now
-                signal = await self.strategy.analyze([], portfolio_state)
-                
-                self._log(f"📊 Analysis: {signal.action} | Regime: {signal.regime} | Conf: {signal.confidence}")
-                
-                # 3. Validate & Execute
-                if signal.action != TradeAction.HOLD:
-                    is_valid = await self.risk.validate(signal, portfolio_state)
-                    
-                    if is_valid:
-                        size = await self.risk.calculate_size(signal, portfolio_state)
-                        
-                        if size > 0:
-                            order_req = OrderRequest(
-                                symbol=signal.symbol,
-                                action=signal.action,
-                                size=size,
-                                price=signal.price,
-                                order_type="MARKET" # Or LIMIT based on strategy
-                            )
-                            
-                            result = await self.executor.execute_order(order_req)
-                            
-                            if result.status == "FILLED":
-                                self._log(f"✅ Executed {signal.action} {size} {signal.symbol}")
-                            elif result.status == "PENDING" and result.payload:
-                                # Non-Custodial Flow: Broadcast to Frontend for Signing
-                                try:
-                                    await manager.broadcast({
-                                        "type": "ORDER_REQUEST",
-                                        "data": result.payload,
-                                        "timestamp": asyncio.get_event_loop().time()
-                                    })
-                                    self._log(f"📝 Signing Request Sent to Frontend: {signal.action} {size} {signal.symbol}")
-                                except Exception as e:
-                                    self._log(f"❌ Error broadcasting order: {e}")
-                            else:
-                                self._log(f"❌ Execution Failed: {result.error_message}")
-                        else:
-                            self._log(f"⚠️ Risk Manager: Size 0 (Alloc Limit or No Cash)")
-                    else:
-                        self._log(f"🛡️ Risk Manager: Signal Rejected")
+                await self._run_cycle()
                 
                 # Sleep for 15 seconds (Testnet speed)
                 await asyncio.sleep(15)
@@ -195,5 +219,96 @@ class BotManager:
                 break
             except Exception as e:
                 logger.error(f"Loop Error: {e}")
-                self._log(f"❌ Error: {str(e)}")
+                self._log(f"❌ Error: {str(e)}", "ERROR")
                 await asyncio.sleep(5)
+
+    async def _run_cycle(self, symbols: Optional[List[str]] = None):
+        """
+        One fetch -> analyze -> validate -> execute pass over `symbols` (default: all).
+        Symbols are analyzed concurrently (bounded by the semaphore), so the cycle takes
+        about as long as the slowest symbol rather than the sum of all of them.
+        Orders are then placed one at a time so sizing sees the cash used by earlier fills.
+        """
+        # 1. Fetch State
+        portfolio_state = await self.executor.get_portfolio_state()
+        self._snapshot(portfolio_state)
+        
+        # 2. Analyze
+        # Strategies fetch their own data internally for now
+        signals = await asyncio.gather(*(
+            self._analyze_symbol(symbol, portfolio_state) for symbol in (symbols or self.symbols)
+        ))
+        
+        # 3. Validate & Execute
+        for signal in signals:
+            if signal is not None and signal.action != TradeAction.HOLD:
+                portfolio_state = await self._execute_signal(signal, portfolio_state)
+
+    def _snapshot(self, portfolio_state: PortfolioState):
+        """Queues a periodic equity snapshot valued at the shared mids (same bags as /portfolio/bags)."""
+        bags = PortfolioBags.from_state(portfolio_state, lambda pos: mid_prices.value(pos.symbol, pos.size))
+        journal.snapshot(portfolio_state, mid_prices.get("BTC", 0.0), bags.crypto, bags.btc_amount, bags.short_term)
+
+    async def _analyze_symbol(self, symbol: str, portfolio_state: PortfolioState) -> Optional[TradingSignal]:
+        async with self.semaphore:
+            try:
+                signal = await self.engines[symbol].analyze([], portfolio_state)
+            except Exception as e:
+                # One failing symbol must not stop the others
+                logger.error(f"Analysis Error ({symbol}): {e}")
+                self._log(f"❌ Error ({symbol}): {str(e)}", "ERROR")
+                return None
+        
+        self.signals[symbol] = {
+            "action": signal.action,
+            "regime": signal.regime,
+            "confidence": signal.confidence,
+            "price": signal.price,
+            "reason": signal.metadata.get("reason"),
+        }
+        self._log(f"📊 Analysis {symbol}: {signal.action} | Regime: {signal.regime} | Conf: {signal.confidence}", "SIGNAL", {"symbol": symbol, **self.signals[symbol]})
+        return signal
+
+    async def _execute_signal(self, signal: TradingSignal, portfolio_state: PortfolioState) -> PortfolioState:
+        """Validates, sizes and executes one signal. Returns the portfolio state to size the next one with."""
+        is_valid = await self.risk.validate(signal, portfolio_state)
+        
+        if not is_valid:
+            self._log(f"🛡️ Risk Manager: Signal Rejected ({signal.symbol})", "RISK")
+            return portfolio_state
+        
+        size = await self.risk.calculate_size(signal, portfolio_state)
+        
+        if size <= 0:
+            self._log(f"⚠️ Risk Manager: Size 0 (Alloc Limit or No Cash) ({signal.symbol})", "RISK")
+            return portfolio_state
+        
+        order_req = OrderRequest(
+            symbol=signal.symbol,
+            action=signal.action,
+            size=size,
+            price=signal.price,
+            order_type="MARKET" # Or LIMIT based on strategy
+        )
+        
+        result = await self.executor.execute_order(order_req)
+        
+        if result.status == "FILLED":
+            self._log(f"✅ Executed {signal.action} {size} {signal.symbol}", "TRADE", result.payload)
+            # Balances changed: size the next symbol against fresh state
+            self.executor.invalidate_portfolio()
+            return await self.executor.get_portfolio_state()
+        elif result.status == "PENDING" and result.payload:
+            # Non-Custodial Flow: Broadcast to Frontend for Signing
+            try:
+                await manager.broadcast({
+                    "type": "ORDER_REQUEST",
+                    "data": result.payload,
+                    "timestamp": asyncio.get_event_loop().time()
+                })
+                self._log(f"📝 Signing Request Sent to Frontend: {signal.action} {size} {signal.symbol}", "TRADE", result.payload)
+            except Exception as e:
+                self._log(f"❌ Error broadcasting order: {e}", "ERROR")
+        else:
+            self._log(f"❌ Execution Failed: {result.error_message}", "ERROR")
+        return portfolio_state
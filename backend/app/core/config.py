@@ -1,6 +1,6 @@
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     HYPERLIQUID_ENV: str = "TESTNET"
@@ -13,8 +13,35 @@ class Settings(BaseSettings):
     
     # Trading Config
     SYMBOL: str = "BTC"  # User requested BTCUSDT (Hyperliquid uses 'BTC')
+    SYMBOLS: List[str] = [] # Coins traded by the bot, e.g. '["BTC","ETH"]' (empty -> [SYMBOL])
+    MAX_CONCURRENT_SYMBOLS: int = 8 # Symbols fetched/analyzed at the same time per cycle
     TIMEFRAME: str = "15m" # Default timeframe for strategy
+    STRATEGY_MODE: str = "poll" # "poll" (fixed 15s loop) or "event" (run on stream candle close)
+    CANDLE_CACHE_MAX_BARS: int = 1000 # Bars kept in memory per (symbol, timeframe)
+    CANDLE_FETCH_TIMEOUT: float = 5.0 # Seconds per timeframe fetch before it is skipped
+    CANDLE_ARCHIVE_DIR: str = "data/candles" # Local columnar candle archive ("" disables it)
+    CANDLE_DB_ENABLED: bool = False # Persist stream candles to TimescaleDB and serve chart history from it
+    CANDLE_WRITE_BATCH: int = 500 # Bars per multi-row upsert (a full batch flushes immediately)
+    CANDLE_WRITE_INTERVAL: float = 2.0 # Seconds between flushes of pending bars
+    JOURNAL_ENABLED: bool = False # Write bot logs, signals, orders and equity snapshots to the database
+    JOURNAL_QUEUE: int = 10000 # Records held in memory before spilling to JOURNAL_SPILL_PATH
+    JOURNAL_BATCH: int = 200 # Records per flush trigger / insert batch
+    JOURNAL_FLUSH_INTERVAL: float = 2.0 # Seconds between journal flushes
+    JOURNAL_SNAPSHOT_INTERVAL: float = 60.0 # Seconds between recorded equity snapshots
+    JOURNAL_SPILL_PATH: str = "data/journal_spill.jsonl" # Overflow file under backpressure ("" drops instead)
+    ANALYTICS_TTL: float = 60.0 # Seconds analytics results are reused when no new snapshot was written
+    HL_INFO_CONCURRENCY: int = 4 # Default concurrent /info requests per request type
+    HL_RATE_LIMIT_WEIGHT: int = 1200 # Hyperliquid REST weight budget per minute (per IP)
+    MID_PRICE_MAX_AGE: float = 5.0 # Seconds before stream mids are considered stale and refreshed over REST
+    CANDLE_RESPONSE_TTL: float = 2.0 # Seconds before /market/candles refetches the forming bar
+    WS_SEND_QUEUE: int = 256 # Pending messages per dashboard client before old ones are dropped
+    WS_SEND_TIMEOUT: float = 10.0 # Seconds a single send may take before the client is dropped
+    PORTFOLIO_CACHE_TTL: float = 3.0 # Seconds a fetched portfolio state is reused (userEvents invalidate it)
 
     model_config = {"env_file": ".env", "extra": "ignore"}
 
+    @property
+    def symbols(self) -> List[str]:
+        return list(dict.fromkeys(self.SYMBOLS)) or [self.SYMBOL]
+
 settings = Settings()
@@ -1,35 +1,374 @@
-from typing import List
+import asyncio
+import itertools
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from enum import Enum
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Union
 from fastapi import WebSocket
 import logging
+from app.core.config import settings
+
+# Optional fast encoders: orjson for JSON text frames, msgpack for binary frames
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 logger = logging.getLogger(__name__)
 
+# Never dropped for a slow client (the user must see every signing request)
+CRITICAL_TYPES = {"ORDER_REQUEST"}
+
+# Topics a client can subscribe to on /ws/feed (the "type" of each broadcast)
+TOPICS = ("candle", "log", "user_event", "portfolio", "ORDER_REQUEST")
+
+def message_symbol(message: dict) -> Optional[str]:
+    data = message.get("data")
+    if isinstance(data, dict):
+        return data.get("symbol") or data.get("coin")
+    return None
+
+def coalesce_key(message: dict) -> Optional[Hashable]:
+    """
+    Messages superseded by a newer one of the same key: a slow client only gets
+    the latest pending candle per symbol and the latest portfolio snapshot.
+    """
+    kind = message.get("type")
+    if kind == "candle":
+        data = message.get("data") or {}
+        return ("candle", data.get("symbol"))
+    if kind == "portfolio":
+        return ("portfolio",)
+    return None
+
+def _default(obj):
+    """Types the encoders don't handle natively (datetimes, enums, pydantic models)."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+def encode_json(message: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(message, default=_default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(message, default=_default, separators=(",", ":"))
+
+def encode_msgpack(message: dict) -> bytes:
+    return msgpack.packb(message, default=_default, use_bin_type=True)
+
+ENCODERS = {"json": encode_json}
+if msgpack is not None:
+    ENCODERS["msgpack"] = encode_msgpack
+
+class Frame:
+    """
+    One broadcast message shared by every client queue. It is encoded at most once
+    per wire format, however many clients receive it.
+    """
+    __slots__ = ("message", "type", "symbol", "key", "_encoded")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self.type = message.get("type")
+        self.symbol = message_symbol(message)
+        self.key = coalesce_key(message)
+        self._encoded: Dict[str, Union[str, bytes]] = {}
+
+    def encoded(self, encoding: str) -> Optional[Union[str, bytes]]:
+        """Encoded message, or None if it cannot be serialized (logged once, then skipped by every client)."""
+        if encoding not in self._encoded:
+            try:
+                self._encoded[encoding] = ENCODERS[encoding](self.message)
+            except (TypeError, ValueError) as e:
+                logger.error(f"Dropping unserializable {self.type!r} broadcast ({encoding}): {e}")
+                self._encoded[encoding] = None
+        return self._encoded[encoding]
+
+class Subscription:
+    """
+    One topic for one client: optional symbol filter and minimum interval between messages.
+    Throttling coalesces: within an interval only the latest candle/portfolio per symbol is
+    kept and sent when the interval elapses. Messages that cannot be coalesced (logs, user
+    events, order requests) are never throttled, since each of them matters.
+    """
+    def __init__(self, symbols: Optional[Iterable[str]] = None, throttle_ms: float = 0):
+        self.symbols: Optional[Set[str]] = set(symbols) if symbols else None  # None: every symbol
+        self.interval = max(throttle_ms, 0) / 1000
+        self.last_sent: Dict[Optional[str], float] = {}
+        self.held: Dict[Optional[str], Frame] = {}
+        self._timers: Dict[Optional[str], asyncio.TimerHandle] = {}
+
+    def accepts(self, frame: "Frame") -> bool:
+        return self.symbols is None or frame.symbol is None or frame.symbol in self.symbols
+
+    def offer(self, frame: "Frame", now: float, deliver: Callable[["Frame"], None]):
+        """Delivers the frame now, holds it as the latest for the symbol, or filters it out."""
+        if not self.accepts(frame):
+            return
+        if not self.interval or frame.key is None or frame.type in CRITICAL_TYPES:
+            deliver(frame)
+            return
+        symbol = frame.symbol
+        wait = self.last_sent.get(symbol, float("-inf")) + self.interval - now
+        if wait <= 0 and symbol not in self.held:
+            self.last_sent[symbol] = now
+            deliver(frame)
+            return
+        # Keep only the latest; it goes out when the interval elapses
+        if symbol not in self.held:
+            self._timers[symbol] = asyncio.get_running_loop().call_later(max(wait, 0), self._release, symbol, deliver)
+        self.held[symbol] = frame
+
+    def _release(self, symbol: Optional[str], deliver: Callable[["Frame"], None]):
+        self._timers.pop(symbol, None)
+        frame = self.held.pop(symbol, None)
+        if frame is not None:
+            self.last_sent[symbol] = time.monotonic()
+            deliver(frame)
+
+    def cancel(self):
+        """Drops held messages (unsubscribed or disconnected)."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self.held.clear()
+
+class ClientConnection:
+    """
+    One WebSocket client: a bounded queue of pending messages drained by its own
+    writer task, so a slow client only ever delays itself.
+    """
+    def __init__(self, websocket: WebSocket, max_queue: int, send_timeout: float, encoding: str = "json"):
+        self.websocket = websocket
+        self.encoding = encoding if encoding in ENCODERS else "json"
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.pending: "OrderedDict[Hashable, Frame]" = OrderedDict()
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+        self._ids = itertools.count()
+        # Every topic until the client sends its own subscriptions
+        self.subscriptions: Dict[str, Subscription] = {topic: Subscription() for topic in TOPICS}
+        self.default_feed = True
+
+    def enqueue(self, frame: Frame):
+        key = frame.key
+        if key is not None and key in self.pending:
+            # Replace in place: keeps the queue position, drops the stale value
+            self.pending[key] = frame
+            self.dropped += 1
+        else:
+            if len(self.pending) >= self.max_queue and not self._evict() and frame.type not in CRITICAL_TYPES:
+                self.dropped += 1
+                return
+            self.pending[key if key is not None else next(self._ids)] = frame
+        self.wakeup.set()
+
+    def _evict(self) -> bool:
+        """Makes room by dropping the oldest non-critical message. False if all are critical."""
+        for key, frame in self.pending.items():
+            if frame.type not in CRITICAL_TYPES:
+                del self.pending[key]
+                self.dropped += 1
+                return True
+        return False
+
+    def close(self):
+        """Stops the writer after the current send (a cancel can be lost inside wait_for)."""
+        self.closed = True
+        self.wakeup.set()
+
+    async def writer(self):
+        while not self.closed:
+            if not self.pending:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            _, frame = self.pending.popitem(last=False)
+            data = frame.encoded(self.encoding)
+            if data is None:
+                continue  # Bad payload, not a bad socket
+            send = self.websocket.send_bytes(data) if isinstance(data, bytes) else self.websocket.send_text(data)
+            await asyncio.wait_for(send, timeout=self.send_timeout)
+
 class ConnectionManager:
+    """
+    Fans broadcasts out to /ws/feed clients by topic.
+    Client protocol (JSON text frames):
+        {"action": "subscribe", "topics": ["candle"], "symbols": ["BTC"], "throttle_ms": 1000}
+        {"action": "unsubscribe", "topics": ["log"]}
+        {"action": "ping"}
+    New clients receive every topic until they subscribe.
+    """
     _instance = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ConnectionManager, cls).__new__(cls)
-            cls._instance.active_connections: List[WebSocket] = []
+            cls._instance.clients: Dict[WebSocket, ClientConnection] = {}
+            cls._instance.subscribers: Dict[str, Set[ClientConnection]] = {topic: set() for topic in TOPICS}
+            cls._instance.max_queue = settings.WS_SEND_QUEUE
+            cls._instance.send_timeout = settings.WS_SEND_TIMEOUT
+            cls._instance.writers: Set[asyncio.Task] = set()
         return cls._instance
 
-    async def connect(self, websocket: WebSocket):
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self.clients)
+
+    async def connect(self, websocket: WebSocket, encoding: str = "json"):
+        """encoding: "json" (text frames) or "msgpack" (binary frames, if msgpack is installed)."""
         await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WS Client connected. Total: {len(self.active_connections)}")
+        client = ClientConnection(websocket, self.max_queue, self.send_timeout, encoding)
+        self.clients[websocket] = client
+        self._index(client)
+        client.task = asyncio.create_task(self._run_writer(client))
+        self.writers.add(client.task)
+        client.task.add_done_callback(self.writers.discard)
+        logger.info(f"WS Client connected. Total: {len(self.clients)}")
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            logger.info(f"WS Client disconnected. Total: {len(self.active_connections)}")
+        client = self.clients.pop(websocket, None)
+        if client is not None:
+            for subscribers in self.subscribers.values():
+                subscribers.discard(client)
+            for subscription in client.subscriptions.values():
+                subscription.cancel()
+            client.close()
+            if client.task and client.task is not asyncio.current_task():
+                client.task.cancel()
+            logger.info(f"WS Client disconnected. Total: {len(self.clients)}")
+
+    async def close(self):
+        """Disconnects every client and waits for all writer tasks to finish (shutdown)."""
+        for websocket in self.active_connections:
+            self.disconnect(websocket)
+        writers = list(self.writers)
+        for task in writers:
+            task.cancel()
+        await asyncio.gather(*writers, return_exceptions=True)
 
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
+        """
+        Queues the message for every client subscribed to its topic and returns without
+        waiting on any socket. The message is encoded once per wire format and the same
+        bytes go to every client; with no subscribers it is never encoded.
+        """
+        kind = message.get("type")
+        if kind in self.subscribers:
+            targets = self.subscribers[kind]
+        else:
+            # Not a routable topic: only clients still on the default feed get it
+            targets = [client for client in self.clients.values() if client.default_feed]
+        if not targets:
+            return
+        frame = Frame(message)
+        now = time.monotonic()
+        for client in list(targets):
+            subscription = client.subscriptions.get(kind)
+            if subscription is None:
+                client.enqueue(frame)
+            else:
+                subscription.offer(frame, now, client.enqueue)
+
+    async def send(self, websocket: WebSocket, message: dict):
+        """Queues a message for one client (replies to its commands)."""
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.enqueue(Frame(message))
+
+    async def handle_message(self, websocket: WebSocket, raw: str):
+        """Applies one client command and queues the reply."""
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+        try:
+            command = json.loads(raw)
+            action = command.get("action")
+            if action == "ping":
+                await self.send(websocket, {"type": "pong"})
+                return
+            if action not in ("subscribe", "unsubscribe"):
+                raise ValueError(f"unknown action {action!r}")
+            topics = command.get("topics") or ([command["topic"]] if command.get("topic") else list(TOPICS))
+            unknown = [t for t in topics if t not in TOPICS]
+            if unknown:
+                raise ValueError(f"unknown topics {unknown}")
+            symbols = command.get("symbols")
+            if symbols is not None and (not isinstance(symbols, list) or not all(isinstance(x, str) for x in symbols)):
+                raise ValueError("symbols must be a list of strings")
+            throttle_ms = float(command.get("throttle_ms") or 0)
+        except (ValueError, TypeError, AttributeError) as e:
+            await self.send(websocket, {"type": "error", "data": f"Invalid command: {e}"})
+            return
+        
+        if action == "subscribe":
+            self.subscribe(websocket, topics, symbols, throttle_ms)
+        else:
+            self.unsubscribe(websocket, topics)
+        await self.send(websocket, {"type": "subscriptions", "data": self.subscriptions(websocket)})
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str], symbols: Optional[Iterable[str]] = None, throttle_ms: float = 0):
+        client = self.clients[websocket]
+        if client.default_feed:
+            # First explicit subscription replaces the default "everything" feed
+            for subscription in client.subscriptions.values():
+                subscription.cancel()
+            client.subscriptions.clear()
+            client.default_feed = False
+        for topic in topics:
+            previous = client.subscriptions.get(topic)
+            if previous is not None:
+                previous.cancel()
+            client.subscriptions[topic] = Subscription(symbols, throttle_ms)
+        self._index(client)
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        client = self.clients[websocket]
+        client.default_feed = False
+        for topic in topics:
+            subscription = client.subscriptions.pop(topic, None)
+            if subscription is not None:
+                subscription.cancel()
+        self._index(client)
+
+    def subscriptions(self, websocket: WebSocket) -> Dict[str, Any]:
+        client = self.clients[websocket]
+        return {
+            topic: {"symbols": sorted(sub.symbols) if sub.symbols else None, "throttle_ms": sub.interval * 1000}
+            for topic, sub in client.subscriptions.items()
+        }
+
+    def _index(self, client: ClientConnection):
+        for topic, subscribers in self.subscribers.items():
+            if topic in client.subscriptions:
+                subscribers.add(client)
+            else:
+                subscribers.discard(client)
+
+    async def _run_writer(self, client: ClientConnection):
+        try:
+            await client.writer()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            # Dead or stalled socket (send error / timeout): prune it
+            logger.warning(f"WS Client dropped ({type(e).__name__}): {e}")
+            self.disconnect(client.websocket)
             try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to client: {e}")
-                # Potentially remove dead connection here
-                # self.disconnect(connection) # Be careful modifying list while iterating
+                await client.websocket.close()
+            except Exception:
+                pass
 
 manager = ConnectionManager()
@@ -0,0 +1,176 @@
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from app.domain.schemas import CANDLE_FIELDS, Candle
+from app.infrastructure.hyperliquid.ingestor import TIMEFRAME_MS
+
+logger = logging.getLogger(__name__)
+
+def _replace(candle, **update) -> Candle:
+    """Unvalidated copy of a Candle (or CandleTick) with some fields replaced."""
+    fields = {name: getattr(candle, name) for name in CANDLE_FIELDS}
+    fields["symbol"] = candle.symbol
+    fields.update(update)
+    return Candle.model_construct(**fields)
+
+class CandleAggregator:
+    """
+    Builds higher-timeframe bars (15m/4h/1d...) from the 1m candle stream.
+    Hyperliquid pushes several updates per minute for the forming 1m candle;
+    a 1m candle is considered closed once an update for a later minute arrives.
+    """
+    def __init__(self, timeframes: Tuple[str, ...] = ("15m", "4h", "1d"), base: str = "1m"):
+        self.base = base
+        self.base_ms = TIMEFRAME_MS[base]
+        self.timeframes = {tf: TIMEFRAME_MS[tf] for tf in timeframes}
+        self._forming_base: Optional[Candle] = None
+        self._bars: Dict[str, Optional[Candle]] = {tf: None for tf in timeframes}
+        # A bar is complete only if every base candle of its bucket was seen
+        self._complete: Dict[str, bool] = {tf: False for tf in timeframes}
+
+    def add(self, candle: Candle) -> List[Tuple[str, Candle, bool]]:
+        """
+        Feeds one stream update. Returns (timeframe, bar, complete) for every bar
+        that closed because of it, starting with the base (1m) candle itself.
+        """
+        closed: List[Tuple[str, Candle, bool]] = []
+        previous = self._forming_base
+        
+        if previous is not None and candle.timestamp < previous.timestamp:
+            logger.debug(f"Ignoring out-of-order candle {candle.timestamp}")
+            return closed
+        
+        if previous is not None and candle.timestamp > previous.timestamp:
+            contiguous = candle.timestamp == previous.timestamp + self.base_ms
+            closed.append((self.base, previous, True))
+            for tf, tf_ms in self.timeframes.items():
+                self._fold(tf, tf_ms, previous)
+                bar = self._bars[tf]
+                if not contiguous and self._bucket(previous.timestamp + self.base_ms, tf_ms) == bar.timestamp:
+                    self._complete[tf] = False  # Missed base candles inside this bucket
+                if self._bucket(candle.timestamp, tf_ms) != bar.timestamp:
+                    closed.append((tf, bar, self._complete[tf]))
+                    self._bars[tf] = None
+        
+        self._forming_base = candle
+        return closed
+
+    def forming(self, timeframe: str) -> Optional[Tuple[Candle, bool]]:
+        """
+        The bar still forming for `timeframe` as of the last update (closed base candles
+        plus the forming one), and whether it covers its whole bucket so far.
+        """
+        base = self._forming_base
+        if base is None:
+            return None
+        if timeframe == self.base:
+            return base, True
+        tf_ms = self.timeframes[timeframe]
+        bucket = self._bucket(base.timestamp, tf_ms)
+        bar = self._bars[timeframe]
+        if bar is None or bar.timestamp != bucket:
+            return _replace(base, timestamp=bucket), base.timestamp == bucket
+        return _replace(
+            bar,
+            high=max(bar.high, base.high),
+            low=min(bar.low, base.low),
+            close=base.close,
+            volume=bar.volume + base.volume,
+        ), self._complete[timeframe]
+
+    def _fold(self, timeframe: str, tf_ms: int, candle: Candle):
+        bucket = self._bucket(candle.timestamp, tf_ms)
+        bar = self._bars[timeframe]
+        if bar is None:
+            # A bar is partial unless it starts on the bucket boundary (e.g. first bar after start-up)
+            self._complete[timeframe] = candle.timestamp == bucket
+            self._bars[timeframe] = _replace(candle, timestamp=bucket)
+            return
+        self._bars[timeframe] = _replace(
+            bar,
+            high=max(bar.high, candle.high),
+            low=min(bar.low, candle.low),
+            close=candle.close,
+            volume=bar.volume + candle.volume,
+        )
+
+    @staticmethod
+    def _bucket(timestamp: int, tf_ms: int) -> int:
+        return timestamp // tf_ms * tf_ms
+
+def merge_live_bar(row: Tuple[float, float, float, float, float], live: Candle, complete: bool) -> Tuple[float, float, float, float, float]:
+    """
+    Combines a history row (open, high, low, close, volume) of the forming bucket with
+    the live bar. A complete live bar wins outright; a partial one (stream joined
+    mid-bucket) keeps the history open and widens its range.
+    """
+    if complete:
+        return live.open, live.high, live.low, live.close, live.volume
+    open_, high, low, _, volume = row
+    return open_, max(high, live.high), min(low, live.low), live.close, max(volume, live.volume)
+
+class LiveBarBuffer:
+    """
+    Forming bar of every higher timeframe per symbol, kept current by the 1m stream.
+    Readers (chart endpoint, strategy) overlay it on REST/cached history so the last
+    bar is as fresh as the last tick.
+    """
+    def __init__(self, timeframes: Tuple[str, ...] = ("15m", "1h", "4h", "1d")):
+        self.timeframes = timeframes
+        self._aggregators: Dict[str, CandleAggregator] = {}
+
+    def add(self, candle: Candle) -> List[Tuple[str, Candle, bool]]:
+        """Feeds one stream update; returns the bars it closed (see CandleAggregator.add)."""
+        aggregator = self._aggregators.get(candle.symbol)
+        if aggregator is None:
+            aggregator = self._aggregators[candle.symbol] = CandleAggregator(self.timeframes)
+        return aggregator.add(candle)
+
+    def forming(self, symbol: str, timeframe: str, now_ms: Optional[int] = None) -> Optional[Tuple[Candle, bool]]:
+        """(bar, complete) for the current bucket, or None if unknown or stale (stream down)."""
+        aggregator = self._aggregators.get(symbol)
+        if aggregator is None or (timeframe not in aggregator.timeframes and timeframe != aggregator.base):
+            return None
+        live = aggregator.forming(timeframe)
+        if live is None:
+            return None
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        if live[0].timestamp + TIMEFRAME_MS[timeframe] <= now_ms:
+            return None
+        return live
+
+    def overlay_frame(self, symbol: str, timeframe: str, df: pd.DataFrame) -> pd.DataFrame:
+        """History frame [timestamp, open, high, low, close, volume] with the live bar merged in."""
+        live = self.forming(symbol, timeframe)
+        if live is None or df.empty:
+            return df
+        bar, complete = live
+        ts = pd.to_datetime(bar.timestamp, unit='ms')
+        last_ts = df['timestamp'].iloc[-1]
+        cols = ['open', 'high', 'low', 'close', 'volume']
+        if ts == last_ts:
+            df = df.copy()
+            df.loc[df.index[-1], cols] = merge_live_bar(tuple(df[cols].iloc[-1]), bar, complete)
+        elif ts > last_ts and complete:
+            row = {'timestamp': ts, 'open': bar.open, 'high': bar.high, 'low': bar.low, 'close': bar.close, 'volume': bar.volume}
+            df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+        return df
+
+    def overlay_raw(self, symbol: str, timeframe: str, candles: List[dict]) -> List[dict]:
+        """Same as overlay_frame for raw Hyperliquid candles ({'t', 'o', 'h', 'l', 'c', 'v'})."""
+        live = self.forming(symbol, timeframe)
+        if live is None or not candles:
+            return candles
+        bar, complete = live
+        last = candles[-1]
+        keys = ('o', 'h', 'l', 'c', 'v')
+        if bar.timestamp == int(last['t']):
+            values = merge_live_bar(tuple(float(last[k]) for k in keys), bar, complete)
+            return candles[:-1] + [{**last, **dict(zip(keys, values))}]
+        if bar.timestamp > int(last['t']) and complete:
+            return candles + [{'t': bar.timestamp, 'o': bar.open, 'h': bar.high, 'l': bar.low, 'c': bar.close, 'v': bar.volume}]
+        return candles
+
+# Shared by the bot (writer, from the stream), the chart endpoint and the strategy
+live_bars = LiveBarBuffer()
@@ -0,0 +1,188 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+import numpy as np
+from app.domain.schemas import PortfolioState, Position
+
+BUCKETS_PER_YEAR = {"1 day": 365.0, "1 week": 52.0}
+
+# Held by the long-term (HODL) bag; every other position belongs to the short-term (trading) bag
+LONG_TERM_SYMBOLS = frozenset({"BTC"})
+
+@dataclass
+class PortfolioBags:
+    """Portfolio split into the dashboard bags: stable + short_term + long_term = equity (USD)."""
+    stable: float
+    short_term: float
+    long_term: float
+    btc_amount: float
+
+    @classmethod
+    def from_state(cls, state: PortfolioState, value: Callable[[Position], float]) -> "PortfolioBags":
+        short_term = long_term = btc_amount = 0.0
+        for pos in state.positions:
+            if pos.symbol in LONG_TERM_SYMBOLS:
+                long_term += value(pos)
+                btc_amount += pos.size if pos.symbol == "BTC" else 0.0
+            else:
+                short_term += value(pos)
+        return cls(state.available_balance, short_term, long_term, btc_amount)
+
+    @property
+    def crypto(self) -> float:
+        return self.short_term + self.long_term
+
+    @property
+    def equity(self) -> float:
+        return self.stable + self.crypto
+
+@dataclass
+class EquityHistory:
+    """Bucketed portfolio snapshots (last value per bucket), oldest first."""
+    dates: np.ndarray           # datetime64[D] bucket start
+    equity: np.ndarray          # Total equity (USD)
+    stable: np.ndarray          # Stablecoin balance (USD)
+    short_term: np.ndarray      # Short-term bag (USD)
+    long_term: np.ndarray       # Long-term bag (USD)
+    btc_amount: np.ndarray      # BTC held in the long-term bag
+    btc_price: np.ndarray       # BTC mid at the snapshot (0 when unknown)
+    buckets_per_year: float = 365.0
+
+    @classmethod
+    def from_columns(cls, cols: Dict[str, Any], buckets_per_year: float = 365.0) -> "EquityHistory":
+        def col(name):
+            return np.asarray(cols.get(name, []), dtype=np.float64)
+        return cls(
+            dates=np.asarray(cols.get("bucket", []), dtype="datetime64[D]"),
+            equity=col("equity"),
+            stable=col("stable"),
+            short_term=col("short_term"),
+            long_term=col("long_term"),
+            btc_amount=col("btc_amount"),
+            btc_price=col("btc_price"),
+            buckets_per_year=buckets_per_year,
+        )
+
+    def __len__(self) -> int:
+        return len(self.equity)
+
+    @property
+    def labels(self) -> List[str]:
+        return np.datetime_as_string(self.dates, unit="D").tolist()
+
+    @property
+    def returns(self) -> np.ndarray:
+        if len(self) < 2:
+            return np.zeros(0)
+        prev = self.equity[:-1]
+        return np.divide(np.diff(self.equity), prev, out=np.zeros(len(prev)), where=prev > 0)
+
+    @property
+    def drawdown(self) -> np.ndarray:
+        peak = np.maximum.accumulate(self.equity)
+        return np.divide(self.equity, peak, out=np.ones(len(peak)), where=peak > 0) - 1.0
+
+    @property
+    def max_drawdown(self) -> float:
+        return float(self.drawdown.min()) if len(self) else 0.0
+
+    @property
+    def roi(self) -> float:
+        return _roi(self.equity)
+
+    @property
+    def sharpe(self) -> float:
+        """Annualized Sharpe ratio of per-bucket returns (risk-free rate 0)."""
+        returns = self.returns
+        if len(returns) < 2 or returns.std() == 0:
+            return 0.0
+        return float(returns.mean() / returns.std() * np.sqrt(self.buckets_per_year))
+
+    @property
+    def win_rate(self) -> float:
+        """Share of buckets that closed with a gain."""
+        returns = self.returns[self.returns != 0]
+        return float(np.mean(returns > 0)) if len(returns) else 0.0
+
+    @property
+    def profit_factor(self) -> float:
+        changes = np.diff(self.equity)
+        losses = -changes[changes < 0].sum()
+        gains = changes[changes > 0].sum()
+        if losses == 0:
+            return float("inf") if gains > 0 else 0.0
+        return float(gains / losses)
+
+    def benchmark(self) -> np.ndarray:
+        """Starting equity held in BTC (buy & hold)."""
+        price = _filled(self.btc_price)
+        if not len(self) or price[0] <= 0:
+            return self.equity.copy()
+        return self.equity[0] * price / price[0]
+
+    def dca_benchmark(self) -> np.ndarray:
+        """Starting equity put into BTC in equal parts, one per bucket."""
+        price = _filled(self.btc_price)
+        n = len(self)
+        if not n or price[0] <= 0:
+            return self.equity.copy()
+        per_bucket = self.equity[0] / n
+        btc = np.cumsum(per_bucket / price)
+        cash = self.equity[0] - per_bucket * np.arange(1, n + 1)
+        return btc * price + cash
+
+    def equity_curve(self) -> List[dict]:
+        keys = ("date", "equity", "benchmark", "dca_benchmark")
+        columns = (self.labels, *(np.round(c, 2).tolist() for c in (self.equity, self.benchmark(), self.dca_benchmark())))
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+
+    def composition(self) -> List[dict]:
+        total = self.stable + self.short_term + self.long_term
+        pct = {}
+        for name, values in (("stable", self.stable), ("short_term", self.short_term), ("long_term", self.long_term)):
+            pct[name] = np.round(np.divide(values * 100, total, out=np.zeros(len(total)), where=total > 0), 1).tolist()
+        keys = ("date", "stable", "short_term", "long_term")
+        return [dict(zip(keys, row)) for row in zip(self.labels, pct["stable"], pct["short_term"], pct["long_term"])]
+
+    def short_term_pnl(self) -> List[dict]:
+        """Cumulative short-term bag PnL since the first bucket."""
+        pnl = np.round(self.short_term - self.short_term[0], 2).tolist() if len(self) else []
+        return [{"date": d, "pnl": p} for d, p in zip(self.labels, pnl)]
+
+    def long_term_growth(self) -> List[dict]:
+        return [{"date": d, "btc": b} for d, b in zip(self.labels, np.round(self.btc_amount, 4).tolist())]
+
+    def benchmarks(self) -> List[dict]:
+        return [
+            {"asset": "Bot", "roi": round(self.roi * 100, 1), "color": "#10b981"},
+            {"asset": "BTC", "roi": round(_roi(_filled(self.btc_price)) * 100, 1), "color": "#f59e0b"},
+            {"asset": "BTC DCA", "roi": round(_roi(self.dca_benchmark()) * 100, 1), "color": "#6366f1"},
+        ]
+
+    def session_health(self) -> List[dict]:
+        win_rate = self.win_rate
+        profit_factor = self.profit_factor
+        max_drawdown = self.max_drawdown
+        return [
+            {"label": "Win Rate", "value": f"{win_rate:.0%}", "status": "good" if win_rate >= 0.5 else "warning"},
+            {"label": "Profit Factor", "value": "∞" if np.isinf(profit_factor) else f"{profit_factor:.1f}",
+             "status": "good" if profit_factor >= 1.0 else "warning"},
+            {"label": "Max Drawdown", "value": f"{max_drawdown:.1%}",
+             "status": "good" if max_drawdown > -0.05 else "warning" if max_drawdown > -0.15 else "danger"},
+            {"label": "Sharpe", "value": f"{self.sharpe:.2f}", "status": "good" if self.sharpe >= 1.0 else "warning"},
+        ]
+
+def _roi(values: np.ndarray) -> float:
+    if len(values) < 2 or values[0] <= 0:
+        return 0.0
+    return float(values[-1] / values[0] - 1.0)
+
+def _filled(values: np.ndarray) -> np.ndarray:
+    """Forward-fills missing (<= 0) prices; leading gaps take the first known price."""
+    valid = values > 0
+    if not valid.any():
+        return values
+    idx = np.where(valid, np.arange(len(values)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    filled = values[idx]
+    filled[:np.argmax(valid)] = values[np.argmax(valid)]
+    return filled
@@ -0,0 +1,248 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.domain.risk import RiskManager
+from app.domain.schemas import TradeAction, MarketRegime
+from app.domain.strategies.dual_core import DualCoreParams, signal_arrays
+from app.domain.strategies.indicators import Indicators
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 24 * 60 * 60 * 1000
+YEAR_MS = 365 * DAY_MS
+
+def timestamps_ms(values) -> np.ndarray:
+    """Timestamps (datetime64 or Unix ms) as an int64 array of Unix ms."""
+    arr = np.asarray(values)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[ms]").astype(np.int64)
+    return arr.astype(np.int64)
+
+@dataclass
+class BacktestReport:
+    timestamps: np.ndarray      # Unix ms per bar
+    close: np.ndarray
+    equity: np.ndarray          # Mark-to-market equity per bar
+    position: np.ndarray        # Base asset held per bar
+    trades: pd.DataFrame
+    initial_cash: float
+    elapsed_ms: float = 0.0
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def bars_per_year(self) -> float:
+        if len(self.timestamps) < 2:
+            return 0.0
+        return YEAR_MS / float(np.median(np.diff(self.timestamps)))
+
+    @property
+    def drawdown(self) -> np.ndarray:
+        peak = np.maximum.accumulate(self.equity)
+        return self.equity / peak - 1.0
+
+    @property
+    def total_return(self) -> float:
+        return float(self.equity[-1] / self.initial_cash - 1.0) if len(self.equity) else 0.0
+
+    @property
+    def max_drawdown(self) -> float:
+        return float(self.drawdown.min()) if len(self.equity) else 0.0
+
+    @property
+    def exposure(self) -> float:
+        """Fraction of bars with an open position."""
+        return float(np.mean(self.position > 0)) if len(self.position) else 0.0
+
+    @property
+    def avg_allocation(self) -> float:
+        """Average share of equity held in the asset."""
+        if not len(self.equity):
+            return 0.0
+        return float(np.mean(self.position * self.close / self.equity))
+
+    @property
+    def sharpe(self) -> float:
+        """Annualized Sharpe ratio of per-bar returns (risk-free rate 0)."""
+        if len(self.equity) < 3:
+            return 0.0
+        returns = np.diff(self.equity) / self.equity[:-1]
+        std = returns.std()
+        if std == 0:
+            return 0.0
+        return float(returns.mean() / std * np.sqrt(self.bars_per_year))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "bars": int(len(self.equity)),
+            "trades": int(len(self.trades)),
+            "final_equity": round(float(self.equity[-1]), 2) if len(self.equity) else self.initial_cash,
+            "total_return": round(self.total_return, 4),
+            "max_drawdown": round(self.max_drawdown, 4),
+            "sharpe": round(self.sharpe, 3),
+            "exposure": round(self.exposure, 4),
+            "avg_allocation": round(self.avg_allocation, 4),
+            "elapsed_ms": round(self.elapsed_ms, 1),
+        }
+
+class BacktestEngine:
+    """
+    Replays OHLCV history through the dual-core rules (signal_arrays) and the
+    RiskManager lock/allocation rules.
+    Indicators, signals and the equity curve are column operations; the only Python
+    loop runs over signal bars, because each fill's size depends on the cash and
+    position left by the previous one.
+    Equity here is mark-to-market (cash + position), fills happen at the bar close.
+    """
+    def __init__(
+        self,
+        params: Optional[DualCoreParams] = None,
+        risk: Optional[RiskManager] = None,
+        symbol: str = settings.SYMBOL,
+        initial_cash: float = 10_000.0,
+        fee_rate: float = 0.0,
+    ):
+        self.params = params or DualCoreParams()
+        self.risk = risk or RiskManager()
+        self.symbol = symbol
+        self.initial_cash = initial_cash
+        self.fee_rate = fee_rate
+
+    def run(self, candles: pd.DataFrame, daily: Optional[pd.DataFrame] = None) -> BacktestReport:
+        """
+        candles: execution-timeframe bars [timestamp, high, low, close] (sorted).
+        daily: optional daily bars for the regime filter; derived from `candles` if omitted.
+        """
+        return self.run_arrays(
+            timestamps_ms(candles['timestamp']),
+            candles['high'].to_numpy(dtype=np.float64),
+            candles['low'].to_numpy(dtype=np.float64),
+            candles['close'].to_numpy(dtype=np.float64),
+            daily_ts=None if daily is None else timestamps_ms(daily['timestamp']),
+            daily_close=None if daily is None else daily['close'].to_numpy(dtype=np.float64),
+        )
+
+    def run_arrays(
+        self,
+        ts: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        daily_ts: Optional[np.ndarray] = None,
+        daily_close: Optional[np.ndarray] = None,
+    ) -> BacktestReport:
+        """Same as run() on plain column arrays (Unix ms timestamps); arrays are not copied."""
+        started = time.perf_counter()
+        bull = self.regime_array(ts, close, daily_ts, daily_close)
+        buy, sell, _ = self.signals(close, high, low)
+        position, cash, trades = self._fill(ts, close, buy, sell, bull)
+
+        return BacktestReport(
+            timestamps=ts,
+            close=close,
+            equity=cash + position * close,
+            position=position,
+            trades=trades,
+            initial_cash=self.initial_cash,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            params=self.params.model_dump(),
+        )
+
+    def run_archived(self, archive, timeframe: str = "15m", start: Optional[int] = None, end: Optional[int] = None) -> BacktestReport:
+        """
+        Backtests straight from a CandleArchive (memory-mapped, no network).
+        Uses archived daily bars for the regime filter when available.
+        """
+        cols = archive.read(self.symbol, timeframe, start, end)
+        daily = archive.read(self.symbol, "1d", end=end)
+        has_daily = len(daily["timestamp"]) > 0
+        return self.run_arrays(
+            cols["timestamp"], cols["high"], cols["low"], cols["close"],
+            daily_ts=daily["timestamp"] if has_daily else None,
+            daily_close=daily["close"] if has_daily else None,
+        )
+
+    def signals(self, close: np.ndarray, high: np.ndarray, low: np.ndarray):
+        """Execution-timeframe indicators and the (buy, sell, trending) arrays."""
+        p = self.params
+        close_s, high_s, low_s = pd.Series(close), pd.Series(high), pd.Series(low)
+        bb = Indicators.bollinger_bands(close_s, p.bb_period, p.bb_std)
+        return signal_arrays(
+            p,
+            ema_fast=Indicators.ema(close_s, p.ema_fast).to_numpy(),
+            ema_slow=Indicators.ema(close_s, p.ema_slow).to_numpy(),
+            rsi=Indicators.rsi(close_s, p.rsi_period).to_numpy(),
+            adx=Indicators.adx(high_s, low_s, close_s, p.adx_period).to_numpy(),
+            low=low,
+            high=high,
+            lower=bb['lower'].to_numpy(),
+            upper=bb['upper'].to_numpy(),
+        )
+
+    def regime_array(self, ts: np.ndarray, close: np.ndarray, daily_ts: Optional[np.ndarray] = None, daily_close: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        True where the macro regime is BULL. Like the live engine, the current day is a
+        forming daily bar: its EMA is yesterday's EMA updated with the bar's close.
+        """
+        day = ts // DAY_MS
+        if daily_ts is None:
+            closes = pd.Series(close).groupby(day).last()
+        else:
+            closes = pd.Series(daily_close, index=daily_ts // DAY_MS)
+        ema = Indicators.ema(closes, self.params.regime_ema)
+        days, ema_values = ema.index.to_numpy(), ema.to_numpy()
+
+        # EMA as of the last daily close strictly before each bar's day
+        pos = np.searchsorted(days, day, side='left') - 1
+        prev = np.where(pos >= 0, ema_values[np.clip(pos, 0, None)], np.nan)
+        alpha = 2.0 / (self.params.regime_ema + 1)
+        forming = np.where(np.isnan(prev), close, prev + alpha * (close - prev))
+        return close > forming
+
+    def _fill(self, ts, close, buy, sell, bull):
+        n = len(close)
+        cash, size = self.initial_cash, 0.0
+        fill_idx, fill_cash, fill_size, rows = [], [], [], []
+
+        for i in np.flatnonzero(buy | sell):
+            price = float(close[i])
+            action = TradeAction.BUY if buy[i] else TradeAction.SELL
+            regime = MarketRegime.BULL if bull[i] else MarketRegime.BEAR
+            equity = cash + size * price
+            btc_size = size if self.symbol == "BTC" else 0.0
+            if self.risk.check_locks(action, self.symbol, price, equity, cash, btc_size):
+                continue
+
+            qty = self.risk.allocation_size(regime, price, equity, cash, size * price)
+            if action == TradeAction.BUY:
+                qty = min(qty, cash / (price * (1 + self.fee_rate)))
+            else:
+                qty = min(qty, size)  # Spot: can only sell what we hold
+            if qty <= 0:
+                continue
+
+            fee = qty * price * self.fee_rate
+            if action == TradeAction.BUY:
+                cash -= qty * price + fee
+                size += qty
+            else:
+                cash += qty * price - fee
+                size -= qty
+
+            fill_idx.append(i)
+            fill_cash.append(cash)
+            fill_size.append(size)
+            rows.append((ts[i], action.value, price, qty, fee, regime.value, cash, size))
+
+        # Forward-fill the state after each fill across the following bars
+        marker = np.zeros(n, dtype=np.int64)
+        marker[np.asarray(fill_idx, dtype=np.int64)] = np.arange(1, len(fill_idx) + 1)
+        last_fill = np.maximum.accumulate(marker)
+        position = np.concatenate(([0.0], fill_size))[last_fill]
+        cash_path = np.concatenate(([self.initial_cash], fill_cash))[last_fill]
+
+        trades = pd.DataFrame(rows, columns=["timestamp", "action", "price", "size", "fee", "regime", "cash", "position"])
+        return position, cash_path, trades
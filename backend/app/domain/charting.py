@@ -0,0 +1,75 @@
+import logging
+from typing import Dict, List, Optional, Union
+import numpy as np
+import pandas as pd
+from app.domain.schemas import CandleBatch
+from app.domain.strategies.indicators import Indicators
+
+logger = logging.getLogger(__name__)
+
+STATE_EMA = 50  # Bull/bear colouring: close vs EMA 50
+
+def candle_columns(candles: Union[List[dict], CandleBatch]) -> Dict[str, np.ndarray]:
+    """
+    Float/int columns of a CandleBatch, or of Hyperliquid-format candles
+    ({'t', 'o', 'h', 'l', 'c', ...}, values may be strings).
+    """
+    batch = candles if isinstance(candles, CandleBatch) else CandleBatch.from_raw(candles)
+    return {
+        'time': batch.timestamp // 1000,  # ms -> s
+        'open': batch.open,
+        'high': batch.high,
+        'low': batch.low,
+        'close': batch.close,
+    }
+
+def candle_states(close: np.ndarray) -> np.ndarray:
+    """'bull' above the EMA 50, 'bear' below; 'chop' while there is not enough history."""
+    if len(close) < STATE_EMA:
+        return np.full(len(close), "chop", dtype=object)
+    ema = Indicators.ema(pd.Series(close), STATE_EMA).to_numpy()
+    states = np.where(close > ema, "bull", "bear").astype(object)
+    states[np.isnan(ema)] = "chop"
+    return states
+
+def downsample_ohlc(cols: Dict[str, np.ndarray], max_points: int) -> Dict[str, np.ndarray]:
+    """
+    Merges consecutive bars into at most `max_points` buckets of equal bar count:
+    first open, highest high, lowest low, last close. Other columns (time, state)
+    take the first/last bar's value respectively.
+    """
+    n = len(cols['close'])
+    if max_points <= 0 or n <= max_points:
+        return cols
+    size = -(-n // max_points)  # ceil
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n) - 1
+    out = {
+        'time': cols['time'][starts],
+        'open': cols['open'][starts],
+        'high': np.maximum.reduceat(cols['high'], starts),
+        'low': np.minimum.reduceat(cols['low'], starts),
+        'close': cols['close'][ends],
+    }
+    if 'state' in cols:
+        out['state'] = cols['state'][ends]
+    return out
+
+def format_candles(candles: Union[List[dict], CandleBatch], max_points: Optional[int] = None) -> List[dict]:
+    """
+    Frontend chart format: [{time (s), open, high, low, close, state}].
+    States are computed at full resolution before any downsampling.
+    """
+    if not candles:
+        return []
+    cols = candle_columns(candles)
+    try:
+        cols['state'] = candle_states(cols['close'])
+    except Exception as e:
+        logger.error(f"Error calculating candle state: {e}")
+        cols['state'] = np.full(len(cols['close']), "chop", dtype=object)
+    if max_points:
+        cols = downsample_ohlc(cols, max_points)
+
+    keys = ('time', 'open', 'high', 'low', 'close', 'state')
+    return [dict(zip(keys, row)) for row in zip(*(cols[k].tolist() for k in keys))]
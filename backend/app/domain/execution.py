@@ -1,11 +1,14 @@
 import logging
 import asyncio
-from typing import List
-from hyperliquid.info import Info
+import time
+from typing import List, Optional
 from hyperliquid.utils import constants
 from app.core.config import settings
 from app.domain.schemas import PortfolioState, Position, OrderRequest, OrderResult, TradeAction
 from app.domain.interfaces import IExecutor
+from app.infrastructure.hyperliquid.async_info import shared_info
+from app.infrastructure.hyperliquid.rate_limit import Priority
+from app.infrastructure.hyperliquid.mids import mid_prices
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -18,23 +21,45 @@ class OrderExecutor(IExecutor):
         if not self.public_address:
             logger.warning("⚠️ PUBLIC_ADDRESS not set. Portfolio state will be empty.")
         
-        # Initialize Info API (Read-Only, No Private Key needed)
-        self.info = Info(self.env, skip_ws=True)
+        # Shared async Info API (Read-Only, No Private Key needed)
+        self.info = shared_info(self.env)
+        
+        # Portfolio state cache shared by the bot loop, the API and user events
+        self.cache_ttl = settings.PORTFOLIO_CACHE_TTL
+        self._portfolio: Optional[PortfolioState] = None
+        self._portfolio_at = 0.0
+        self._generation = 0  # Bumped on invalidation; stale refreshes are not cached
+        self._refresh: Optional[asyncio.Future] = None
+        self._refresh_generation = -1
         logger.info(f"🔌 Executor initialized in Non-Custodial Mode (Read-Only). Address: {self.public_address}")
 
-    async def get_portfolio_state(self) -> PortfolioState:
+    def invalidate_portfolio(self):
+        """Drops the cached portfolio state (e.g. on a fill from the userEvents stream)."""
+        self._generation += 1
+        self._portfolio = None
+
+    async def get_portfolio_state(self, force: bool = False) -> PortfolioState:
         """
         Fetches current balance and equity asynchronously using public Info API.
+        A state younger than cache_ttl is returned without a request, and concurrent
+        callers share one in-flight refresh. force=True skips the cached state.
         """
         if not self.public_address:
             return PortfolioState(total_equity=0.0, available_balance=0.0, positions=[])
-            
+        
+        if not force and self._portfolio is not None and time.monotonic() - self._portfolio_at < self.cache_ttl:
+            return self._portfolio
+        
+        # Single flight: join the refresh in progress unless it started before an invalidation
+        if self._refresh is None or self._refresh.done() or self._refresh_generation != self._generation:
+            self._refresh = asyncio.ensure_future(self._fetch_portfolio_state(self._generation))
+            self._refresh_generation = self._generation
+        # Shielded so a cancelled caller does not cancel the refresh for everyone else
+        return await asyncio.shield(self._refresh)
+
+    async def _fetch_portfolio_state(self, generation: int) -> PortfolioState:
         try:
-            # Run blocking SDK call in a thread
-            spot_state = await asyncio.to_thread(
-                self.info.spot_user_state, 
-                self.public_address
-            )
+            spot_state = await self.info.spot_user_state(self.public_address, Priority.CRITICAL)
             
             balances = spot_state.get('balances', [])
             
@@ -57,12 +82,18 @@ class OrderExecutor(IExecutor):
                             unrealized_pnl=0.0
                         ))
             
-            return PortfolioState(
-                total_equity=usdc_balance, # Simplified
+            # Spot balances valued at the shared mid snapshot (no extra request)
+            crypto_value = sum(mid_prices.value(pos.symbol, pos.size) for pos in positions)
+            state = PortfolioState(
+                total_equity=usdc_balance + crypto_value,
                 available_balance=usdc_balance,
                 positions=positions,
                 timestamp=datetime.utcnow()
             )
+            if generation == self._generation:
+                self._portfolio = state
+                self._portfolio_at = time.monotonic()
+            return state
             
         except Exception as e:
             logger.error(f"Error fetching account state: {e}")
@@ -134,7 +165,8 @@ class OrderExecutor(IExecutor):
         """
         Generates MARKET SELL payloads for all open positions.
         """
-        state = await self.get_portfolio_state()
+        # Never close from a cached snapshot
+        state = await self.get_portfolio_state(force=True)
         results = []
         
         for pos in state.positions:
@@ -155,7 +187,8 @@ class OrderExecutor(IExecutor):
                     "sz": pos.size,
                     "limit_px": 0, # Market
                     "order_type": {"limit": {"tif": "Ioc"}}, # Will need to be adjusted by frontend for Market
-                    "reduce_only": True
+                    "reduce_only": True,
+                    "mid_px": mid_prices.get(pos.symbol, 0.0) # Reference for the frontend's aggressive price
                 }
                 
                 results.append(OrderResult(
@@ -16,8 +16,8 @@ class IRiskManager(Protocol):
         ...
 
 class IExecutor(Protocol):
-    async def get_portfolio_state(self) -> PortfolioState:
-        """Fetches the current state of the portfolio (balances, positions)."""
+    async def get_portfolio_state(self, force: bool = False) -> PortfolioState:
+        """Fetches the current state of the portfolio (balances, positions); may be cached unless force=True."""
         ...
 
     async def execute_order(self, order: OrderRequest) -> OrderResult:
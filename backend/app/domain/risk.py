@@ -1,7 +1,9 @@
 import logging
+from typing import Optional
 from app.core.config import settings
 from app.domain.schemas import TradingSignal, PortfolioState, TradeAction, MarketRegime
 from app.domain.interfaces import IRiskManager
+from app.infrastructure.hyperliquid.mids import mid_prices
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +13,7 @@ class RiskManager(IRiskManager):
         self.min_liquidity_reserve = 0.20 # Default 20% USDC reserve
         self.btc_lock_pct = 0.0 # Default 0% BTC lock
         self.leverage_limit = 1.0 # Strict 1x
+        self.prices = mid_prices # Shared mid snapshot (dict lookups only)
 
     def update_allocation(self, usdc_lock: float, btc_lock: float):
         """Updates the safety locks (percentages 0-100)"""
@@ -18,6 +21,34 @@ class RiskManager(IRiskManager):
         self.btc_lock_pct = btc_lock / 100.0
         logger.info(f"🛡️ Risk Settings Updated: USDC Lock={usdc_lock}%, BTC Lock={btc_lock}%")
 
+    def check_locks(self, action: TradeAction, symbol: str, price: float, total_equity: float, available_balance: float, btc_size: float) -> Optional[str]:
+        """
+        Pure form of the safety-lock rules (also used by the backtester).
+        Returns the reason the trade is blocked, or None if it may proceed.
+        """
+        # Rule 2: Liquidity Reserve (For BUY orders)
+        if action == TradeAction.BUY:
+            # Calculate required reserve
+            reserve_amount = total_equity * self.min_liquidity_reserve
+            
+            if available_balance < reserve_amount:
+                return f"Insufficient liquidity reserve. Available: {available_balance}, Required: {reserve_amount}"
+
+        # Rule 3: BTC Lock (For SELL orders)
+        if action == TradeAction.SELL and symbol == "BTC":
+            # Calculate minimum BTC value to keep
+            min_btc_value = total_equity * self.btc_lock_pct
+            
+            # Estimate current BTC value (using signal price as proxy)
+            current_btc_value = btc_size * price
+            
+            # We don't know exact size here yet (it's calculated in calculate_size), 
+            # but we can check if we are already below or near limit.
+            if current_btc_value <= min_btc_value:
+                return f"BTC Lock Active. Current Value: {current_btc_value}, Required Lock: {min_btc_value}"
+        
+        return None
+
     async def validate(self, signal: TradingSignal, portfolio: PortfolioState) -> bool:
         """
         Validates if a trade signal can be executed based on risk rules.
@@ -34,31 +65,12 @@ class RiskManager(IRiskManager):
         #     return False
 
         # Rule 2: Liquidity Reserve (For BUY orders)
-        if signal.action == TradeAction.BUY:
-            # Calculate required reserve
-            reserve_amount = portfolio.total_equity * self.min_liquidity_reserve
-            
-            if portfolio.available_balance < reserve_amount:
-                logger.warning(f"⛔ RISK: Insufficient liquidity reserve. Available: {portfolio.available_balance}, Required: {reserve_amount}")
-                return False
-
         # Rule 3: BTC Lock (For SELL orders)
-        if signal.action == TradeAction.SELL and signal.symbol == "BTC":
-            # Calculate minimum BTC value to keep
-            min_btc_value = portfolio.total_equity * self.btc_lock_pct
-            
-            # Estimate current BTC value (using signal price as proxy)
-            current_btc_size = sum(p.size for p in portfolio.positions if p.symbol == "BTC")
-            current_btc_value = current_btc_size * signal.price
-            
-            # Calculate value after sell
-            # We don't know exact size here yet (it's calculated in calculate_size), 
-            # but we can check if we are already below or near limit.
-            # Ideally, calculate_size should also respect this.
-            
-            if current_btc_value <= min_btc_value:
-                 logger.warning(f"⛔ RISK: BTC Lock Active. Current Value: {current_btc_value}, Required Lock: {min_btc_value}")
-                 return False
+        btc_size = sum(p.size for p in portfolio.positions if p.symbol == "BTC")
+        violation = self.check_locks(signal.action, signal.symbol, signal.price, portfolio.total_equity, portfolio.available_balance, btc_size)
+        if violation:
+            logger.warning(f"⛔ RISK: {violation}")
+            return False
 
         # Rule 4: Leverage Check (Always 1x)
         # Implicitly handled by sizing logic, but good to keep in mind.
@@ -71,38 +83,46 @@ class RiskManager(IRiskManager):
         Calculates the amount of asset to buy/sell to maintain 1x leverage.
         Respects Macro Regime Allocation (80% Bull / 20% Bear).
         """
+        # Check current exposure
+        # For MVP, we assume 'positions' list contains our exposure.
+        # Position size is in base asset (e.g. BTC); signal.price approximates the mark price
+        # of the signal's symbol, other symbols are valued at their mid (entry price if unknown).
+        current_position_value = sum(
+            pos.size * signal.price if pos.symbol == signal.symbol else self.prices.value(pos.symbol, pos.size, pos.entry_price)
+            for pos in portfolio.positions
+        )
+        
+        if signal.price <= 0:
+            logger.error("Invalid price in signal")
+            return 0.0
+        
+        size = self.allocation_size(signal.regime, signal.price, portfolio.total_equity, portfolio.available_balance, current_position_value)
+        if size <= 0:
+            logger.info(f"⛔ RISK: Allocation Limit Reached. Regime: {signal.regime}")
+        return size
+
+    def allocation_size(self, regime: MarketRegime, price: float, total_equity: float, available_balance: float, position_value: float) -> float:
+        """
+        Pure sizing rule behind calculate_size (also used by the backtester).
+        Respects Macro Regime Allocation (80% Bull / 20% Bear).
+        """
         # Determine Target Allocation based on Signal Regime
-        max_crypto_pct = 0.80 if signal.regime == MarketRegime.BULL else 0.20
+        max_crypto_pct = 0.80 if regime == MarketRegime.BULL else 0.20
         
         # Calculate Max Crypto Value allowed
-        max_crypto_value = portfolio.total_equity * max_crypto_pct
-        
-        # Check current exposure
-        # For MVP, we assume 'positions' list contains our exposure.
-        # We need to sum up the value of current positions.
-        current_position_value = 0.0
-        for pos in portfolio.positions:
-            # Assuming position size is in base asset (e.g. BTC) and we have entry_price
-            # Ideally we should use Mark Price here, but entry_price is a proxy if mark not available
-            # Or we can use signal.price as current market price approximation
-            current_position_value += pos.size * signal.price 
+        max_crypto_value = total_equity * max_crypto_pct
 
         # Calculate how much more we can buy
-        remaining_capacity = max(0, max_crypto_value - current_position_value)
+        remaining_capacity = max(0, max_crypto_value - position_value)
         
         # We can only buy with available USDC, but capped by remaining capacity
-        tradeable_usdc = min(portfolio.available_balance, remaining_capacity)
+        tradeable_usdc = min(available_balance, remaining_capacity)
         
-        if tradeable_usdc <= 0:
-            logger.info(f"⛔ RISK: Allocation Limit Reached. Regime: {signal.regime} (Max {max_crypto_pct*100}%)")
-            return 0.0
-            
         # Size in Base Currency (e.g. BTC)
-        if signal.price <= 0:
-            logger.error("Invalid price in signal")
+        if tradeable_usdc <= 0 or price <= 0:
             return 0.0
 
-        size_asset = tradeable_usdc / signal.price
+        size_asset = tradeable_usdc / price
         
         # Rounding (Hyperliquid specific logic should ideally be in Executor or Config, 
         # but generic rounding here is safe for now)
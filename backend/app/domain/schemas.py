@@ -2,6 +2,8 @@ from enum import Enum
 from typing import List, Optional, Literal, Dict, Any
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
+import numpy as np
+import pandas as pd
 
 class TradeAction(str, Enum):
     BUY = "BUY"
@@ -25,6 +27,121 @@ class Candle(BaseModel):
 
     model_config = ConfigDict(frozen=True)
 
+CANDLE_FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+RAW_KEYS = ("t", "o", "h", "l", "c", "v")  # Hyperliquid candle keys, same order
+
+class CandleTick:
+    """
+    One bar as a plain slotted struct (duck-types Candle, no validation): streamed
+    candles and single bars read from a CandleBatch.
+    """
+    __slots__ = ("timestamp", "open", "high", "low", "close", "volume", "symbol")
+    state = "chop"
+
+    def __init__(self, timestamp: int, open: float, high: float, low: float, close: float, volume: float, symbol: str):
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.symbol = symbol
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any]) -> "CandleTick":
+        """Hyperliquid candle message data ({'t', 'o', 'h', 'l', 'c', 'v', 's'}, prices as strings)."""
+        return cls(int(raw['t']), float(raw['o']), float(raw['h']), float(raw['l']), float(raw['c']), float(raw['v']), raw['s'])
+
+    def model_dump(self) -> Dict[str, Any]:
+        """Same shape as Candle.model_dump()."""
+        return {
+            "timestamp": self.timestamp, "open": self.open, "high": self.high, "low": self.low,
+            "close": self.close, "volume": self.volume, "symbol": self.symbol, "state": self.state,
+        }
+
+    def to_candle(self) -> Candle:
+        return Candle.model_construct(**self.model_dump())
+
+    def __repr__(self) -> str:
+        return f"CandleTick({self.symbol} t={self.timestamp} c={self.close})"
+
+class CandleBatch:
+    """
+    Struct-of-arrays OHLCV bars for one symbol: int64 Unix-ms timestamps and float64
+    prices/volume, sorted by time. Built once from exchange data and passed around
+    as is; single bars are read as CandleTick.
+    """
+    __slots__ = ("symbol", "timestamp", "open", "high", "low", "close", "volume")
+
+    def __init__(self, symbol: str, timestamp, open, high, low, close, volume):
+        self.symbol = symbol
+        self.timestamp = np.asarray(timestamp, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+
+    @classmethod
+    def empty(cls, symbol: str = "") -> "CandleBatch":
+        return cls(symbol, *([] for _ in CANDLE_FIELDS))
+
+    @classmethod
+    def from_raw(cls, candles: List[Dict[str, Any]], symbol: Optional[str] = None) -> "CandleBatch":
+        """Hyperliquid candles ({'t', 'o', ..., 's'}; prices may be strings), sorted by time."""
+        if not candles:
+            return cls.empty(symbol or "")
+        symbol = symbol or candles[0].get("s", "")
+        columns = [[candle[key] for candle in candles] for key in RAW_KEYS[:-1]]
+        columns.append([candle.get("v", 0.0) for candle in candles])  # Volume is optional for charts
+        batch = cls(symbol, *columns)
+        return batch.sorted()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, symbol: str = "") -> "CandleBatch":
+        """DataIngestor frame ([timestamp (datetime64), open, high, low, close, volume])."""
+        if df.empty:
+            return cls.empty(symbol)
+        ts = df["timestamp"].to_numpy()
+        if np.issubdtype(ts.dtype, np.datetime64):
+            ts = ts.astype("datetime64[ms]").astype(np.int64)
+        return cls(symbol, ts, *(df[name].to_numpy() for name in CANDLE_FIELDS[1:]))
+
+    def sorted(self) -> "CandleBatch":
+        if len(self) < 2 or np.all(self.timestamp[1:] >= self.timestamp[:-1]):
+            return self
+        order = np.argsort(self.timestamp, kind="stable")
+        return CandleBatch(self.symbol, *(getattr(self, name)[order] for name in CANDLE_FIELDS))
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CandleBatch(self.symbol, *(getattr(self, name)[index] for name in CANDLE_FIELDS))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return CandleTick(int(self.timestamp[index]), *(float(getattr(self, name)[index]) for name in CANDLE_FIELDS[1:]), self.symbol)
+
+    def __iter__(self):
+        columns = [getattr(self, name).tolist() for name in CANDLE_FIELDS]
+        return (CandleTick(*row, self.symbol) for row in zip(*columns))
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataIngestor frame (timestamp as datetime64[ns])."""
+        return pd.DataFrame({
+            "timestamp": self.timestamp.astype("datetime64[ms]").astype("datetime64[ns]"),
+            "open": self.open, "high": self.high, "low": self.low,
+            "close": self.close, "volume": self.volume,
+        })
+
+    def to_raw(self) -> List[Dict[str, Any]]:
+        """Hyperliquid-format candles with numeric values."""
+        columns = [getattr(self, name).tolist() for name in CANDLE_FIELDS]
+        return [dict(zip(RAW_KEYS, row)) for row in zip(*columns)]
+
 class Position(BaseModel):
     symbol: str
     side: Literal["LONG", "SHORT"]
@@ -1,18 +1,102 @@
 import pandas as pd
 import logging
 import asyncio
-from typing import List
-from app.domain.strategies.indicators import Indicators
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+from app.core.config import settings
+from app.domain.strategies.indicators import Indicators, StreamingIndicators
 from app.infrastructure.hyperliquid.ingestor import DataIngestor
+from app.domain.aggregation import live_bars
 from app.domain.schemas import TradingSignal, PortfolioState, Candle, TradeAction, MarketRegime
 from app.domain.interfaces import IStrategy
 
 logger = logging.getLogger(__name__)
 
+EXECUTION_TIMEFRAME = "15m"  # Signals are computed (and, in event mode, triggered) on this timeframe
+
+# Candle windows fetched per analysis: timeframe -> (limit, required)
+TIMEFRAMES = {
+    "1d": (210, True),    # Macro regime (EMA 200)
+    "1w": (210, False),   # Super macro, informational
+    "4h": (50, False),    # Context / trend filter
+    EXECUTION_TIMEFRAME: (100, True),   # Execution signals
+}
+
+class DualCoreParams(BaseModel):
+    """Thresholds of the dual-core strategy. Defaults are the live settings."""
+    regime_ema: int = 200       # Daily EMA for BULL/BEAR regime
+    adx_period: int = 14
+    adx_trend: float = 25       # ADX above this -> trend engine, else range engine
+    ema_fast: int = 9
+    ema_slow: int = 21
+    rsi_period: int = 14
+    rsi_oversold: float = 30
+    rsi_overbought: float = 70
+    bb_period: int = 20
+    bb_std: float = 2
+
+    model_config = ConfigDict(frozen=True)
+
+def signal_arrays(
+    params: DualCoreParams,
+    ema_fast: np.ndarray,
+    ema_slow: np.ndarray,
+    rsi: np.ndarray,
+    adx: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized form of the decision rules in StrategyEngine.analyze (used by the backtester).
+    Returns boolean (buy, sell, trending) arrays, one entry per bar.
+    """
+    prev_fast = np.concatenate(([np.nan], ema_fast[:-1]))
+    prev_slow = np.concatenate(([np.nan], ema_slow[:-1]))
+    trending = adx > params.adx_trend
+    
+    # Engine A: Trend (EMA Crossover)
+    golden_cross = (prev_fast <= prev_slow) & (ema_fast > ema_slow)
+    death_cross = (prev_fast >= prev_slow) & (ema_fast < ema_slow)
+    # Engine B: Range (RSI + Bollinger)
+    oversold = (rsi < params.rsi_oversold) & (low <= lower)
+    overbought = (rsi > params.rsi_overbought) & (high >= upper)
+    
+    buy = np.where(trending, golden_cross, oversold)
+    sell = np.where(trending, death_cross, overbought & ~oversold)
+    return buy, sell, trending
+
 class StrategyEngine(IStrategy):
-    def __init__(self):
-        self.ingestor = DataIngestor()
+    execution_timeframe = EXECUTION_TIMEFRAME
+
+    def __init__(self, params: Optional[DualCoreParams] = None, symbol: Optional[str] = None):
+        self.params = params or DualCoreParams()
+        # One engine per symbol: indicator state below belongs to this symbol only
+        self.ingestor = DataIngestor(symbol=symbol)
         self.indicators = Indicators()
+        self.fetch_timeout = settings.CANDLE_FETCH_TIMEOUT
+        # Timeframes kept current by the WebSocket stream (event mode): no REST while fresh
+        self.stream_timeframes = set()
+        # Stream-built forming bars overlaid on fetched history
+        self.live_bars = live_bars
+        # Incremental indicator state per timeframe, kept across ticks
+        p = self.params
+        self.streams = {
+            "1d": StreamingIndicators(ema_periods=(p.regime_ema,), rsi_period=None, bb_period=None, adx_period=None),
+            "1w": StreamingIndicators(ema_periods=(p.regime_ema,), rsi_period=None, bb_period=None, adx_period=None),
+            EXECUTION_TIMEFRAME: StreamingIndicators(
+                ema_periods=(p.ema_fast, p.ema_slow), rsi_period=p.rsi_period,
+                bb_period=p.bb_period, bb_std=p.bb_std, adx_period=p.adx_period,
+            ),
+        }
+
+
+    def use_stream(self):
+        """Event mode: execution and 4h context bars come from the stream (closed bars only)."""
+        self.stream_timeframes = {self.execution_timeframe, "4h"}
         
     async def analyze(self, market_data: List[Candle], portfolio: PortfolioState) -> TradingSignal:
         """
@@ -21,62 +105,49 @@ class StrategyEngine(IStrategy):
         fetches its own multi-timeframe data via ingestor for now. 
         In a purer architecture, the orchestrator would fetch all data and pass it in.
         """
-        # 1. Get Data (Multi-Timeframe) - Async wrapper
-        # Macro (1d) for Regime
-        df_daily = await asyncio.to_thread(self.ingestor.get_candles, timeframe="1d", limit=210)
-        # Super Macro (1w)
-        df_weekly = await asyncio.to_thread(self.ingestor.get_candles, timeframe="1w", limit=210)
-        
-        # Context (4h) for Trend Filter
-        df_4h = await asyncio.to_thread(self.ingestor.get_candles, timeframe="4h", limit=50)
-        # Execution (15m) for Signals
-        df_15m = await asyncio.to_thread(self.ingestor.get_candles, timeframe="15m", limit=100)
+        # 1. Get Data (Multi-Timeframe) - fetched concurrently, bounded by the slowest fetch
+        frames, latency_ms = await self._fetch_timeframes()
+        df_daily, df_weekly, df_exec = frames["1d"], frames["1w"], frames[self.execution_timeframe]
+        skipped = [tf for tf, df in frames.items() if df.empty]
         
-        if df_daily.empty or df_15m.empty:
+        if any(required and frames[tf].empty for tf, (_, required) in TIMEFRAMES.items()):
             return TradingSignal(
                 symbol="UNKNOWN", 
                 action=TradeAction.HOLD, 
                 price=0.0, 
                 confidence=0.0, 
                 regime=MarketRegime.SIDEWAYS,
-                metadata={"reason": "No Data"}
+                metadata={"reason": "No Data", "latency_ms": latency_ms, "skipped": skipped}
             )
             
+        p = self.params
+        fast, slow, regime_ema = f"ema_{p.ema_fast}", f"ema_{p.ema_slow}", f"ema_{p.regime_ema}"
+        
         # 2. Macro Regime Selector (The Judge)
         # Calculate 200 EMA on Daily
-        df_daily['ema_200'] = self.indicators.ema(df_daily['close'], 200)
-        current_daily = df_daily.iloc[-1]
+        current_daily = self.streams["1d"].sync(df_daily)
         
         # Determine Regime
-        macro_regime = MarketRegime.BULL if current_daily['close'] > current_daily['ema_200'] else MarketRegime.BEAR
+        macro_regime = MarketRegime.BULL if current_daily['close'] > current_daily[regime_ema] else MarketRegime.BEAR
         
         # Super Macro Check (Weekly)
         if not df_weekly.empty:
-            df_weekly['ema_200'] = self.indicators.ema(df_weekly['close'], 200)
-            current_weekly = df_weekly.iloc[-1]
-            logger.info(f"🌌 SUPER MACRO (1W): Price: {current_weekly['close']} | EMA200: {current_weekly['ema_200']:.2f}")
+            current_weekly = self.streams["1w"].sync(df_weekly)
+            logger.info(f"🌌 SUPER MACRO (1W): Price: {current_weekly['close']} | EMA{p.regime_ema}: {current_weekly[regime_ema]:.2f}")
 
-        logger.info(f"🌍 MACRO REGIME (1D): {macro_regime} | Price: {current_daily['close']} | EMA200: {current_daily['ema_200']:.2f}")
+        logger.info(f"🌍 MACRO REGIME (1D): {macro_regime} | Price: {current_daily['close']} | EMA{p.regime_ema}: {current_daily[regime_ema]:.2f}")
 
-        # 3. Calculate Indicators (Execution Timeframe - 15m)
-        df = df_15m.copy()
-        # Trend
-        df['ema_9'] = self.indicators.ema(df['close'], 9)
-        df['ema_21'] = self.indicators.ema(df['close'], 21)
-        
-        # Momentum/Range
-        df['rsi'] = self.indicators.rsi(df['close'], 14)
-        bb = self.indicators.bollinger_bands(df['close'], 20, 2)
-        df = pd.concat([df, bb], axis=1)
-        
-        # Volatility
-        df['adx'] = self.indicators.adx(df['high'], df['low'], df['close'], 14)
-        
-        current = df.iloc[-1]
-        prev = df.iloc[-2]
+        # 3. Calculate Indicators (Execution Timeframe)
+        # Trend (EMA 9/21), Momentum/Range (RSI 14, BB 20/2), Volatility (ADX 14).
+        # Only bars newer than the previous tick are processed; the forming bar is peeked.
+        engine = self.streams[self.execution_timeframe]
+        current = engine.sync(df_exec)
+        prev = engine.last
+        if not prev:
+            prev = {fast: float('nan'), slow: float('nan')}
         
         # 4. Sub-Engine Selection
-        is_trending = current['adx'] > 25
+        is_trending = current['adx'] > p.adx_trend
         
         action = TradeAction.HOLD
         reason = "Wait"
@@ -85,12 +156,12 @@ class StrategyEngine(IStrategy):
         if is_trending:
             # --- ENGINE A: TREND (EMA Crossover) ---
             # Bullish Cross
-            if prev['ema_9'] <= prev['ema_21'] and current['ema_9'] > current['ema_21']:
+            if prev[fast] <= prev[slow] and current[fast] > current[slow]:
                 action = TradeAction.BUY
                 reason = 'Trend: EMA Golden Cross'
                 confidence = 0.8
             # Bearish Cross
-            elif prev['ema_9'] >= prev['ema_21'] and current['ema_9'] < current['ema_21']:
+            elif prev[fast] >= prev[slow] and current[fast] < current[slow]:
                 action = TradeAction.SELL
                 reason = 'Trend: EMA Death Cross'
                 confidence = 0.8
@@ -100,12 +171,12 @@ class StrategyEngine(IStrategy):
         else:
             # --- ENGINE B: RANGE (RSI + Bollinger) ---
             # Oversold + Lower Band Touch -> BUY
-            if current['rsi'] < 30 and current['low'] <= current['lower']:
+            if current['rsi'] < p.rsi_oversold and current['low'] <= current['lower']:
                 action = TradeAction.BUY
                 reason = 'Range: Oversold + BB Touch'
                 confidence = 0.7
             # Overbought + Upper Band Touch -> SELL
-            elif current['rsi'] > 70 and current['high'] >= current['upper']:
+            elif current['rsi'] > p.rsi_overbought and current['high'] >= current['upper']:
                 action = TradeAction.SELL
                 reason = 'Range: Overbought + BB Touch'
                 confidence = 0.7
@@ -122,5 +193,45 @@ class StrategyEngine(IStrategy):
             price=current_price,
             confidence=confidence,
             regime=macro_regime,
-            metadata={"reason": reason, "adx": float(current['adx']), "rsi": float(current['rsi'])}
+            metadata={
+                "reason": reason,
+                "adx": float(current['adx']),
+                "rsi": float(current['rsi']),
+                "latency_ms": latency_ms,
+                "skipped": skipped,
+            }
         )
+
+    async def _fetch_timeframes(self) -> Tuple[Dict[str, pd.DataFrame], Dict[str, float]]:
+        """
+        Fetches every timeframe in TIMEFRAMES concurrently, each with its own timeout.
+        A late or failed fetch yields an empty frame; analyze() holds if a required
+        timeframe is missing and skips the check for an optional one.
+        """
+        async def fetch(timeframe: str, limit: int) -> Tuple[pd.DataFrame, float]:
+            started = time.perf_counter()
+            # Event mode: the closed bar that triggered the cycle is the last row, no overlay.
+            # Otherwise a fresh stream-built forming bar replaces the REST one; if it covers its
+            # whole bucket the forming bar needs no REST request at all.
+            live = None
+            if timeframe in self.stream_timeframes:
+                kwargs = {"closed_only": True}
+            else:
+                live = self.live_bars.forming(self.ingestor.symbol, timeframe)
+                kwargs = {"closed_only": True} if live is not None and live[1] else {}
+            try:
+                df = await asyncio.wait_for(
+                    self.ingestor.get_candles(timeframe=timeframe, limit=limit, **kwargs),
+                    timeout=self.fetch_timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ {timeframe} candles late (>{self.fetch_timeout}s), skipping")
+                df = pd.DataFrame()
+            if live is not None:
+                df = self.live_bars.overlay_frame(self.ingestor.symbol, timeframe, df)
+            return df, round((time.perf_counter() - started) * 1000, 1)
+
+        results = await asyncio.gather(*(fetch(tf, limit) for tf, (limit, _) in TIMEFRAMES.items()))
+        frames = {tf: df for tf, (df, _) in zip(TIMEFRAMES, results)}
+        latency_ms = {tf: ms for tf, (_, ms) in zip(TIMEFRAMES, results)}
+        return frames, latency_ms
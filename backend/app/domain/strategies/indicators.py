@@ -1,6 +1,12 @@
+import math
+from collections import deque
+from typing import Dict, Optional, Tuple
+
 import pandas as pd
 import numpy as np
 
+from app.domain.schemas import CandleBatch
+
 class Indicators:
     @staticmethod
     def rsi(series: pd.Series, period: int = 14) -> pd.Series:
@@ -44,3 +50,310 @@ class Indicators:
         dx = (abs(plus_di - minus_di) / abs(plus_di + minus_di)) * 100
         adx = dx.rolling(period).mean()
         return adx
+
+
+# --- Streaming (incremental) indicators ---
+# Same formulas as the batch `Indicators` above, but carried forward one candle at a
+# time in O(1). Each indicator exposes `update()` (commit a closed value) and `peek()`
+# (evaluate a forming value without mutating state).
+
+def _ratio(num: float, den: float) -> float:
+    """Division with pandas semantics: x/0 -> +-inf, 0/0 -> nan."""
+    if den == 0:
+        if num == 0 or math.isnan(num):
+            return math.nan
+        return math.copysign(math.inf, num) * math.copysign(1.0, den)
+    return num / den
+
+
+class _RollingMean:
+    """Rolling mean over a fixed window (pandas `rolling(period).mean()`)."""
+    __slots__ = ("period", "values", "total", "invalid", "_ticks")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values: deque = deque()
+        self.total = 0.0
+        self.invalid = 0  # Non-finite values in window -> result is NaN
+        self._ticks = 0
+
+    def _step(self, x: float) -> Tuple[float, int, float]:
+        total, invalid = self.total, self.invalid
+        if math.isfinite(x):
+            total += x
+        else:
+            invalid += 1
+        count = len(self.values) + 1
+        if count > self.period:
+            old = self.values[0]
+            if math.isfinite(old):
+                total -= old
+            else:
+                invalid -= 1
+            count -= 1
+        value = total / self.period if count == self.period and not invalid else math.nan
+        return total, invalid, value
+
+    def peek(self, x: float) -> float:
+        return self._step(x)[2]
+
+    def update(self, x: float) -> float:
+        self.total, self.invalid, value = self._step(x)
+        self.values.append(x)
+        if len(self.values) > self.period:
+            self.values.popleft()
+        # Periodically re-sum the window so float drift never accumulates
+        self._ticks += 1
+        if self._ticks % (self.period * 64) == 0:
+            self.total = math.fsum(v for v in self.values if math.isfinite(v))
+        return value
+
+
+class _RollingStats:
+    """Sliding-window Welford mean / sample std (pandas `rolling(period).mean()/.std()`)."""
+    __slots__ = ("period", "values", "mean", "m2", "_ticks")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values: deque = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._ticks = 0
+
+    def _step(self, x: float) -> Tuple[float, float, float, float]:
+        n = len(self.values)
+        mean, m2 = self.mean, self.m2
+        if n < self.period:
+            n += 1
+            delta = x - mean
+            mean += delta / n
+            m2 += delta * (x - mean)
+        else:
+            old = self.values[0]
+            new_mean = mean + (x - old) / n
+            m2 += (x - old) * (x - new_mean + old - mean)
+            mean = new_mean
+        if n < self.period or n < 2:
+            return mean, m2, math.nan, math.nan
+        return mean, m2, mean, math.sqrt(max(m2, 0.0) / (n - 1))
+
+    def peek(self, x: float) -> Tuple[float, float]:
+        _, _, mean, std = self._step(x)
+        return mean, std
+
+    def update(self, x: float) -> Tuple[float, float]:
+        self.mean, self.m2, mean, std = self._step(x)
+        self.values.append(x)
+        if len(self.values) > self.period:
+            self.values.popleft()
+        self._ticks += 1
+        if self._ticks % (self.period * 64) == 0 and len(self.values) == self.period:
+            self.mean = math.fsum(self.values) / self.period
+            self.m2 = math.fsum((v - self.mean) ** 2 for v in self.values)
+        return mean, std
+
+
+class StreamingEMA:
+    """Incremental `Indicators.ema` (ewm span, adjust=False)."""
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, period: int):
+        self.alpha = 2.0 / (period + 1)
+        self.value: Optional[float] = None
+
+    def peek(self, close: float) -> float:
+        if self.value is None:
+            return close
+        return self.value + self.alpha * (close - self.value)
+
+    def update(self, close: float) -> float:
+        self.value = self.peek(close)
+        return self.value
+
+
+class StreamingRSI:
+    """Incremental `Indicators.rsi` (rolling-mean gains/losses, as in the batch version)."""
+    __slots__ = ("gains", "losses", "prev_close")
+
+    def __init__(self, period: int = 14):
+        self.gains = _RollingMean(period)
+        self.losses = _RollingMean(period)
+        self.prev_close: Optional[float] = None
+
+    def _split(self, close: float) -> Tuple[float, float]:
+        if self.prev_close is None:
+            return 0.0, 0.0
+        delta = close - self.prev_close
+        return max(delta, 0.0), max(-delta, 0.0)
+
+    @staticmethod
+    def _rsi(gain: float, loss: float) -> float:
+        rs = _ratio(gain, loss)
+        return 100 - (100 / (1 + rs))
+
+    def peek(self, close: float) -> float:
+        gain, loss = self._split(close)
+        return self._rsi(self.gains.peek(gain), self.losses.peek(loss))
+
+    def update(self, close: float) -> float:
+        gain, loss = self._split(close)
+        self.prev_close = close
+        return self._rsi(self.gains.update(gain), self.losses.update(loss))
+
+
+class StreamingBollinger:
+    """Incremental `Indicators.bollinger_bands`. Returns (upper, mid, lower)."""
+    __slots__ = ("stats", "std_dev")
+
+    def __init__(self, period: int = 20, std_dev: float = 2):
+        self.stats = _RollingStats(period)
+        self.std_dev = std_dev
+
+    def _bands(self, mean: float, std: float) -> Tuple[float, float, float]:
+        return mean + std * self.std_dev, mean, mean - std * self.std_dev
+
+    def peek(self, close: float) -> Tuple[float, float, float]:
+        return self._bands(*self.stats.peek(close))
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        return self._bands(*self.stats.update(close))
+
+
+class StreamingADX:
+    """Incremental `Indicators.adx` using rolling DM/TR sums."""
+    __slots__ = ("plus_dm", "minus_dm", "tr", "dx", "prev")
+
+    def __init__(self, period: int = 14):
+        self.plus_dm = _RollingMean(period)
+        self.minus_dm = _RollingMean(period)
+        self.tr = _RollingMean(period)
+        self.dx = _RollingMean(period)
+        self.prev: Optional[Tuple[float, float, float]] = None  # (high, low, close)
+
+    def _raw(self, high: float, low: float, close: float) -> Tuple[float, float, float]:
+        if self.prev is None:
+            return 0.0, 0.0, high - low
+        prev_high, prev_low, prev_close = self.prev
+        # Mirrors the batch version exactly (including its use of low.diff())
+        up = high - prev_high
+        down = low - prev_low
+        plus_dm = up if (up > down and up > 0) else 0.0
+        minus_dm = down if (down > plus_dm and down > 0) else 0.0
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        return plus_dm, minus_dm, tr
+
+    @staticmethod
+    def _dx(plus_dm: float, minus_dm: float, atr: float) -> float:
+        plus_di = 100 * _ratio(plus_dm, atr)
+        minus_di = 100 * _ratio(minus_dm, atr)
+        return _ratio(abs(plus_di - minus_di), abs(plus_di + minus_di)) * 100
+
+    def peek(self, high: float, low: float, close: float) -> float:
+        plus_dm, minus_dm, tr = self._raw(high, low, close)
+        dx = self._dx(self.plus_dm.peek(plus_dm), self.minus_dm.peek(minus_dm), self.tr.peek(tr))
+        return self.dx.peek(dx)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        plus_dm, minus_dm, tr = self._raw(high, low, close)
+        self.prev = (high, low, close)
+        dx = self._dx(self.plus_dm.update(plus_dm), self.minus_dm.update(minus_dm), self.tr.update(tr))
+        return self.dx.update(dx)
+
+
+class StreamingIndicators:
+    """
+    Stateful indicator engine for one candle series.
+    Feed closed candles with `update()`; evaluate the forming candle with `peek()`.
+    Candles only need `timestamp`, `high`, `low` and `close` attributes
+    (a `Candle`, a DataFrame row or an `itertuples()` record all work).
+    Any indicator can be disabled by passing None for its period.
+    """
+
+    def __init__(
+        self,
+        ema_periods: Tuple[int, ...] = (9, 21),
+        rsi_period: Optional[int] = 14,
+        bb_period: Optional[int] = 20,
+        bb_std: float = 2,
+        adx_period: Optional[int] = 14,
+    ):
+        self._config = dict(
+            ema_periods=ema_periods, rsi_period=rsi_period,
+            bb_period=bb_period, bb_std=bb_std, adx_period=adx_period,
+        )
+        self.reset()
+
+    def reset(self):
+        ema_periods, rsi_period = self._config["ema_periods"], self._config["rsi_period"]
+        bb_period, bb_std, adx_period = self._config["bb_period"], self._config["bb_std"], self._config["adx_period"]
+        self.emas = {f"ema_{p}": StreamingEMA(p) for p in ema_periods}
+        self.rsi = StreamingRSI(rsi_period) if rsi_period else None
+        self.bb = StreamingBollinger(bb_period, bb_std) if bb_period else None
+        self.adx = StreamingADX(adx_period) if adx_period else None
+        self.last_timestamp = None
+        self.last: Dict[str, float] = {}  # Values for the last committed candle
+        self.count = 0
+
+    def _evaluate(self, candle, commit: bool) -> Dict[str, float]:
+        return self._evaluate_values(float(candle.high), float(candle.low), float(candle.close), commit)
+
+    def _evaluate_values(self, high: float, low: float, close: float, commit: bool) -> Dict[str, float]:
+        values = {"close": close, "high": high, "low": low}
+        for name, ema in self.emas.items():
+            values[name] = ema.update(close) if commit else ema.peek(close)
+        if self.rsi:
+            values["rsi"] = self.rsi.update(close) if commit else self.rsi.peek(close)
+        if self.bb:
+            upper, mid, lower = self.bb.update(close) if commit else self.bb.peek(close)
+            values.update(upper=upper, mid=mid, lower=lower)
+        if self.adx:
+            values["adx"] = self.adx.update(high, low, close) if commit else self.adx.peek(high, low, close)
+        return values
+
+    def update(self, candle) -> Dict[str, float]:
+        """Commits a closed candle and returns its indicator values."""
+        self.last = self._evaluate(candle, commit=True)
+        self.last_timestamp = candle.timestamp
+        self.count += 1
+        return self.last
+
+    def peek(self, candle) -> Dict[str, float]:
+        """Indicator values if `candle` were appended, without committing it."""
+        return self._evaluate(candle, commit=False)
+
+    def sync(self, candles) -> Dict[str, float]:
+        """
+        Catches up with sorted OHLC candles: a CandleBatch, or a DataFrame as returned
+        by DataIngestor. Only bars newer than the last committed candle are processed;
+        the final bar is treated as the forming candle and peeked, not committed.
+        Columns are read as arrays, so no object is created per bar.
+        """
+        if not len(candles):
+            return self.last
+        timestamps, high, low, close = _hlc_columns(candles)
+        if self.last_timestamp is not None and timestamps[0] > self.last_timestamp:
+            # History gap bigger than the window: start over from this frame
+            self.reset()
+        start = 0 if self.last_timestamp is None else int(np.searchsorted(timestamps, self.last_timestamp, side='right'))
+        rows = zip(timestamps[start:-1].tolist(), high[start:-1].tolist(), low[start:-1].tolist(), close[start:-1].tolist())
+        for ts, h, l, c in rows:
+            self.last = self._evaluate_values(h, l, c, commit=True)
+            self.last_timestamp = ts
+            self.count += 1
+        if self.last_timestamp is not None and timestamps[-1] <= self.last_timestamp:
+            return self.last
+        return self._evaluate_values(float(high[-1]), float(low[-1]), float(close[-1]), commit=False)
+
+def _hlc_columns(candles) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(timestamps as int64 ms, high, low, close) of a CandleBatch or an OHLC DataFrame."""
+    if isinstance(candles, CandleBatch):
+        return candles.timestamp, candles.high, candles.low, candles.close
+    timestamps = candles['timestamp'].to_numpy()
+    if np.issubdtype(timestamps.dtype, np.datetime64):
+        timestamps = timestamps.astype('datetime64[ms]').astype(np.int64)
+    return (
+        timestamps,
+        candles['high'].to_numpy(dtype=np.float64),
+        candles['low'].to_numpy(dtype=np.float64),
+        candles['close'].to_numpy(dtype=np.float64),
+    )
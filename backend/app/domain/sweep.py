@@ -0,0 +1,145 @@
+import itertools
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from app.domain.backtest import BacktestEngine, timestamps_ms
+from app.domain.risk import RiskManager
+from app.domain.strategies.dual_core import DualCoreParams
+
+logger = logging.getLogger(__name__)
+
+# Default search space around the live thresholds
+DEFAULT_GRID: Dict[str, Sequence] = {
+    "adx_trend": [20, 25, 30],
+    "ema_fast": [7, 9, 12],
+    "ema_slow": [21, 26, 34],
+    "rsi_oversold": [25, 30, 35],
+    "rsi_overbought": [65, 70, 75],
+    "bb_period": [20],
+    "bb_std": [2, 2.5],
+    "regime_ema": [100, 200],
+}
+
+# Column arrays published to workers: name -> (shm block, shape, dtype)
+_worker_arrays: Dict[str, np.ndarray] = {}
+_worker_blocks: List[shared_memory.SharedMemory] = []
+
+def _attach(specs: Dict[str, tuple]):
+    """Pool initializer: map the parent's shared-memory blocks as read-only arrays (no copy)."""
+    for name, (shm_name, shape, dtype) in specs.items():
+        # Pool workers share the parent's resource tracker, which unlinks the blocks
+        block = shared_memory.SharedMemory(name=shm_name)
+        arr = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        arr.flags.writeable = False
+        _worker_blocks.append(block)
+        _worker_arrays[name] = arr
+
+def _evaluate(params: Dict[str, Any], engine_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs one backtest in a worker against the shared arrays."""
+    risk = RiskManager()
+    risk.update_allocation(engine_kwargs["usdc_lock"], engine_kwargs["btc_lock"])
+    engine = BacktestEngine(
+        params=DualCoreParams(**params),
+        risk=risk,
+        symbol=engine_kwargs["symbol"],
+        initial_cash=engine_kwargs["initial_cash"],
+        fee_rate=engine_kwargs["fee_rate"],
+    )
+    a = _worker_arrays
+    report = engine.run_arrays(a["ts"], a["high"], a["low"], a["close"], a.get("daily_ts"), a.get("daily_close"))
+    return {**params, **report.summary()}
+
+class ParameterSweep:
+    """
+    Grid or random search over DualCoreParams, backtested in parallel.
+    Candle columns are placed in shared memory once and mapped by every worker,
+    so only the parameter dicts and result summaries cross process boundaries.
+    """
+    def __init__(
+        self,
+        grid: Optional[Dict[str, Sequence]] = None,
+        base: Optional[DualCoreParams] = None,
+        risk: Optional[RiskManager] = None,
+        symbol: str = "BTC",
+        initial_cash: float = 10_000.0,
+        fee_rate: float = 0.00035,
+        max_workers: Optional[int] = None,
+    ):
+        self.grid = grid or DEFAULT_GRID
+        self.base = base or DualCoreParams()
+        risk = risk or RiskManager()
+        self.engine_kwargs = {
+            "symbol": symbol,
+            "initial_cash": initial_cash,
+            "fee_rate": fee_rate,
+            "usdc_lock": risk.min_liquidity_reserve * 100,
+            "btc_lock": risk.btc_lock_pct * 100,
+        }
+        self.max_workers = max_workers or os.cpu_count()
+
+    def combinations(self, samples: Optional[int] = None, seed: int = 0) -> List[Dict[str, Any]]:
+        """Every grid point, or `samples` random ones. Invalid EMA pairs are dropped."""
+        keys = list(self.grid)
+        combos = []
+        for values in itertools.product(*(self.grid[k] for k in keys)):
+            params = {**self.base.model_dump(), **dict(zip(keys, values))}
+            if params["ema_fast"] < params["ema_slow"] and params["rsi_oversold"] < params["rsi_overbought"]:
+                combos.append(params)
+        if samples is not None and samples < len(combos):
+            combos = random.Random(seed).sample(combos, samples)
+        return combos
+
+    def run(
+        self,
+        candles: pd.DataFrame,
+        daily: Optional[pd.DataFrame] = None,
+        samples: Optional[int] = None,
+        seed: int = 0,
+        max_drawdown: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """
+        Backtests every combination and returns one row per parameter set, ranked by
+        Sharpe (then shallower drawdown). `max_drawdown` (e.g. -0.25) drops deeper runs.
+        """
+        combos = self.combinations(samples, seed)
+        columns = {
+            "ts": timestamps_ms(candles['timestamp']),
+            "high": candles['high'].to_numpy(dtype=np.float64),
+            "low": candles['low'].to_numpy(dtype=np.float64),
+            "close": candles['close'].to_numpy(dtype=np.float64),
+        }
+        if daily is not None:
+            columns["daily_ts"] = timestamps_ms(daily['timestamp'])
+            columns["daily_close"] = daily['close'].to_numpy(dtype=np.float64)
+
+        started = time.perf_counter()
+        blocks, specs = [], {}
+        try:
+            for name, arr in columns.items():
+                block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+                np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[:] = arr
+                blocks.append(block)
+                specs[name] = (block.name, arr.shape, arr.dtype.str)
+
+            logger.info(f"🔬 Sweep: {len(combos)} combinations on {len(candles)} bars, {self.max_workers} workers")
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_attach, initargs=(specs,)) as pool:
+                futures = [pool.submit(_evaluate, params, self.engine_kwargs) for params in combos]
+                rows = [f.result() for f in futures]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        logger.info(f"🔬 Sweep finished in {time.perf_counter() - started:.1f}s")
+        results = pd.DataFrame(rows)
+        if results.empty:
+            return results
+        if max_drawdown is not None:
+            results = results[results["max_drawdown"] >= max_drawdown]
+        return results.sort_values(["sharpe", "max_drawdown"], ascending=[False, False]).reset_index(drop=True)
@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Fixed-width column files, one per field
+COLUMNS: Dict[str, np.dtype] = {
+    "timestamp": np.dtype("<i8"),  # Unix ms (bar open time)
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+INDEX_FILE = "index.json"
+
+def contiguous_rows(timestamps, step: int) -> int:
+    """Number of leading bars with no missing bar between them (bars `step` ms apart)."""
+    ts = np.asarray(timestamps, dtype=np.int64)
+    gaps = np.flatnonzero(np.diff(ts) > step)
+    return int(gaps[0]) + 1 if len(gaps) else len(ts)
+
+class CandleArchive:
+    """
+    Append-only columnar candle archive on local disk.
+    Layout: <root>/<symbol>/<timeframe>/{timestamp.i8, open.f8, ..., index.json}
+    The index records how many rows are committed; readers never look past it, so
+    a crash mid-append leaves the archive readable. Reads are numpy.memmap views.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, symbol, timeframe)
+
+    def _lock(self, symbol: str, timeframe: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault((symbol, timeframe), threading.Lock())
+
+    def _index(self, symbol: str, timeframe: str) -> Dict:
+        path = os.path.join(self._dir(symbol, timeframe), INDEX_FILE)
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"rows": 0, "first": None, "last": None}
+
+    def count(self, symbol: str, timeframe: str) -> int:
+        return self._index(symbol, timeframe)["rows"]
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        return self._index(symbol, timeframe)["last"]
+
+    def append(self, symbol: str, timeframe: str, columns: Dict[str, np.ndarray]) -> int:
+        """
+        Appends closed bars (column arrays keyed like COLUMNS). Rows at or before the
+        last archived timestamp are skipped. Returns the number of rows written.
+        Bars need not be contiguous (e.g. after downtime): readers check for gaps
+        with contiguous_rows().
+        """
+        ts = np.asarray(columns["timestamp"], dtype=COLUMNS["timestamp"])
+        with self._lock(symbol, timeframe):
+            index = self._index(symbol, timeframe)
+            keep = ts > index["last"] if index["last"] is not None else np.ones(len(ts), dtype=bool)
+            # Archive must stay sorted and unique
+            if keep.any():
+                keep &= np.concatenate(([True], np.diff(ts) > 0))
+            rows = int(keep.sum())
+            if rows == 0:
+                return 0
+
+            directory = self._dir(symbol, timeframe)
+            os.makedirs(directory, exist_ok=True)
+            committed = index["rows"]
+            for name, dtype in COLUMNS.items():
+                path = os.path.join(directory, f"{name}.{dtype.kind}{dtype.itemsize}")
+                with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                    # Drop any uncommitted tail left by an interrupted append
+                    f.truncate(committed * dtype.itemsize)
+                    f.seek(0, os.SEEK_END)
+                    f.write(np.ascontiguousarray(np.asarray(columns[name], dtype=dtype)[keep]).tobytes())
+
+            written = ts[keep]
+            new_index = {
+                "rows": committed + rows,
+                "first": index["first"] if index["first"] is not None else int(written[0]),
+                "last": int(written[-1]),
+            }
+            tmp = os.path.join(directory, INDEX_FILE + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(new_index, f)
+            os.replace(tmp, os.path.join(directory, INDEX_FILE))
+            return rows
+
+    def append_frame(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """Appends bars from an ingestor-style DataFrame (datetime or ms `timestamp`)."""
+        if df.empty:
+            return 0
+        ts = df['timestamp']
+        if pd.api.types.is_datetime64_any_dtype(ts):
+            ts = ts.to_numpy().astype("datetime64[ms]").astype(np.int64)
+        columns = {name: df[name].to_numpy() for name in COLUMNS if name != "timestamp"}
+        columns["timestamp"] = np.asarray(ts)
+        return self.append(symbol, timeframe, columns)
+
+    def read(self, symbol: str, timeframe: str, start: Optional[int] = None, end: Optional[int] = None, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Zero-copy column views for bars with start <= timestamp <= end (Unix ms),
+        keeping only the last `limit` of them. Empty arrays if nothing is archived.
+        """
+        rows = self.count(symbol, timeframe)
+        if rows == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+        directory = self._dir(symbol, timeframe)
+        maps = {
+            name: np.memmap(os.path.join(directory, f"{name}.{dtype.kind}{dtype.itemsize}"), dtype=dtype, mode="r", shape=(rows,))
+            for name, dtype in COLUMNS.items()
+        }
+        ts = maps["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = rows if end is None else int(np.searchsorted(ts, end, side="right"))
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return {name: arr[lo:hi] for name, arr in maps.items()}
+
+    def read_frame(self, symbol: str, timeframe: str, start: Optional[int] = None, end: Optional[int] = None, limit: Optional[int] = None) -> pd.DataFrame:
+        """Same as read() as an ingestor-style DataFrame (datetime `timestamp`)."""
+        cols = self.read(symbol, timeframe, start, end, limit)
+        df = pd.DataFrame({name: np.array(arr) for name, arr in cols.items()})
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        return df
+
+def _default_archive() -> Optional[CandleArchive]:
+    from app.core.config import settings
+    return CandleArchive(settings.CANDLE_ARCHIVE_DIR) if settings.CANDLE_ARCHIVE_DIR else None
+
+# Shared process-wide archive (None when CANDLE_ARCHIVE_DIR is empty)
+candle_archive = _default_archive()
@@ -0,0 +1,74 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+from sqlalchemy import text
+from app.core.config import settings
+from app.domain.analytics import BUCKETS_PER_YEAR, EquityHistory
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.journal import journal
+
+logger = logging.getLogger(__name__)
+
+# Dashboard ranges -> (days of history, bucket width); None = all history
+TIMEFRAMES: Dict[str, Tuple[Optional[int], str]] = {
+    "1w": (7, "1 day"),
+    "1m": (30, "1 day"),
+    "3m": (90, "1 day"),
+    "6m": (182, "1 day"),
+    "1y": (365, "1 day"),
+    "all": (None, "1 week"),
+}
+
+def history_query(width: str, bounded: bool):
+    """Re-buckets the portfolio_daily continuous aggregate (never the raw snapshots)."""
+    where = "WHERE bucket >= :since " if bounded else ""
+    return text(
+        f"SELECT time_bucket(INTERVAL '{width}', bucket) AS bucket, "
+        "last(equity, bucket) AS equity, last(stable, bucket) AS stable, "
+        "last(short_term, bucket) AS short_term, last(long_term, bucket) AS long_term, "
+        "last(btc_amount, bucket) AS btc_amount, last(btc_price, bucket) AS btc_price "
+        f"FROM portfolio_daily {where}"
+        "GROUP BY 1 ORDER BY 1"
+    )
+
+class AnalyticsService:
+    """
+    Equity history per dashboard range, cached until the journal writes a new
+    snapshot (or `ttl` expires, for snapshots written by another process).
+    """
+    def __init__(self, session_factory: Callable = AsyncSessionLocal, ttl: float = settings.ANALYTICS_TTL):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self._cache: Dict[str, Tuple[int, float, EquityHistory]] = {}
+
+    async def history(self, timeframe: str) -> EquityHistory:
+        days, width = TIMEFRAMES.get(timeframe, TIMEFRAMES["6m"])
+        cached = self._cache.get(timeframe)
+        if cached is not None:
+            generation, loaded_at, history = cached
+            if generation == journal.snapshot_generation and time.monotonic() - loaded_at < self.ttl:
+                return history
+
+        generation = journal.snapshot_generation
+        params = {} if days is None else {"since": datetime.utcnow() - timedelta(days=days)}
+        async with self.session_factory() as session:
+            result = await session.execute(history_query(width, days is not None), params)
+            rows = result.all()
+        cols = {key: [getattr(row, key) for row in rows] for key in ("bucket", "equity", "stable", "short_term", "long_term", "btc_amount", "btc_price")}
+        history = EquityHistory.from_columns(cols, BUCKETS_PER_YEAR[width])
+        self._cache[timeframe] = (generation, time.monotonic(), history)
+        return history
+
+    async def trade_count(self, since: datetime) -> int:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                text("SELECT count(*) FROM trade_logs WHERE type = 'TRADE' AND time >= :since"),
+                {"since": since},
+            )
+            return int(result.scalar() or 0)
+
+    def clear(self):
+        self._cache.clear()
+
+analytics = AnalyticsService()
@@ -0,0 +1,137 @@
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.core.config import settings
+from app.domain.schemas import Candle
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.models import MarketCandle
+from app.infrastructure.database.writer import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+# Table/continuous aggregate holding each timeframe (see init_timescale.sql)
+CANDLE_VIEWS = {
+    "1m": "market_candles",
+    "15m": "market_candles_15m",
+    "1h": "market_candles_1h",
+    "4h": "market_candles_4h",
+    "1d": "market_candles_1d",
+}
+
+# 1m bars in a complete bucket of each aggregate timeframe
+BUCKET_BARS = {"15m": 15, "1h": 60, "4h": 240, "1d": 1440}
+
+OHLCV = ("open", "high", "low", "close", "volume")
+
+def to_row(candle: Candle) -> dict:
+    return {
+        "time": datetime.utcfromtimestamp(candle.timestamp / 1000),
+        "symbol": candle.symbol,
+        "open": candle.open,
+        "high": candle.high,
+        "low": candle.low,
+        "close": candle.close,
+        "volume": candle.volume,
+    }
+
+def upsert_statement(rows: List[dict]):
+    """Multi-row INSERT ... ON CONFLICT (time, symbol) DO UPDATE: the forming bar is rewritten in place."""
+    stmt = pg_insert(MarketCandle).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[MarketCandle.time, MarketCandle.symbol],
+        set_={column: stmt.excluded[column] for column in OHLCV},
+    )
+
+class CandleWriter(BatchWriter):
+    """
+    Batches stream candles into the market_candles hypertable. Updates of the same bar
+    (the forming 1m candle is streamed many times) collapse to the latest version before
+    the write. Pending bars are flushed every `flush_interval` seconds, or as soon as
+    `max_batch` distinct bars are waiting. Failed batches are kept and retried.
+    """
+    name = "Candle writer"
+    items = "candles"
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        max_batch: int = settings.CANDLE_WRITE_BATCH,
+        flush_interval: float = settings.CANDLE_WRITE_INTERVAL,
+        enabled: bool = settings.CANDLE_DB_ENABLED,
+    ):
+        super().__init__(session_factory, max_batch, flush_interval, enabled)
+        self.max_pending = max_batch * 100  # Bound memory while the database is down
+        self._pending: Dict[Tuple[str, datetime], dict] = {}
+
+    def add(self, candle: Candle):
+        if not self.enabled:
+            return
+        row = to_row(candle)
+        key = (row["symbol"], row["time"])
+        self._pending.pop(key, None)  # Re-insert so the dict stays in arrival order
+        self._pending[key] = row
+        while len(self._pending) > self.max_pending:
+            self._pending.pop(next(iter(self._pending)))
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _take(self) -> List[dict]:
+        rows = list(self._pending.values())
+        self._pending = {}
+        return rows
+
+    async def _write(self, session, rows: List[dict]):
+        for i in range(0, len(rows), self.max_batch):
+            await session.execute(upsert_statement(rows[i:i + self.max_batch]))
+
+    def _restore(self, rows: List[dict]):
+        # Put unwritten rows back unless a newer version of the bar arrived meanwhile
+        for row in rows:
+            self._pending.setdefault((row["symbol"], row["time"]), row)
+
+async def read_candles(
+    symbol: str,
+    timeframe: str,
+    start_ms: int,
+    end_ms: int,
+    session_factory: Callable = AsyncSessionLocal,
+) -> List[dict]:
+    """
+    Stored bars in [start_ms, end_ms] as Hyperliquid-format candles ([] for unsupported timeframes).
+    Aggregate buckets built from an incomplete set of 1m bars are left out, so the result
+    may have holes: callers must check it is contiguous.
+    """
+    view = CANDLE_VIEWS.get(timeframe)
+    if view is None:
+        return []
+    complete = "AND bars >= :bars " if timeframe in BUCKET_BARS else ""
+    query = text(
+        f"SELECT time, open, high, low, close, volume FROM {view} "
+        "WHERE symbol = :symbol AND time >= :start AND time <= :end AND open IS NOT NULL "
+        f"{complete}ORDER BY time"
+    )
+    params = {
+        "symbol": symbol,
+        "start": datetime.utcfromtimestamp(start_ms / 1000),
+        "end": datetime.utcfromtimestamp(end_ms / 1000),
+    }
+    if complete:
+        params["bars"] = BUCKET_BARS[timeframe]
+    async with session_factory() as session:
+        result = await session.execute(query, params)
+        rows = result.all()
+    return [
+        {
+            't': int(row.time.replace(tzinfo=timezone.utc).timestamp() * 1000),
+            'o': row.open, 'h': row.high, 'l': row.low, 'c': row.close, 'v': row.volume or 0.0,
+        }
+        for row in rows
+    ]
+
+candle_writer = CandleWriter()
@@ -32,9 +32,11 @@ async def init_db():
         try:
             with open("app/infrastructure/database/init_timescale.sql", "r") as f:
                 sql_script = f.read()
-                # Execute statements one by one or as a block depending on driver support
-                # asyncpg supports executing blocks usually
-                await conn.execute(text(sql_script))
+                # asyncpg prepares each statement, so the script is executed one statement at a time
+                lines = [line for line in sql_script.splitlines() if not line.strip().startswith("--")]
+                for statement in "\n".join(lines).split(";"):
+                    if statement.strip():
+                        await conn.execute(text(statement))
         except Exception as e:
             print(f"Warning: Could not execute TimescaleDB script: {e}")
             # This might fail if extension is not installed in Postgres or permissions issue
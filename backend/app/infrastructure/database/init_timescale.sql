@@ -7,3 +7,72 @@ CREATE EXTENSION IF NOT EXISTS timescaledb;
 SELECT create_hypertable('portfolio_snapshots', 'time', if_not_exists => TRUE);
 SELECT create_hypertable('trade_logs', 'time', if_not_exists => TRUE);
 SELECT create_hypertable('market_candles', 'time', if_not_exists => TRUE);
+
+-- OHLC columns for databases created before they were part of the model
+ALTER TABLE market_candles ADD COLUMN IF NOT EXISTS open DOUBLE PRECISION;
+ALTER TABLE market_candles ADD COLUMN IF NOT EXISTS high DOUBLE PRECISION;
+ALTER TABLE market_candles ADD COLUMN IF NOT EXISTS low DOUBLE PRECISION;
+
+-- Higher timeframes as continuous aggregates of the 1m bars.
+-- materialized_only = false: queries also see the not-yet-materialized (forming) buckets
+-- bars: 1m rows in the bucket; buckets with missing minutes (stream downtime) are partial
+-- and are not served as closed bars (see read_candles)
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS market_candles_15m
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '15 minutes', time) AS time, symbol,
+       first(open, time) AS open, max(high) AS high, min(low) AS low,
+       last(close, time) AS close, sum(volume) AS volume, count(*) AS bars
+FROM market_candles
+GROUP BY 1, symbol
+WITH NO DATA;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS market_candles_1h
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 hour', time) AS time, symbol,
+       first(open, time) AS open, max(high) AS high, min(low) AS low,
+       last(close, time) AS close, sum(volume) AS volume, count(*) AS bars
+FROM market_candles
+GROUP BY 1, symbol
+WITH NO DATA;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS market_candles_4h
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '4 hours', time) AS time, symbol,
+       first(open, time) AS open, max(high) AS high, min(low) AS low,
+       last(close, time) AS close, sum(volume) AS volume, count(*) AS bars
+FROM market_candles
+GROUP BY 1, symbol
+WITH NO DATA;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS market_candles_1d
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 day', time) AS time, symbol,
+       first(open, time) AS open, max(high) AS high, min(low) AS low,
+       last(close, time) AS close, sum(volume) AS volume, count(*) AS bars
+FROM market_candles
+GROUP BY 1, symbol
+WITH NO DATA;
+
+-- Refresh closed buckets in the background (the forming bucket comes from the real-time part)
+SELECT add_continuous_aggregate_policy('market_candles_15m', start_offset => INTERVAL '1 day', end_offset => INTERVAL '15 minutes', schedule_interval => INTERVAL '5 minutes', if_not_exists => TRUE);
+SELECT add_continuous_aggregate_policy('market_candles_1h', start_offset => INTERVAL '3 days', end_offset => INTERVAL '1 hour', schedule_interval => INTERVAL '15 minutes', if_not_exists => TRUE);
+SELECT add_continuous_aggregate_policy('market_candles_4h', start_offset => INTERVAL '7 days', end_offset => INTERVAL '4 hours', schedule_interval => INTERVAL '1 hour', if_not_exists => TRUE);
+SELECT add_continuous_aggregate_policy('market_candles_1d', start_offset => INTERVAL '30 days', end_offset => INTERVAL '1 day', schedule_interval => INTERVAL '1 hour', if_not_exists => TRUE);
+
+-- Daily portfolio state for the analytics endpoints (last snapshot of each day).
+-- Endpoints re-bucket this view instead of scanning raw snapshots.
+CREATE MATERIALIZED VIEW IF NOT EXISTS portfolio_daily
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 day', time) AS bucket,
+       last(total_equity_usd, time) AS equity,
+       last(stablecoin_balance, time) AS stable,
+       last(short_term_equity_usd, time) AS short_term,
+       last(long_term_equity_usd, time) AS long_term,
+       last(long_term_btc_amount, time) AS btc_amount,
+       last(btc_price, time) AS btc_price
+FROM portfolio_snapshots
+GROUP BY 1
+WITH NO DATA;
+
+SELECT add_continuous_aggregate_policy('portfolio_daily', start_offset => INTERVAL '3 days', end_offset => INTERVAL '1 hour', schedule_interval => INTERVAL '15 minutes', if_not_exists => TRUE);
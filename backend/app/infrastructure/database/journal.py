@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from app.core.config import settings
+from app.domain.schemas import PortfolioState
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.models import PortfolioSnapshot, TradeLog
+from app.infrastructure.database.writer import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+TABLES = {"log": TradeLog, "snapshot": PortfolioSnapshot}
+
+Record = Tuple[str, Dict[str, Any]]  # (table kind, row)
+
+class JournalWriter(BatchWriter):
+    """
+    Background writer for TradeLog and PortfolioSnapshot rows. Callers only append to an
+    in-memory queue (never awaited), and the queue is written in one transaction per flush:
+    every `flush_interval` seconds, or as soon as `max_batch` records are waiting.
+    When the queue is full (database slow or down) records spill to a JSON-lines file
+    that is replayed after the next successful flush; without a spill file they are dropped.
+    """
+    name = "Journal writer"
+    items = "journal records"
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        max_queue: int = settings.JOURNAL_QUEUE,
+        max_batch: int = settings.JOURNAL_BATCH,
+        flush_interval: float = settings.JOURNAL_FLUSH_INTERVAL,
+        snapshot_interval: float = settings.JOURNAL_SNAPSHOT_INTERVAL,
+        spill_path: str = settings.JOURNAL_SPILL_PATH,
+        enabled: bool = settings.JOURNAL_ENABLED,
+    ):
+        super().__init__(session_factory, max_batch, flush_interval, enabled)
+        self.max_queue = max_queue
+        self.snapshot_interval = snapshot_interval
+        self.spill_path = spill_path
+        self.queue: Deque[Record] = deque()
+        self._last_time = datetime.min
+        self._last_snapshot = float("-inf")
+        self.spilled = 0
+        self.dropped = 0
+        self.snapshot_generation = 0  # Bumped whenever snapshots are written (analytics cache key)
+
+    def log(self, type: str, message: str, metadata: Optional[Dict[str, Any]] = None):
+        """Queues a TradeLog row (type: TRADE, SIGNAL, SYSTEM, ERROR, RISK)."""
+        self._record("log", {"type": type, "message": message, "metadata_json": metadata})
+
+    def snapshot(self, state: PortfolioState, btc_price: float = 0.0, crypto_value: float = 0.0, btc_amount: float = 0.0, short_term_value: float = 0.0, force: bool = False):
+        """
+        Queues an equity snapshot, at most one per snapshot_interval unless forced.
+        `short_term_value` is the part of `crypto_value` held by the short-term bag; the
+        rest is the long-term bag, so stable + short-term + long-term = total equity.
+        """
+        now = time.monotonic()
+        if not self.enabled or (not force and now - self._last_snapshot < self.snapshot_interval):
+            return
+        self._last_snapshot = now
+        self._record("snapshot", {
+            "total_equity_usd": state.available_balance + crypto_value,
+            "stablecoin_balance": state.available_balance,
+            "short_term_equity_usd": short_term_value,
+            "long_term_equity_usd": crypto_value - short_term_value,
+            "long_term_btc_amount": btc_amount,
+            "btc_price": btc_price,
+        })
+
+    def _record(self, kind: str, row: Dict[str, Any]):
+        if not self.enabled:
+            return
+        row["time"] = self._next_time()
+        if len(self.queue) >= self.max_queue:
+            self._spill([(kind, row)])
+            return
+        self.queue.append((kind, row))
+        if len(self.queue) >= self.max_batch:
+            self._schedule_flush()
+
+    def _next_time(self) -> datetime:
+        # 'time' is the primary key: keep timestamps strictly increasing
+        now = datetime.utcnow()
+        if now <= self._last_time:
+            now = self._last_time + timedelta(microseconds=1)
+        self._last_time = now
+        return now
+
+    def _take(self) -> List[Record]:
+        return [self.queue.popleft() for _ in range(len(self.queue))]
+
+    async def _write(self, session, records: List[Record]):
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for kind, row in records:
+            grouped.setdefault(kind, []).append(row)
+        for kind, rows in grouped.items():
+            for i in range(0, len(rows), self.max_batch):
+                await session.execute(insert(TABLES[kind]), rows[i:i + self.max_batch])
+
+    def _written(self, records: List[Record]):
+        if any(kind == "snapshot" for kind, _ in records):
+            self.snapshot_generation += 1
+        self._replay()
+
+    def _restore(self, records: List[Record]):
+        # Put them back in front of newer records, spilling whatever no longer fits
+        room = max(self.max_queue - len(self.queue), 0)
+        self.queue.extendleft(reversed(records[:room]))
+        self._spill(records[room:])
+
+    def _spill(self, records: List[Record]):
+        if not records:
+            return
+        if not self.spill_path:
+            self.dropped += len(records)
+            return
+        try:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            with open(self.spill_path, "a") as f:
+                for kind, row in records:
+                    f.write(json.dumps({"kind": kind, "row": row}, default=str) + "\n")
+            self.spilled += len(records)
+        except OSError as e:
+            logger.error(f"Error spilling journal records: {e}")
+            self.dropped += len(records)
+
+    def _replay(self):
+        """Moves spilled records back into the queue while there is room."""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        room = self.max_queue - len(self.queue)
+        if room <= 0:
+            return
+        with open(self.spill_path) as f:
+            lines = f.readlines()
+        for line in lines[:room]:
+            record = json.loads(line)
+            row = record["row"]
+            row["time"] = datetime.fromisoformat(row["time"])
+            self.queue.append((record["kind"], row))
+        rest = lines[room:]
+        if rest:
+            with open(self.spill_path, "w") as f:
+                f.writelines(rest)
+        else:
+            os.remove(self.spill_path)
+        logger.info(f"🗄️ Replaying {min(len(lines), room)} spilled journal records")
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": len(self.queue), "written": self.written, "spilled": self.spilled, "dropped": self.dropped}
+
+journal = JournalWriter()
@@ -39,7 +39,11 @@ class TradeLog(Base):
 class MarketCandle(Base):
     __tablename__ = "market_candles"
     
-    time = Column(DateTime, primary_key=True, index=True)
+    # 1m bars from the stream; 15m/1h/4h/1d are continuous aggregates (init_timescale.sql)
+    time = Column(DateTime, primary_key=True, index=True) # Bar open time (UTC)
     symbol = Column(String, primary_key=True) # Composite PK with time
+    open = Column(Float, nullable=True) # Nullable for rows written before OHLC was stored
+    high = Column(Float, nullable=True)
+    low = Column(Float, nullable=True)
     close = Column(Float, nullable=False)
     volume = Column(Float, nullable=True)
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import Any, Callable, List, Optional
+from app.infrastructure.database.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+class BatchWriter:
+    """
+    Background batching writer. Subclasses buffer rows in memory and implement the
+    per-table parts: `_take` (drain the buffer), `_write` (execute the batch in a session)
+    and `_restore` (put an unwritten batch back). This class owns the loop: a flush every
+    `flush_interval` seconds or as soon as `_schedule_flush` is called, one transaction per
+    flush, failed or cancelled batches restored, and a final flush on `stop`.
+    """
+    name = "Batch writer"  # Log prefix
+    items = "rows"  # What a batch holds, for error messages
+
+    def __init__(self, session_factory: Callable = AsyncSessionLocal, max_batch: int = 500, flush_interval: float = 1.0, enabled: bool = True):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.failures = 0
+
+    def _take(self) -> List[Any]:
+        raise NotImplementedError
+
+    async def _write(self, session, batch: List[Any]):
+        raise NotImplementedError
+
+    def _restore(self, batch: List[Any]):
+        raise NotImplementedError
+
+    def _written(self, batch: List[Any]):
+        """Hook run after a batch is committed."""
+
+    def _schedule_flush(self):
+        """Flushes now (buffer full) unless a flush is already running."""
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.ensure_future(self.flush())
+            except RuntimeError:
+                pass  # No running loop: the periodic flush picks it up
+
+    async def flush(self) -> int:
+        """Writes everything buffered in one transaction; returns the number of rows written."""
+        async with self._lock:
+            batch = self._take()
+            if not batch:
+                return 0
+            try:
+                async with self.session_factory() as session:
+                    await self._write(session, batch)
+                    await session.commit()
+            except asyncio.CancelledError:
+                # Cancelled mid-write (shutdown): keep the batch for the final flush
+                self._restore(batch)
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Error writing {len(batch)} {self.items}: {e}")
+                self._restore(batch)
+                return 0
+            self.written += len(batch)
+            self._written(batch)
+            return len(batch)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"🗄️ {self.name} started (batch {self.max_batch}, every {self.flush_interval}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task  # Let an in-flight flush restore its batch first
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"{self.name} error: {e}")
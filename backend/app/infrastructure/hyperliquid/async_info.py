@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+import httpx
+from hyperliquid.utils import constants
+from app.core.config import settings
+from app.infrastructure.hyperliquid.rate_limit import Priority, RateScheduler, info_weight, rate_scheduler, response_weight
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional 'h2' package; keep-alive HTTP/1.1 otherwise
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+# Concurrent requests allowed per /info request type (others use the default)
+ENDPOINT_LIMITS = {
+    "candleSnapshot": 4,
+    "spotClearinghouseState": 2,
+    "allMids": 2,
+}
+
+class AsyncInfo:
+    """
+    Native-async client for the Hyperliquid /info endpoint: one pooled keep-alive
+    connection per base URL, shared by the executor, the ingestor and the API.
+    Each request type has its own concurrency limit so a burst of candle fetches
+    cannot starve portfolio or price requests. Every request is first admitted by the
+    shared RateScheduler, which keeps the process under the exchange's weight budget.
+    """
+    def __init__(
+        self,
+        base_url: str = constants.TESTNET_API_URL,
+        timeout: float = 10.0,
+        default_limit: int = settings.HL_INFO_CONCURRENCY,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        scheduler: Optional[RateScheduler] = None,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.default_limit = default_limit
+        self.transport = transport
+        self.scheduler = scheduler or rate_scheduler
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._name_to_coin: Optional[Dict[str, str]] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Created lazily so the pool binds to the running event loop."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2 and self.transport is None,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def post(self, payload: Dict[str, Any], priority: Optional[Priority] = None) -> Any:
+        """priority defaults to the caller's request_priority() context (BOT)."""
+        kind = payload.get("type", "")
+        await self.scheduler.acquire(info_weight(payload), priority)
+        semaphore = self._semaphores.get(kind)
+        if semaphore is None:
+            semaphore = self._semaphores[kind] = asyncio.Semaphore(ENDPOINT_LIMITS.get(kind, self.default_limit))
+        async with semaphore:
+            response = await self.client.post("/info", json=payload)
+        response.raise_for_status()
+        result = response.json()
+        self.scheduler.charge(response_weight(payload, result))
+        return result
+
+    async def all_mids(self, priority: Optional[Priority] = None) -> Dict[str, str]:
+        return await self.post({"type": "allMids"}, priority)
+
+    async def spot_user_state(self, address: str, priority: Optional[Priority] = None) -> Dict[str, Any]:
+        return await self.post({"type": "spotClearinghouseState", "user": address}, priority)
+
+    async def candles_snapshot(
+        self, name: str, interval: str, start_time: int, end_time: int, priority: Optional[Priority] = None
+    ) -> list:
+        coin = await self.name_to_coin(name)
+        return await self.post({
+            "type": "candleSnapshot",
+            "req": {"coin": coin, "interval": interval, "startTime": start_time, "endTime": end_time},
+        }, priority)
+
+    async def name_to_coin(self, name: str) -> str:
+        """
+        Perp names ("BTC") and spot ids ("@107") are used as is; "BASE/QUOTE" spot pair
+        names are mapped to the exchange coin via spotMeta (fetched once).
+        """
+        if "/" not in name:
+            return name
+        if self._name_to_coin is None:
+            spot_meta = await self.post({"type": "spotMeta"})
+            tokens = spot_meta["tokens"]
+            mapping = {}
+            for spot_info in spot_meta["universe"]:
+                mapping[spot_info["name"]] = spot_info["name"]
+                base, quote = spot_info["tokens"]
+                mapping.setdefault(f'{tokens[base]["name"]}/{tokens[quote]["name"]}', spot_info["name"])
+            self._name_to_coin = mapping
+        return self._name_to_coin.get(name, name)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+_shared: Dict[str, AsyncInfo] = {}
+
+def api_url() -> str:
+    """REST base URL for the configured HYPERLIQUID_ENV."""
+    return constants.TESTNET_API_URL if settings.HYPERLIQUID_ENV == "TESTNET" else constants.MAINNET_API_URL
+
+def shared_info(base_url: Optional[str] = None) -> AsyncInfo:
+    """The process-wide AsyncInfo for `base_url` (defaults to HYPERLIQUID_ENV)."""
+    if base_url is None:
+        base_url = api_url()
+    info = _shared.get(base_url)
+    if info is None:
+        info = _shared[base_url] = AsyncInfo(base_url)
+    return info
+
+async def close_shared_info():
+    """Closes every pooled connection (application shutdown)."""
+    for info in _shared.values():
+        await info.aclose()
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.infrastructure.hyperliquid.ingestor import TIMEFRAME_MS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BARS = 1000  # Window returned when no start is given (same as the REST default)
+
+Key = Tuple[str, str, Optional[int], Optional[int]]
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check: exact (weak-comparison) match against any listed tag, or '*'."""
+    if not etag:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+class _Entry:
+    def __init__(self):
+        self.bars: List[dict] = []          # Raw Hyperliquid candles, sorted; the last may be forming
+        self.fetched_ms = 0                 # Exchange time of the last fetch
+        self.checked_at = float("-inf")     # Monotonic time of the last fetch
+        self.etag = ""
+        self.formatted: Dict[Optional[int], list] = {}  # max_points -> response body
+
+class CandleResponseCache:
+    """
+    Async cache for /market/candles keyed by (symbol, timeframe, bar-aligned start, end).
+    Closed bars are kept for the life of the entry; once per `ttl` seconds only the tail
+    from the forming bar onwards is fetched again. Concurrent misses for the same key share
+    one upstream fetch, and formatted bodies are reused until the data changes.
+    loader(symbol, timeframe, start_ms, end_ms) is the async upstream call.
+    live(symbol, timeframe, candles), if given, overlays the stream's forming bar on
+    open-ended ranges between refreshes.
+    """
+    def __init__(
+        self,
+        loader: Callable[[str, str, Optional[int], Optional[int]], Awaitable[List[dict]]],
+        formatter: Callable[[List[dict], Optional[int]], list],
+        ttl: float = settings.CANDLE_RESPONSE_TTL,
+        max_entries: int = 256,
+        live: Optional[Callable[[str, str, List[dict]], List[dict]]] = None,
+    ):
+        self.loader = loader
+        self.formatter = formatter
+        self.live = live
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Key, _Entry]" = OrderedDict()
+        self._inflight: Dict[Key, asyncio.Future] = {}
+
+    async def get(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        max_points: Optional[int] = None,
+    ) -> Tuple[list, str]:
+        """Returns (formatted candles, ETag)."""
+        tf_ms = TIMEFRAME_MS.get(timeframe, 3600 * 1000)
+        key = (
+            symbol,
+            timeframe,
+            None if start is None else start // tf_ms * tf_ms,
+            None if end is None else end // tf_ms * tf_ms,
+        )
+        entry = self._entries.get(key)
+        if entry is None or self._stale(entry, key, tf_ms):
+            entry = await self._refresh_once(key, tf_ms)
+        else:
+            self._entries.move_to_end(key)
+        if self.live is not None and key[3] is None:
+            self._update(entry, key, self.live(symbol, timeframe, entry.bars))
+
+        body = entry.formatted.get(max_points)
+        if body is None:
+            body = entry.formatted[max_points] = self.formatter(entry.bars, max_points)
+        etag = entry.etag if max_points is None else f'{entry.etag[:-1]}-{max_points}"'
+        return body, etag
+
+    def clear(self):
+        self._entries.clear()
+
+    def _stale(self, entry: _Entry, key: Key, tf_ms: int) -> bool:
+        end = key[3]
+        if end is not None and end + tf_ms <= entry.fetched_ms:
+            return False  # Every bar of the range had closed when it was fetched
+        return time.monotonic() - entry.checked_at >= self.ttl
+
+    async def _refresh_once(self, key: Key, tf_ms: int) -> _Entry:
+        """Single flight: concurrent requests for the same key await one refresh."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._refresh(key, tf_ms))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _refresh(self, key: Key, tf_ms: int) -> _Entry:
+        symbol, timeframe, start, end = key
+        entry = self._entries.get(key)
+        now_ms = int(time.time() * 1000)
+        fetch_end = None if end is None else end + tf_ms - 1
+
+        if entry is None or not entry.bars:
+            entry = _Entry()
+            bars = await self.loader(symbol, timeframe, start, fetch_end)
+        else:
+            # Keep bars that had closed at the last fetch; refetch from the first open one
+            closed = [bar for bar in entry.bars if int(bar['t']) + tf_ms <= entry.fetched_ms]
+            tail_from = int(closed[-1]['t']) + tf_ms if closed else start
+            tail = await self.loader(symbol, timeframe, tail_from, fetch_end)
+            if not tail:
+                # Upstream error or nothing new: keep serving what we have
+                entry.checked_at = time.monotonic()
+                return entry
+            first_new = int(tail[0]['t'])
+            bars = [bar for bar in closed if int(bar['t']) < first_new] + tail
+
+        if start is None and len(bars) > DEFAULT_BARS:
+            bars = bars[-DEFAULT_BARS:]  # Sliding "latest" window
+        self._update(entry, key, bars)
+        entry.fetched_ms = now_ms
+        entry.checked_at = time.monotonic()
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _update(self, entry: _Entry, key: Key, bars: List[dict]):
+        if bars is entry.bars and entry.etag:
+            return
+        if bars != entry.bars or not entry.etag:
+            entry.bars = bars
+            entry.formatted = {}
+            entry.etag = self._etag(key, bars)
+
+    @staticmethod
+    def _etag(key: Key, bars: List[dict]) -> str:
+        # Closed bars never change: the range, count and first/last bar identify the content
+        first = bars[0] if bars else {}
+        last = bars[-1] if bars else {}
+        fingerprint = repr((key, len(bars), first.get('t'), tuple(last.get(k) for k in ('t', 'o', 'h', 'l', 'c', 'v'))))
+        return f'"{hashlib.blake2b(fingerprint.encode(), digest_size=12).hexdigest()}"'
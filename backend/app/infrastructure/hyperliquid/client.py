@@ -3,10 +3,10 @@ import os
 import time
 from typing import Optional, Dict, Any, List, Callable
 from eth_account import Account
-from hyperliquid.info import Info
 from hyperliquid.exchange import Exchange
-from hyperliquid.utils import constants
 from app.core.config import settings
+from app.infrastructure.hyperliquid.async_info import api_url, shared_info
+from app.infrastructure.hyperliquid.mids import mid_prices
 
 logger = logging.getLogger(__name__)
 
@@ -19,23 +19,23 @@ class HyperliquidClient:
         else:
             self.account = Account.from_key(self.private_key)
             
-        # Use Testnet by default for now
-        self.base_url = constants.TESTNET_API_URL
-        # We only need REST for candles/orders for now. WS might block if not handled correctly.
-        self.info = Info(self.base_url, skip_ws=True)
+        # Same network as the rest of the app (HYPERLIQUID_ENV)
+        self.base_url = api_url()
+        # Reads go through the shared async Info client (pooled connection, no thread hops)
+        self.info = shared_info(self.base_url)
         
         if self.account:
             self.exchange = Exchange(self.account, self.base_url)
         else:
             self.exchange = None
 
-    def get_price(self, symbol: str) -> float:
+    async def get_price(self, symbol: str) -> float:
         """
         Fetches the current mid price for a symbol.
         """
         try:
-            all_mids = self.info.all_mids()
-            return float(all_mids.get(symbol, 0.0))
+            # Shared snapshot (stream-fed; one REST allMids for every coin when stale)
+            return await mid_prices.price(symbol)
         except Exception as e:
             logger.error(f"Error fetching price for {symbol}: {e}")
             return 0.0
@@ -103,7 +103,7 @@ class HyperliquidClient:
         except Exception as e:
             logger.error(f"Error cancelling order: {e}")
             return None
-    def get_candles(self, symbol: str, interval: str, start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[Dict[str, Any]]:
+    async def get_candles(self, symbol: str, interval: str, start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Fetches historical candles (snapshot).
         interval: 15m, 1h, 4h, 1d, etc.
@@ -136,7 +136,7 @@ class HyperliquidClient:
                 start_time = end_time - (duration_ms * 1000)  # Get 1000 periods
 
             # SDK expects positional arguments: candles_snapshot(coin, interval, startTime, endTime)
-            candles = self.info.candles_snapshot(
+            candles = await self.info.candles_snapshot(
                 coin,
                 interval, 
                 start_time, 
@@ -1,96 +1,192 @@
 import logging
+import time
+from typing import Dict, Optional, Tuple
 import pandas as pd
-from hyperliquid.info import Info
-from hyperliquid.utils import constants
 from app.core.config import settings
+from app.domain.schemas import CandleBatch
+from app.infrastructure.archive.candle_archive import CandleArchive, candle_archive
+from app.infrastructure.hyperliquid.async_info import AsyncInfo, shared_info
+from app.infrastructure.hyperliquid.mids import mid_prices
 
 logger = logging.getLogger(__name__)
 
+# Candle duration per Hyperliquid interval (ms)
+TIMEFRAME_MS = {
+    "1m": 60 * 1000,
+    "5m": 5 * 60 * 1000,
+    "15m": 15 * 60 * 1000,
+    "1h": 60 * 60 * 1000,
+    "4h": 4 * 60 * 60 * 1000,
+    "1d": 24 * 60 * 60 * 1000,
+    "1w": 7 * 24 * 60 * 60 * 1000,
+    "1M": 30 * 24 * 60 * 60 * 1000
+}
+
+def _to_ms(ts) -> int:
+    return int(pd.Timestamp(ts).value // 1_000_000)
+
+class CandleStore:
+    """
+    In-process OHLCV cache keyed by (symbol, timeframe).
+    Keeps at most `max_bars` bars per key (oldest evicted first) and remembers
+    up to when each series is known to be closed, so callers only refetch the tail.
+    Only used from the event loop: updates never await, so they need no lock.
+    """
+    def __init__(self, max_bars: int = 1000):
+        self.max_bars = max_bars
+        self._frames: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._fetched_at: Dict[Tuple[str, str], int] = {}
+
+    def get(self, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+        return self._frames.get((symbol, timeframe))
+
+    def next_fetch_start(self, symbol: str, timeframe: str) -> Optional[int]:
+        """Timestamp (ms) of the first cached bar that may not be closed yet."""
+        key = (symbol, timeframe)
+        df = self._frames.get(key)
+        if df is None or df.empty:
+            return None
+        last_ts = _to_ms(df['timestamp'].iloc[-1])
+        tf_ms = TIMEFRAME_MS.get(timeframe, 15 * 60 * 1000)
+        # The last bar was closed if it ended before we fetched it
+        if last_ts + tf_ms <= self._fetched_at.get(key, 0):
+            return last_ts + tf_ms
+        return last_ts
+
+    def merge(self, symbol: str, timeframe: str, df: pd.DataFrame, fetched_at: int, keep: Optional[int] = None, replace: bool = False) -> pd.DataFrame:
+        """Merges freshly fetched bars (newer rows win) and evicts by bar count."""
+        key = (symbol, timeframe)
+        keep = max(keep or 0, self.max_bars)
+        cached = None if replace else self._frames.get(key)
+        if cached is not None and not cached.empty and not df.empty:
+            first_new = df['timestamp'].iloc[0]
+            merged = pd.concat([cached[cached['timestamp'] < first_new], df], ignore_index=True)
+        elif df.empty and cached is not None:
+            merged = cached
+        else:
+            merged = df
+        merged = merged.tail(keep).reset_index(drop=True)
+        self._frames[key] = merged
+        self._fetched_at[key] = fetched_at
+        return merged
+
+    def append(self, symbol: str, timeframe: str, bar) -> bool:
+        """
+        Appends a closed bar built elsewhere (e.g. from the WebSocket stream).
+        Only bars that extend the cached series contiguously are accepted; anything
+        else is left for the next REST fetch to fill in.
+        """
+        key = (symbol, timeframe)
+        tf_ms = TIMEFRAME_MS.get(timeframe, 15 * 60 * 1000)
+        cached = self._frames.get(key)
+        if cached is None or cached.empty:
+            return False
+        last_ts = _to_ms(cached['timestamp'].iloc[-1])
+        if bar.timestamp not in (last_ts, last_ts + tf_ms):
+            return False
+        row = pd.DataFrame([{
+            'timestamp': pd.to_datetime(bar.timestamp, unit='ms'),
+            'open': bar.open, 'high': bar.high, 'low': bar.low,
+            'close': bar.close, 'volume': bar.volume,
+        }])
+        kept = cached[cached['timestamp'] < row['timestamp'].iloc[0]]
+        self._frames[key] = pd.concat([kept, row], ignore_index=True).tail(self.max_bars).reset_index(drop=True)
+        self._fetched_at[key] = max(self._fetched_at.get(key, 0), bar.timestamp + tf_ms)
+        return True
+
+    def clear(self):
+        self._frames.clear()
+        self._fetched_at.clear()
+
+# Shared by every DataIngestor in the process
+candle_store = CandleStore(max_bars=settings.CANDLE_CACHE_MAX_BARS)
+
 class DataIngestor:
-    def __init__(self):
-        self._info = None
-        self.symbol = settings.SYMBOL
+    def __init__(self, store: Optional[CandleStore] = None, archive: Optional[CandleArchive] = None, symbol: Optional[str] = None, info: Optional[AsyncInfo] = None):
+        self._info = info
+        self.symbol = symbol or settings.SYMBOL
+        self.store = store or candle_store
+        self.archive = archive if archive is not None else candle_archive
     
     @property
-    def info(self):
-        """Lazy initialization of Info API"""
+    def info(self) -> AsyncInfo:
+        """Shared async Info API (one pooled connection per process)"""
         if self._info is None:
-            try:
-                self._info = Info(constants.TESTNET_API_URL, skip_ws=True)
-                logger.info("DataIngestor: Connected to Hyperliquid API")
-            except Exception as e:
-                logger.error(f"DataIngestor: Failed to connect to Hyperliquid API: {e}")
-                raise
+            self._info = shared_info()
         return self._info
         
-    def get_candles(self, timeframe: str = "15m", limit: int = 100) -> pd.DataFrame:
+    async def get_candles(self, timeframe: str = "15m", limit: int = 100, closed_only: bool = False) -> pd.DataFrame:
         """
         Fetches OHLCV candles from Hyperliquid Snapshot API.
         Returns a DataFrame with columns: [timestamp, open, high, low, close, volume]
+        Bars already in the candle store are reused; only the tail since the
+        last closed cached bar is requested from the exchange.
+        With closed_only=True no request is made while the only missing bar is the
+        one still forming (the store is kept current by the stream in event mode).
         """
+        cached = self.store.get(self.symbol, timeframe)
+        tf_ms = TIMEFRAME_MS.get(timeframe, 15 * 60 * 1000)
+        if cached is None and self.archive:
+            # Warm up from the local archive so only bars since the last run are fetched
+            cached = self._load_archive(timeframe, limit, tf_ms)
         try:
-            # Hyperliquid API might use different timeframe formats or just raw snapshots
-            # For MVP, we use the 'candleSnapshot' endpoint if available via SDK or raw request
-            # The SDK 'user_state' or 'meta' doesn't directly give candles.
-            # We might need to use the 'candles' endpoint if exposed, or raw HTTP.
-            # Checking SDK capabilities... SDK usually has 'candles' method in Info.
-            
-            # Note: SDK 0.4.x might have 'candles' method. 
-            # If not, we will implement a raw request.
-            # Let's assume it exists or we mock it for now with a raw call if needed.
-            
-            # Using raw request logic via the internal session if method missing, 
-            # but 'info.candles_snapshot' is likely what we want.
-            
-            # Calculate timestamps (ms)
-            import time
             end_time = int(time.time() * 1000)
-            # Map timeframe string to milliseconds
-            tf_map = {
-                "1m": 60 * 1000,
-                "5m": 5 * 60 * 1000,
-                "15m": 15 * 60 * 1000,
-                "1h": 60 * 60 * 1000,
-                "4h": 4 * 60 * 60 * 1000,
-                "1d": 24 * 60 * 60 * 1000,
-                "1w": 7 * 24 * 60 * 60 * 1000,
-                "1M": 30 * 24 * 60 * 60 * 1000
-            }
-            duration_ms = tf_map.get(timeframe, 15 * 60 * 1000) * limit
-            start_time = end_time - duration_ms
-            
-            # Correct method signature: candles_snapshot(coin, interval, startTime, endTime)
-            candles_raw = self.info.candles_snapshot(self.symbol, timeframe, start_time, end_time)
+            window_start = end_time - tf_ms * limit
             
-            # Expected format: list of dicts or list of lists
-            df = pd.DataFrame(candles_raw)
+            start_time = None
+            if cached is not None and len(cached) >= limit:
+                start_time = self.store.next_fetch_start(self.symbol, timeframe)
+                if closed_only and start_time is not None and start_time + tf_ms > end_time:
+                    return cached.tail(limit).reset_index(drop=True)
+            # Cold cache, or cached history too old to join with the requested window
+            replace = start_time is None or start_time < window_start - tf_ms
+            if replace:
+                start_time = window_start
             
-            # Ensure correct types
-            df['t'] = pd.to_datetime(df['t'], unit='ms')
-            cols = ['o', 'h', 'l', 'c', 'v']
-            for col in cols:
-                df[col] = df[col].astype(float)
-                
-            # Rename for clarity
-            df = df.rename(columns={
-                't': 'timestamp', 
-                'o': 'open', 
-                'h': 'high', 
-                'l': 'low', 
-                'c': 'close', 
-                'v': 'volume'
-            })
+            # Correct method signature: candles_snapshot(coin, interval, startTime, endTime)
+            candles_raw = await self.info.candles_snapshot(self.symbol, timeframe, start_time, end_time)
             
-            return df.sort_values('timestamp').tail(limit)
+            df = self._to_frame(candles_raw)
+            merged = self.store.merge(self.symbol, timeframe, df, fetched_at=end_time, keep=limit, replace=replace)
+            self._archive_closed(timeframe, df, end_time - tf_ms)
+            return merged.tail(limit).reset_index(drop=True)
             
         except Exception as e:
             logger.error(f"Error fetching candles: {e}")
+            if cached is not None:
+                return cached.tail(limit).reset_index(drop=True)
             return pd.DataFrame()
 
-    def get_current_price(self) -> float:
+    def _load_archive(self, timeframe: str, limit: int, tf_ms: int) -> Optional[pd.DataFrame]:
+        try:
+            df = self.archive.read_frame(self.symbol, timeframe, limit=max(limit, self.store.max_bars))
+        except Exception as e:
+            logger.error(f"Error reading candle archive: {e}")
+            return None
+        if df.empty:
+            return None
+        # Archived bars are closed by construction
+        fetched_at = _to_ms(df['timestamp'].iloc[-1]) + tf_ms
+        return self.store.merge(self.symbol, timeframe, df, fetched_at=fetched_at, keep=limit, replace=True)
+
+    def _archive_closed(self, timeframe: str, df: pd.DataFrame, closed_before: int):
+        """Appends the fetched bars that had closed by fetch time to the archive."""
+        if not self.archive or df.empty:
+            return
+        try:
+            closed = df[df['timestamp'] <= pd.to_datetime(closed_before, unit='ms')]
+            self.archive.append_frame(self.symbol, timeframe, closed)
+        except Exception as e:
+            logger.error(f"Error writing candle archive: {e}")
+
+    @staticmethod
+    def _to_frame(candles_raw) -> pd.DataFrame:
+        # Columns are built straight from the raw list (no intermediate dict frame)
+        return CandleBatch.from_raw(candles_raw).to_frame()
+
+    async def get_current_price(self) -> float:
         try:
-            all_mids = self.info.all_mids()
-            return float(all_mids.get(self.symbol, 0.0))
+            return await mid_prices.price(self.symbol)
         except Exception as e:
             logger.error(f"Error fetching price: {e}")
             return 0.0
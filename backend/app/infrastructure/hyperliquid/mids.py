@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, Optional
+from app.core.config import settings
+from app.infrastructure.hyperliquid.async_info import AsyncInfo, shared_info
+from app.infrastructure.hyperliquid.rate_limit import Priority, current_priority
+
+logger = logging.getLogger(__name__)
+
+class MidPriceService:
+    """
+    One shared dict with the mid price of every coin. Fed by the stream's allMids
+    subscription; when the stream is down (or not started) the whole snapshot is
+    refreshed with a single REST allMids call. get() is a plain dict lookup, so
+    risk, valuation and close-all never wait on the network.
+    """
+    def __init__(self, info: Optional[AsyncInfo] = None, max_age: float = settings.MID_PRICE_MAX_AGE):
+        self._info = info
+        self.max_age = max_age
+        self.prices: Dict[str, float] = {}
+        self.updated_at = float("-inf")  # Monotonic time of the last snapshot (stream or REST)
+        self._refresh: Optional[asyncio.Future] = None
+        self._refresh_priority = Priority.BOT
+
+    @property
+    def info(self) -> AsyncInfo:
+        if self._info is None:
+            self._info = shared_info()
+        return self._info
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() - self.updated_at < self.max_age
+
+    def get(self, symbol: str, default: Optional[float] = None) -> Optional[float]:
+        """Last known mid (never fetches)."""
+        return self.prices.get(symbol, default)
+
+    def update(self, mids: Dict[str, str]):
+        """Merges an allMids snapshot ({coin: "price"}) into the shared dict."""
+        prices = self.prices
+        for coin, px in mids.items():
+            try:
+                prices[coin] = float(px)
+            except (TypeError, ValueError):
+                continue
+        self.updated_at = time.monotonic()
+
+    def on_stream(self, data: dict):
+        """Stream callback for the allMids channel ({"mids": {...}})."""
+        mids = data.get("mids")
+        if mids:
+            self.update(mids)
+
+    async def refresh(self, force: bool = False) -> Dict[str, float]:
+        """
+        REST fallback: one allMids call for every coin, shared by concurrent callers.
+        The shared call is never queued below BOT priority; a more urgent caller than
+        the one in flight starts its own call (which later callers then join).
+        """
+        if not force and self.fresh:
+            return self.prices
+        priority = min(current_priority(), Priority.BOT)
+        if self._refresh is None or self._refresh.done() or priority < self._refresh_priority:
+            self._refresh = asyncio.ensure_future(self._fetch(priority))
+            self._refresh_priority = priority
+        await asyncio.shield(self._refresh)
+        return self.prices
+
+    async def price(self, symbol: str) -> float:
+        """Mid for `symbol`, refreshing over REST only if the snapshot is stale."""
+        await self.refresh()
+        return self.prices.get(symbol, 0.0)
+
+    def value(self, symbol: str, size: float, fallback: float = 0.0) -> float:
+        """Position value at the current mid (fallback price when the coin has none)."""
+        px = self.prices.get(symbol)
+        return size * (px if px else fallback)
+
+    def snapshot(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        if symbols is None:
+            return dict(self.prices)
+        return {symbol: self.prices[symbol] for symbol in symbols if symbol in self.prices}
+
+    async def _fetch(self, priority: Priority):
+        try:
+            self.update(await self.info.all_mids(priority=priority))
+        except Exception as e:
+            logger.error(f"Error fetching mid prices: {e}")
+
+# Shared by the bot, the executor and the API
+mid_prices = MidPriceService()
@@ -0,0 +1,170 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class Priority(IntEnum):
+    CRITICAL = 0    # Portfolio / execution data
+    BOT = 1         # Strategy market data
+    DASHBOARD = 2   # API requests from the frontend
+
+# Priority of /info requests made from the current task (and tasks it spawns)
+_priority: ContextVar[Priority] = ContextVar("hl_request_priority", default=Priority.BOT)
+
+@contextmanager
+def request_priority(priority: Priority):
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+# Hyperliquid REST weights (budget is per IP and minute)
+INFO_WEIGHTS = {
+    "allMids": 2,
+    "l2Book": 2,
+    "clearinghouseState": 2,
+    "spotClearinghouseState": 2,
+    "orderStatus": 2,
+    "exchangeStatus": 2,
+    "userRole": 60,
+}
+DEFAULT_INFO_WEIGHT = 20
+ITEMS_PER_EXTRA_WEIGHT = {"candleSnapshot": 60}  # +1 weight per N items returned
+
+def info_weight(payload: Dict[str, Any]) -> int:
+    return INFO_WEIGHTS.get(payload.get("type"), DEFAULT_INFO_WEIGHT)
+
+def response_weight(payload: Dict[str, Any], result: Any) -> int:
+    """Extra weight charged after the fact for large responses."""
+    per = ITEMS_PER_EXTRA_WEIGHT.get(payload.get("type"))
+    if per and isinstance(result, list):
+        return len(result) // per
+    return 0
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "weight", "future", "enqueued_at")
+
+    def __init__(self, priority: Priority, seq: int, weight: float, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.weight = weight
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class RateScheduler:
+    """
+    Token bucket for the Hyperliquid request-weight budget, shared by every REST caller.
+    Requests that don't fit wait in a priority queue (FIFO within a priority), so
+    portfolio/execution calls go ahead of strategy data, and both ahead of dashboards.
+    """
+    def __init__(self, capacity: float = settings.HL_RATE_LIMIT_WEIGHT, per_seconds: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Per priority: [requests, requests that waited, total wait s, max wait s]
+        self._stats = {p: [0, 0, 0.0, 0.0] for p in Priority}
+
+    async def acquire(self, weight: float, priority: Optional[Priority] = None):
+        """Waits until `weight` tokens are available for this caller's priority."""
+        priority = _priority.get() if priority is None else priority
+        weight = min(weight, self.capacity)
+        self._refill()
+        if not self._waiters and self.tokens >= weight:
+            self.tokens -= weight
+            self._record(priority, 0.0)
+            return
+
+        waiter = _Waiter(priority, next(self._seq), weight, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Leave the entry in the heap; _dispatch skips done futures
+            self._dispatch()
+            raise
+
+    def charge(self, weight: float):
+        """Deducts weight known only after the response (may push the bucket below zero)."""
+        if weight:
+            self._refill()
+            self.tokens -= weight
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        depth = {p.name.lower(): 0 for p in Priority}
+        for waiter in self._waiters:
+            if not waiter.future.done():
+                depth[waiter.priority.name.lower()] += 1
+        waits = {}
+        for p, (requests, waited, total, peak) in self._stats.items():
+            waits[p.name.lower()] = {
+                "requests": requests,
+                "waited": waited,
+                "avg_wait_ms": round(total / requests * 1000, 1) if requests else 0.0,
+                "max_wait_ms": round(peak * 1000, 1),
+            }
+        return {
+            "tokens": round(self.tokens, 1),
+            "capacity": self.capacity,
+            "refill_per_s": round(self.rate, 2),
+            "queue_depth": depth,
+            "waits": waits,
+        }
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _record(self, priority: Priority, waited: float):
+        stats = self._stats[priority]
+        stats[0] += 1
+        if waited > 0:
+            stats[1] += 1
+            stats[2] += waited
+            stats[3] = max(stats[3], waited)
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._refill()
+        now = time.monotonic()
+        while self._waiters:
+            head = self._waiters[0]
+            if head.future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.tokens < head.weight:
+                break
+            heapq.heappop(self._waiters)
+            self.tokens -= head.weight
+            self._record(head.priority, now - head.enqueued_at)
+            head.future.set_result(None)
+
+        if self._waiters:
+            delay = (self._waiters[0].weight - self.tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(max(delay, 0.001), self._dispatch)
+
+# One budget per process (Hyperliquid limits per IP)
+rate_scheduler = RateScheduler()
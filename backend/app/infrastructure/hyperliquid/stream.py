@@ -1,24 +1,15 @@
 import asyncio
 import json
 import logging
+import orjson  # Decodificador rápido (~3x más rápido que json en estos mensajes)
 import websockets
-from typing import Optional
-
-# Importamos el molde del Arquitecto
-try:
-    from app.domain.schemas import Candle
-except ImportError:
-    # Fallback para pruebas aisladas si no se encuentra el módulo
-    from pydantic import BaseModel, ConfigDict
-    class Candle(BaseModel):
-        timestamp: int
-        open: float
-        high: float
-        low: float
-        close: float
-        volume: float
-        symbol: str
-        model_config = ConfigDict(frozen=True)
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.domain.schemas import CandleTick
+from app.infrastructure.hyperliquid.async_info import AsyncInfo, shared_info
+from app.infrastructure.hyperliquid.ingestor import TIMEFRAME_MS
+from app.infrastructure.hyperliquid.rate_limit import Priority
+
+CandleKey = Tuple[str, str]  # (coin, intervalo)
 
 # Configuración
 WS_URL = "wss://api.hyperliquid-testnet.xyz/ws"
@@ -34,15 +25,112 @@ PUBLIC_ADDRESS = os.getenv("PUBLIC_ADDRESS")
 # Logging Config
 logger = logging.getLogger("HyperliquidConnector")
 
+# Canal de los mensajes de cada tipo de suscripción (cuando no coincide con el tipo)
+SUBSCRIPTION_CHANNELS = {"userEvents": "user"}
+
+def subscription_key(subscription: Dict[str, Any]) -> str:
+    """Clave estable de una suscripción (mismo contenido -> misma clave)."""
+    return json.dumps(subscription, sort_keys=True)
+
+def subscription_channel(subscription: Dict[str, Any]) -> str:
+    return SUBSCRIPTION_CHANNELS.get(subscription["type"], subscription["type"])
+
 class HyperliquidStream:
-    def __init__(self, on_candle=None, on_user_event=None):
+    """
+    Una sola conexión WebSocket para todo el proceso. Mantiene el conjunto de
+    suscripciones activas (candle, l2Book, trades, allMids, orderUpdates, userEvents...),
+    las repite tras cada reconexión y reparte cada mensaje a los handlers de su canal.
+    Las velas se entregan en orden y sin huecos: si falta alguna (reconexión o mensajes
+    perdidos) se recupera por REST y se emite antes de las velas en vivo retenidas.
+    """
+    def __init__(self, on_candle=None, on_user_event=None, coin: str = TARGET_COIN, interval: str = TIMEFRAME, coins: Optional[List[str]] = None, on_mids=None, info: Optional[AsyncInfo] = None):
         self.ws_url = WS_URL
+        self.coins = list(coins) if coins else [coin]
+        self.coin = self.coins[0]
+        self.interval = interval
         self.reconnect_delay = 1
         self.max_reconnect_delay = 60
         self.running = False
         self.user_address = PUBLIC_ADDRESS
-        self.on_candle = on_candle
-        self.on_user_event = on_user_event
+        self.ws = None  # Conexión activa (None mientras se reconecta)
+        # Suscripciones activas en orden de alta (clave -> suscripción), repetidas al reconectar
+        self.subscriptions: Dict[str, Dict[str, Any]] = {}
+        # Handlers registrados por canal (síncronos o asíncronos)
+        self.listeners: Dict[str, List[Callable[[Any], Any]]] = {}
+        # Decodificadores por canal (los demás canales reciben el 'data' tal cual)
+        self.handlers: Dict[str, Callable[[Any], Awaitable[None]]] = {
+            "candle": self._handle_candle,
+            "user": self._handle_user,
+        }
+        self.messages = 0  # Mensajes procesados (para métricas/benchmarks)
+
+        # Detección de huecos por (coin, intervalo): última vela emitida, velas en vivo
+        # retenidas mientras se rellena un hueco y canales pendientes de resincronizar
+        self.info = info or shared_info()
+        self._last_ts: Dict[CandleKey, int] = {}
+        self._pending: Dict[CandleKey, List[Any]] = {}
+        self._backfills: Dict[CandleKey, asyncio.Task] = {}
+        self._resync: Set[CandleKey] = set()
+        self.backfilled = 0  # Velas recuperadas por REST
+
+        # Suscripciones iniciales: velas por moneda, precios medios y eventos de usuario
+        for c in self.coins:
+            self._track({"type": "candle", "coin": c, "interval": interval})
+        if on_candle:
+            self.on("candle", on_candle)
+        if on_mids:
+            self._track({"type": "allMids"})
+            self.on("allMids", on_mids)
+        if self.user_address:
+            self._track({"type": "userEvents", "user": self.user_address})
+        if on_user_event:
+            self.on("user", on_user_event)
+
+    def on(self, channel: str, callback: Callable[[Any], Any]):
+        """Registra un handler para los mensajes de `channel`."""
+        callbacks = self.listeners.setdefault(channel, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    def off(self, channel: str, callback: Callable[[Any], Any]):
+        callbacks = self.listeners.get(channel, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def _track(self, subscription: Dict[str, Any]) -> bool:
+        key = subscription_key(subscription)
+        if key in self.subscriptions:
+            return False
+        self.subscriptions[key] = subscription
+        return True
+
+    async def subscribe(self, subscription: Dict[str, Any], callback: Optional[Callable[[Any], Any]] = None) -> bool:
+        """
+        Añade una suscripción (p.ej. {"type": "l2Book", "coin": "ETH"}) y opcionalmente
+        un handler para su canal. Si no hay conexión se envía al conectar.
+        Devuelve False si ya estaba activa.
+        """
+        if callback:
+            self.on(subscription_channel(subscription), callback)
+        if not self._track(subscription):
+            return False
+        await self._send("subscribe", subscription)
+        return True
+
+    async def unsubscribe(self, subscription: Dict[str, Any]) -> bool:
+        """Quita una suscripción activa (los handlers del canal se mantienen)."""
+        if self.subscriptions.pop(subscription_key(subscription), None) is None:
+            return False
+        await self._send("unsubscribe", subscription)
+        return True
+
+    async def _send(self, method: str, subscription: Dict[str, Any]):
+        if self.ws is None:
+            return
+        try:
+            await self.ws.send(json.dumps({"method": method, "subscription": subscription}))
+        except websockets.ConnectionClosed:
+            pass  # Se repite al reconectar
 
     async def connect(self):
         self.running = True
@@ -53,31 +141,15 @@ class HyperliquidStream:
                     self.reconnect_delay = 1  # Reset backoff on success
                     logger.info("Conexión WebSocket establecida.")
                     
-                    # 1. Suscripción al canal de velas
-                    subscribe_candle = {
-                        "method": "subscribe",
-                        "subscription": {
-                            "type": "candle",
-                            "coin": TARGET_COIN,
-                            "interval": TIMEFRAME
-                        }
-                    }
-                    await ws.send(json.dumps(subscribe_candle))
-                    logger.info(f"Suscrito a {TARGET_COIN} [{TIMEFRAME}]")
-
-                    # 2. Suscripción al canal de usuario (si hay dirección)
-                    if self.user_address:
-                        subscribe_user = {
-                            "method": "subscribe",
-                            "subscription": {
-                                "type": "userEvents",
-                                "user": self.user_address
-                            }
-                        }
-                        await ws.send(json.dumps(subscribe_user))
-                        logger.info(f"Suscrito a UserEvents para {self.user_address[:8]}...")
-                    else:
+                    # Alta (o reposición tras reconectar) de todas las suscripciones activas
+                    self.ws = ws
+                    for subscription in list(self.subscriptions.values()):
+                        await ws.send(json.dumps({"method": "subscribe", "subscription": subscription}))
+                    logger.info(f"Suscrito a {len(self.subscriptions)} canales ({', '.join(self.coins)} [{self.interval}])")
+                    if not self.user_address:
                         logger.warning("PUBLIC_ADDRESS no configurada. No se recibirán eventos de usuario.")
+                    # Tras reconectar, la primera vela de cada canal rellena lo perdido
+                    self._resync.update(self._last_ts)
 
                     async for message in ws:
                         if not self.running:
@@ -85,67 +157,133 @@ class HyperliquidStream:
                         await self.process_message(message)
 
             except (websockets.ConnectionClosed, asyncio.TimeoutError, OSError) as e:
+                self.ws = None  # Lo que se suscriba mientras tanto se envía al reconectar
                 logger.warning(f"Conexión perdida ({type(e).__name__}). Reintentando en {self.reconnect_delay}s...")
                 if self.running:
                     await asyncio.sleep(self.reconnect_delay)
                     self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
             
             except Exception as e:
+                self.ws = None
                 logger.exception(f"Error crítico no manejado: {e}")
                 if self.running:
                     await asyncio.sleep(5)
+        self.ws = None
+
+    def candle_subscriptions(self) -> List[dict]:
+        return [
+            {"method": "subscribe", "subscription": subscription}
+            for subscription in self.subscriptions.values()
+            if subscription["type"] == "candle"
+        ]
 
     def stop(self):
         self.running = False
+        for task in self._backfills.values():
+            task.cancel()
+        self._backfills.clear()
+        self._pending.clear()
 
-    async def process_message(self, raw_msg: str):
+    async def process_message(self, raw_msg):
         try:
-            data = json.loads(raw_msg)
-            
-            # Ignorar mensajes de confirmación de suscripción
-            if data.get("channel") == "subscriptionResponse":
-                return
-
+            data = orjson.loads(raw_msg)
+            self.messages += 1
             channel = data.get("channel")
+            # Canales sin handlers se ignoran (p.ej. subscriptionResponse, pong)
+            if not self.listeners.get(channel):
+                return
+            payload = data.get("data")
+            if not payload:
+                return
+            handler = self.handlers.get(channel)
+            if handler is not None:
+                await handler(payload)
+            else:
+                await self._emit(channel, payload)
 
-            if channel == "candle":
-                candle_raw = data.get("data")
-                if candle_raw:
-                    # NORMALIZACIÓN DE DATOS
-                    candle = Candle(
-                        timestamp=candle_raw['t'],
-                        open=float(candle_raw['o']),
-                        high=float(candle_raw['h']),
-                        low=float(candle_raw['l']),
-                        close=float(candle_raw['c']),
-                        volume=float(candle_raw['v']),
-                        symbol=candle_raw['s']
-                    )
-                    
-                    logger.info(f"CEMENTO VERTIDO >> {candle}")
-                    if self.on_candle:
-                        if asyncio.iscoroutinefunction(self.on_candle):
-                            await self.on_candle(candle)
-                        else:
-                            self.on_candle(candle)
-            
-            elif channel == "user":
-                user_data = data.get("data")
-                # Aquí procesaríamos fills, funding updates, etc.
-                # Por ahora solo logueamos para validar la conexión autenticada
-                logger.info(f"USER EVENT >> {user_data}")
-                if self.on_user_event:
-                    if asyncio.iscoroutinefunction(self.on_user_event):
-                        await self.on_user_event(user_data)
-                    else:
-                        self.on_user_event(user_data)
-
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             logger.error("Error decodificando JSON de Hyperliquid")
         except KeyError as e:
-            logger.error(f"Estructura de datos inesperada, falta campo: {e}")
+            logger.error("Estructura de datos inesperada, falta campo: %s", e)
         except ValueError as e:
-            logger.error(f"Error de tipo de datos: {e}")
+            logger.error("Error de tipo de datos: %s", e)
+
+    async def _emit(self, channel: str, payload):
+        # Un handler que falla no corta la conexión ni al resto de handlers
+        for callback in list(self.listeners.get(channel, ())):
+            try:
+                await _call(callback, payload)
+            except Exception:
+                logger.exception("Error en handler del canal %s", channel)
+
+    async def _handle_candle(self, candle_raw):
+        # NORMALIZACIÓN DE DATOS (struct con slots, sin validación pydantic por tick)
+        candle = CandleTick.from_raw(candle_raw)
+        # Logging perezoso: solo se formatea si DEBUG está activo
+        logger.debug("CEMENTO VERTIDO >> %s", candle)
+        await self._accept((candle.symbol, candle_raw.get("i", self.interval)), candle)
+
+    async def _accept(self, key: CandleKey, candle):
+        """Emite la vela si no hay hueco; si lo hay, la retiene y lanza el backfill."""
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.append(candle)
+            return
+        last = self._last_ts.get(key)
+        if last is not None:
+            if candle.timestamp < last:
+                return  # Ya emitida (solapa con el backfill)
+            step = TIMEFRAME_MS.get(key[1], TIMEFRAME_MS["1m"])
+            if candle.timestamp > last + step or (key in self._resync and candle.timestamp > last):
+                self._resync.discard(key)
+                self._pending[key] = [candle]
+                self._backfills[key] = asyncio.create_task(self._backfill(key, last, candle.timestamp))
+                return
+        self._resync.discard(key)
+        self._last_ts[key] = candle.timestamp
+        await self._emit("candle", candle)
+
+    async def _backfill(self, key: CandleKey, start: int, end: int):
+        """
+        Recupera por REST las velas [start, end) (incluida la versión final de `start`),
+        las emite en orden y después libera las velas en vivo retenidas.
+        Cada canal rellena en su propia tarea, así que varios huecos se piden en paralelo.
+        """
+        coin, interval = key
+        bars = []
+        try:
+            raw = await self.info.candles_snapshot(coin, interval, start, end - 1, priority=Priority.BOT)
+            bars = sorted(
+                (CandleTick.from_raw({**c, "s": coin}) for c in raw or [] if start <= int(c["t"]) < end),
+                key=lambda bar: bar.timestamp,
+            )
+            logger.info("Hueco en %s %s: %d velas recuperadas por REST", coin, interval, len(bars))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Error rellenando hueco de %s %s: %s", coin, interval, e)
+        self.backfilled += len(bars)
+        for bar in bars:
+            self._last_ts[key] = bar.timestamp
+            await self._emit("candle", bar)
+        # Lo que REST no devolvió (o si falló) se da por perdido: no se vuelve a pedir
+        step = TIMEFRAME_MS.get(interval, TIMEFRAME_MS["1m"])
+        self._last_ts[key] = max(self._last_ts[key], end - step)
+        self._backfills.pop(key, None)
+        for candle in self._pending.pop(key, []):
+            await self._accept(key, candle)
+
+    async def _handle_user(self, user_data):
+        # Fills, funding updates, etc. (cada handler decide qué procesar)
+        logger.info("USER EVENT >> %s", user_data)
+        await self._emit("user", user_data)
+
+async def _call(callback, payload):
+    """Invoca un callback síncrono o asíncrono."""
+    if asyncio.iscoroutinefunction(callback):
+        await callback(payload)
+    else:
+        callback(payload)
 
 if __name__ == "__main__":
     # Configuración básica de logging para ejecución directa
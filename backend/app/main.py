@@ -4,12 +4,23 @@ from app.core.config import settings
 from datetime import datetime
 
 from contextlib import asynccontextmanager
-# from app.infrastructure.database.database import init_db
+from app.infrastructure.database.database import init_db
+from app.infrastructure.database.candles import candle_writer
+from app.infrastructure.database.journal import journal
+from app.infrastructure.hyperliquid.async_info import close_shared_info
+from app.core.websocket import manager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # await init_db()
+    if settings.CANDLE_DB_ENABLED or settings.JOURNAL_ENABLED:
+        await init_db()
+    candle_writer.start()
+    journal.start()
     yield
+    await manager.close()
+    await candle_writer.stop()
+    await journal.stop()
+    await close_shared_info()
 
 app = FastAPI(
     title="Hyperliquid Trader Bot",
@@ -0,0 +1,89 @@
+"""
+Decode-throughput benchmark for HyperliquidStream.process_message.
+
+Replays a mix of candle / allMids / subscriptionResponse frames through the stream
+(no network) and compares it with the previous decoding path (json.loads, validated
+pydantic Candle, f-string INFO log per candle).
+
+Usage: python bench_stream_decode.py [messages]
+"""
+import asyncio
+import json
+import logging
+import sys
+import time
+from app.domain.schemas import Candle
+from app.infrastructure.hyperliquid.stream import HyperliquidStream
+
+COINS = [f"COIN{i}" for i in range(50)]
+
+def make_frames(n: int) -> list:
+    frames = []
+    candles = 0
+    for i in range(n):
+        if i % 25 == 0:
+            data = {"channel": "allMids", "data": {"mids": {c: str(100 + j) for j, c in enumerate(COINS)}}}
+        elif i % 100 == 1:
+            data = {"channel": "subscriptionResponse", "data": {"method": "subscribe"}}
+        else:
+            coin = COINS[candles % len(COINS)]
+            px = 100 + (i % 97) * 0.5
+            data = {"channel": "candle", "data": {
+                "t": 1_700_000_000_000 + (candles // len(COINS)) * 60_000, "T": 1_700_000_059_999,
+                "s": coin, "i": "1m", "o": str(px), "c": str(px + 0.25), "h": str(px + 1), "l": str(px - 1),
+                "v": "12.5", "n": 42,
+            }}
+            candles += 1
+        frames.append(json.dumps(data))
+    return frames
+
+async def legacy_process(raw_msg: str, on_candle, logger: logging.Logger):
+    """The decoding path before the fast path (kept here for comparison only)."""
+    data = json.loads(raw_msg)
+    if data.get("channel") == "subscriptionResponse":
+        return
+    channel = data.get("channel")
+    if channel == "candle":
+        candle_raw = data.get("data")
+        if candle_raw:
+            candle = Candle(
+                timestamp=candle_raw['t'], open=float(candle_raw['o']), high=float(candle_raw['h']),
+                low=float(candle_raw['l']), close=float(candle_raw['c']), volume=float(candle_raw['v']),
+                symbol=candle_raw['s'],
+            )
+            logger.info(f"CEMENTO VERTIDO >> {candle}")
+            on_candle(candle)
+    elif channel == "allMids":
+        data.get("data")
+
+async def run(frames: list) -> None:
+    received = []
+    on_candle = received.append
+    on_mids = lambda mids: None
+
+    # Logger at WARNING, as in production: INFO calls are dropped but f-strings are still built
+    logger = logging.getLogger("bench.legacy")
+    logger.setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    for frame in frames:
+        await legacy_process(frame, on_candle, logger)
+    legacy = time.perf_counter() - start
+
+    received.clear()
+    stream = HyperliquidStream(on_candle=on_candle, on_mids=on_mids)
+    start = time.perf_counter()
+    for frame in frames:
+        await stream.process_message(frame)
+    fast = time.perf_counter() - start
+
+    n = len(frames)
+    print(f"Frames: {n} ({len(received)} candles, {len(COINS)} coins)")
+    print(f"  legacy : {n / legacy:>12,.0f} msg/s  ({legacy / n * 1e6:.2f} us/msg)")
+    print(f"  fast   : {n / fast:>12,.0f} msg/s  ({fast / n * 1e6:.2f} us/msg)")
+    print(f"  speedup: {legacy / fast:.2f}x")
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    logging.getLogger("HyperliquidConnector").setLevel(logging.WARNING)
+    asyncio.run(run(make_frames(count)))
@@ -1,9 +1,9 @@
+import asyncio
 import os
-import time
 from dotenv import load_dotenv
 from app.infrastructure.hyperliquid.client import HyperliquidClient
 
-def test_integration():
+async def run_integration():
     load_dotenv()
     
     print("Initializing HyperliquidClient...")
@@ -17,7 +17,7 @@ def test_integration():
     # 1. Fetch Price
     symbol = "BTC"
     print(f"\nFetching price for {symbol}...")
-    price = client.get_price(symbol)
+    price = await client.get_price(symbol)
     print(f"Current {symbol} price: {price}")
     
     if price == 0:
@@ -46,7 +46,7 @@ def test_integration():
                     
                     # 3. Cancel Order
                     print(f"\nCancelling order {oid}...")
-                    time.sleep(2) # Wait a bit
+                    await asyncio.sleep(2) # Wait a bit
                     cancel_result = client.cancel_order(symbol, oid)
                     print(f"Cancel result: {cancel_result}")
                 else:
@@ -56,5 +56,9 @@ def test_integration():
         else:
             print("Failed to place order.")
 
+def test_integration():
+    # get_price is async; the order calls are still synchronous SDK calls
+    asyncio.run(run_integration())
+
 if __name__ == "__main__":
     test_integration()
@@ -1,5 +1,7 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 import sys
 import os
 
@@ -23,7 +25,8 @@ def risk_manager():
 
 @pytest.fixture
 def mock_info():
-    with patch("app.domain.execution.Info") as mock:
+    with patch("app.domain.execution.shared_info") as mock:
+        mock.return_value.spot_user_state = AsyncMock()
         yield mock
 
 @pytest.fixture
@@ -34,3 +37,46 @@ def order_executor(mock_settings, mock_info):
         executor = OrderExecutor()
         executor.info = mock_info.return_value
         return executor
+
+class FakeSession:
+    """Async session stand-in: records each execute() and groups them per commit."""
+    def __init__(self, db):
+        self.db = db
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        if self.db.delay:
+            await asyncio.sleep(self.db.delay)
+        if self.db.fail:
+            raise ConnectionError("database down")
+        self.db.executed.append((statement, params))
+        self.statements.append((statement, params))
+        return SimpleNamespace(all=lambda: list(self.db.rows), scalar=lambda: len(self.db.rows))
+
+    async def commit(self):
+        self.db.transactions.append(self.statements)
+
+class FakeDB:
+    """
+    Session factory for the database writers/services. `rows` is the result of every
+    query; `fail` makes execute() raise and `delay` makes it slow.
+    """
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.fail = False
+        self.delay = 0.0
+        self.executed = []
+        self.transactions = []
+
+    def __call__(self):
+        return FakeSession(self)
+
+@pytest.fixture
+def fake_db():
+    return FakeDB()
@@ -0,0 +1,110 @@
+import pytest
+import pandas as pd
+from unittest.mock import patch
+from app.domain.aggregation import CandleAggregator, LiveBarBuffer, merge_live_bar
+from app.domain.schemas import Candle
+
+MINUTE = 60_000
+DAY_START = 1_700_006_400_000  # 00:00 UTC
+
+def minute(index, close=100.0, volume=1.0):
+    open_ = 100.0 + index
+    return Candle(timestamp=DAY_START + index * MINUTE, open=open_, high=max(open_, close) + 1, low=min(open_, close) - 1, close=close, volume=volume, symbol="BTC")
+
+def feed(aggregator, minutes):
+    closed = []
+    for i in minutes:
+        # Two updates per minute, as the stream sends for the forming candle
+        closed += aggregator.add(minute(i, close=100.0 + i))
+        closed += aggregator.add(minute(i, close=100.0 + i + 0.5))
+    return closed
+
+def test_1m_closes_on_next_minute():
+    aggregator = CandleAggregator(timeframes=("15m",))
+    assert aggregator.add(minute(0)) == []
+    assert aggregator.add(minute(0, close=101.0)) == []
+    
+    closed = aggregator.add(minute(1))
+    assert [(tf, bar.close, complete) for tf, bar, complete in closed] == [("1m", 101.0, True)]
+
+def test_15m_bar_built_from_final_minute_updates():
+    aggregator = CandleAggregator(timeframes=("15m",))
+    closed = feed(aggregator, range(16))
+    bars = [(bar, complete) for tf, bar, complete in closed if tf == "15m"]
+    
+    assert len(bars) == 1
+    bar, complete = bars[0]
+    assert complete
+    assert bar.timestamp == DAY_START
+    assert bar.open == 100.0
+    assert bar.close == 114.5  # Last update of minute 14
+    assert bar.high == 115.5
+    assert bar.low == 99.0
+    assert bar.volume == 15.0
+
+def test_partial_first_bar_is_flagged():
+    aggregator = CandleAggregator(timeframes=("15m",))
+    closed = feed(aggregator, range(7, 31))
+    bars = [(bar.timestamp, complete) for tf, bar, complete in closed if tf == "15m"]
+    assert bars == [(DAY_START, False), (DAY_START + 15 * MINUTE, True)]
+
+def test_missing_minutes_mark_bar_incomplete():
+    aggregator = CandleAggregator(timeframes=("15m",))
+    closed = feed(aggregator, [*range(0, 5), *range(8, 31)])
+    bars = [(bar.timestamp, complete) for tf, bar, complete in closed if tf == "15m"]
+    assert bars == [(DAY_START, False), (DAY_START + 15 * MINUTE, True)]
+
+def test_out_of_order_update_ignored():
+    aggregator = CandleAggregator(timeframes=("15m",))
+    aggregator.add(minute(5))
+    assert aggregator.add(minute(4)) == []
+
+def test_forming_bar_includes_the_forming_minute():
+    aggregator = CandleAggregator(timeframes=("15m",))
+    feed(aggregator, range(3))
+    aggregator.add(minute(3, close=90.0))
+    
+    bar, complete = aggregator.forming("15m")
+    assert complete
+    assert bar.timestamp == DAY_START
+    assert bar.open == 100.0
+    assert bar.close == 90.0
+    assert bar.low == 89.0
+    assert bar.volume == 4.0
+    # The base timeframe is the forming 1m candle itself
+    assert aggregator.forming("1m")[0].timestamp == DAY_START + 3 * MINUTE
+
+def test_forming_bar_is_partial_when_joining_mid_bucket():
+    aggregator = CandleAggregator(timeframes=("15m",))
+    feed(aggregator, range(5, 8))
+    bar, complete = aggregator.forming("15m")
+    assert not complete
+    assert bar.timestamp == DAY_START
+
+def test_live_buffer_overlays_history():
+    buffer = LiveBarBuffer(timeframes=("15m",))
+    for i in range(3):
+        buffer.add(minute(i, close=100.0 + i))
+    now = DAY_START + 3 * MINUTE
+    assert buffer.forming("BTC", "15m", now_ms=DAY_START + 20 * MINUTE) is None  # Stale
+    assert buffer.forming("ETH", "15m", now_ms=now) is None
+    
+    with patch("app.domain.aggregation.time.time", return_value=now / 1000):
+        # REST forming row of the same bucket is replaced by the complete live bar
+        raw = [{'t': DAY_START - 15 * MINUTE, 'o': '1', 'h': '1', 'l': '1', 'c': '1', 'v': '1'},
+               {'t': DAY_START, 'o': '100', 'h': '101', 'l': '99', 'c': '100', 'v': '1'}]
+        merged = buffer.overlay_raw("BTC", "15m", raw)
+        assert merged[0] is raw[0]
+        assert merged[-1]['c'] == 102.0 and merged[-1]['v'] == 3.0
+        
+        # A new bucket missing from history is appended
+        df = pd.DataFrame({'timestamp': pd.to_datetime([DAY_START - 15 * MINUTE], unit='ms'), 'open': [1.0], 'high': [1.0], 'low': [1.0], 'close': [1.0], 'volume': [1.0]})
+        out = buffer.overlay_frame("BTC", "15m", df)
+        assert len(out) == 2 and len(df) == 1
+        assert out['close'].iloc[-1] == 102.0
+
+def test_partial_live_bar_keeps_history_open():
+    row = (100.0, 105.0, 95.0, 101.0, 10.0)
+    live = minute(7, close=110.0)
+    assert merge_live_bar(row, live, complete=False) == (100.0, max(105.0, live.high), 95.0, 110.0, 10.0)
+    assert merge_live_bar(row, live, complete=True) == (live.open, live.high, live.low, 110.0, live.volume)
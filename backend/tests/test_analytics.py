@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from app.domain.analytics import EquityHistory
+from app.infrastructure.database.analytics import AnalyticsService
+from app.infrastructure.database.journal import journal
+from conftest import FakeDB
+
+def history(equity, btc_price=None, **cols) -> EquityHistory:
+    n = len(equity)
+    start = datetime(2026, 1, 1)
+    return EquityHistory.from_columns({
+        "bucket": [start + timedelta(days=i) for i in range(n)],
+        "equity": equity,
+        "btc_price": btc_price if btc_price is not None else [0.0] * n,
+        **cols,
+    })
+
+def test_drawdown_returns_and_ratios():
+    h = history([100.0, 120.0, 90.0, 108.0, 132.0])
+    
+    assert h.roi == pytest.approx(0.32)
+    assert h.max_drawdown == pytest.approx(-0.25)
+    assert h.win_rate == pytest.approx(0.75)
+    assert h.profit_factor == pytest.approx((20 + 18 + 24) / 30)
+    returns = np.array([0.2, -0.25, 0.2, 2 / 9])
+    assert h.sharpe == pytest.approx(returns.mean() / returns.std() * np.sqrt(365))
+
+def test_benchmarks_fill_missing_prices():
+    h = history([1000.0, 1000.0, 1000.0, 1000.0], btc_price=[0.0, 100.0, 0.0, 200.0])
+    
+    assert h.benchmark().tolist() == [1000.0, 1000.0, 1000.0, 2000.0]
+    # 250 USD per day at 100, 100, 100, 200 -> 8.75 BTC * 200
+    assert h.dca_benchmark()[-1] == pytest.approx(1750.0)
+    assert [b["roi"] for b in h.benchmarks()] == [0.0, 100.0, 75.0]
+
+def test_chart_series_formats():
+    h = history([100.0, 110.0], stable=[50.0, 0.0], short_term=[25.0, 30.0], long_term=[25.0, 0.0], btc_amount=[0.01, 0.012])
+    
+    assert h.equity_curve()[1] == {"date": "2026-01-02", "equity": 110.0, "benchmark": 110.0, "dca_benchmark": 110.0}
+    assert h.composition() == [
+        {"date": "2026-01-01", "stable": 50.0, "short_term": 25.0, "long_term": 25.0},
+        {"date": "2026-01-02", "stable": 0.0, "short_term": 100.0, "long_term": 0.0},
+    ]
+    assert h.short_term_pnl()[1]["pnl"] == 5.0
+    assert h.long_term_growth()[1]["btc"] == 0.012
+
+@pytest.mark.asyncio
+async def test_history_is_cached_until_a_new_snapshot_is_written(fake_db, monkeypatch):
+    db = fake_db
+    db.rows = [SimpleNamespace(bucket=datetime(2026, 1, 1), equity=100.0, stable=100.0, short_term=0.0, long_term=0.0, btc_amount=0.0, btc_price=0.0)]
+    service = AnalyticsService(session_factory=db, ttl=60)
+    
+    await service.history("6m")
+    await service.history("6m")
+    assert len(db.executed) == 1
+    query, params = db.executed[0]
+    assert "FROM portfolio_daily" in str(query) and "time_bucket(INTERVAL '1 day'" in str(query)
+    assert "since" in params
+    
+    monkeypatch.setattr(journal, "snapshot_generation", journal.snapshot_generation + 1)
+    await service.history("6m")
+    assert len(db.executed) == 2
+    
+    await service.history("all")
+    query, params = db.executed[-1]
+    assert "INTERVAL '1 week'" in str(query) and params == {}
+
+def daily_rows(transactions):
+    """What portfolio_daily returns for journal-written snapshots (one per day here)."""
+    return [
+        SimpleNamespace(
+            bucket=row["time"], equity=row["total_equity_usd"], stable=row["stablecoin_balance"],
+            short_term=row["short_term_equity_usd"], long_term=row["long_term_equity_usd"],
+            btc_amount=row["long_term_btc_amount"], btc_price=row["btc_price"],
+        )
+        for transaction in transactions for statement, rows in transaction
+        if statement.table.name == "portfolio_snapshots" for row in rows
+    ]
+
+@pytest.mark.asyncio
+async def test_journal_snapshots_round_trip_through_analytics(fake_db, monkeypatch):
+    from app.domain.schemas import Position, PortfolioState
+    from app.infrastructure.database.journal import JournalWriter
+    writer = JournalWriter(session_factory=fake_db, flush_interval=60, snapshot_interval=0, spill_path="", enabled=True)
+    for day, (usdc, eth_value, btc_value) in enumerate([(800.0, 100.0, 100.0), (700.0, 250.0, 100.0)]):
+        monkeypatch.setattr(writer, "_next_time", lambda day=day: datetime(2026, 1, 1 + day))
+        state = PortfolioState(total_equity=0.0, available_balance=usdc, positions=[
+            Position(symbol="ETH", side="LONG", size=1.0, entry_price=eth_value),
+            Position(symbol="BTC", side="LONG", size=0.002, entry_price=btc_value / 0.002),
+        ])
+        writer.snapshot(state, btc_price=50000.0, crypto_value=eth_value + btc_value, btc_amount=0.002, short_term_value=eth_value, force=True)
+    await writer.flush()
+    
+    daily = FakeDB(rows=daily_rows(fake_db.transactions))
+    h = await AnalyticsService(session_factory=daily, ttl=60).history("1m")
+    
+    assert h.composition() == [
+        {"date": "2026-01-01", "stable": 80.0, "short_term": 10.0, "long_term": 10.0},
+        {"date": "2026-01-02", "stable": 66.7, "short_term": 23.8, "long_term": 9.5},
+    ]
+    assert [p["pnl"] for p in h.short_term_pnl()] == [0.0, 150.0]
+    assert h.equity.tolist() == [1000.0, 1050.0]
+
+@pytest.mark.asyncio
+async def test_session_endpoint_matches_schema(monkeypatch):
+    from app.api import api_v2
+    from app.domain.schemas import SessionMetric
+    crash = history([100.0, 120.0, 60.0])  # -50% drawdown
+    monkeypatch.setattr(api_v2, "_history", AsyncMock(return_value=crash))
+    monkeypatch.setattr(api_v2.analytics, "trade_count", AsyncMock(return_value=3))
+    
+    health = await api_v2.get_session_health()
+    
+    metrics = [SessionMetric(**metric) for metric in health]
+    assert {m.label: m.status for m in metrics}["Max Drawdown"] == "danger"
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import httpx
+import pytest
+from hyperliquid.utils import constants
+from app.core.config import settings
+from app.infrastructure.hyperliquid.async_info import AsyncInfo
+from app.infrastructure.hyperliquid.client import HyperliquidClient
+from app.infrastructure.hyperliquid.rate_limit import RateScheduler
+
+class Upstream:
+    """httpx handler that records payloads and the peak number of concurrent requests per type."""
+    def __init__(self):
+        self.payloads = []
+        self.active = {}
+        self.peak = {}
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        kind = payload["type"]
+        self.payloads.append(payload)
+        self.active[kind] = self.active.get(kind, 0) + 1
+        self.peak[kind] = max(self.peak.get(kind, 0), self.active[kind])
+        await asyncio.sleep(0.02)
+        self.active[kind] -= 1
+        if kind == "spotMeta":
+            return httpx.Response(200, json={
+                "tokens": [{"name": "USDC"}, {"name": "PURR"}],
+                "universe": [{"name": "PURR/USDC", "tokens": [1, 0], "index": 0}, {"name": "@1", "tokens": [1, 0], "index": 1}],
+            })
+        return httpx.Response(200, json={"type": kind})
+
+@pytest.fixture
+def upstream():
+    return Upstream()
+
+@pytest.mark.asyncio
+async def test_requests_are_posted_to_info(upstream):
+    info = AsyncInfo("https://api.test", transport=httpx.MockTransport(upstream))
+    await info.spot_user_state("0xabc")
+    await info.candles_snapshot("BTC", "15m", 1, 2)
+    await info.aclose()
+    
+    assert upstream.payloads == [
+        {"type": "spotClearinghouseState", "user": "0xabc"},
+        {"type": "candleSnapshot", "req": {"coin": "BTC", "interval": "15m", "startTime": 1, "endTime": 2}},
+    ]
+
+@pytest.mark.asyncio
+async def test_per_endpoint_concurrency_limits(upstream):
+    info = AsyncInfo("https://api.test", transport=httpx.MockTransport(upstream), default_limit=3, scheduler=RateScheduler(10_000))
+    await asyncio.gather(
+        *(info.candles_snapshot("BTC", "15m", 1, 2) for _ in range(10)),
+        *(info.all_mids() for _ in range(10)),
+        *(info.post({"type": "meta"}) for _ in range(10)),
+    )
+    await info.aclose()
+    
+    assert upstream.peak == {"candleSnapshot": 4, "allMids": 2, "meta": 3}
+
+@pytest.mark.asyncio
+async def test_spot_pair_names_are_mapped_once(upstream):
+    info = AsyncInfo("https://api.test", transport=httpx.MockTransport(upstream))
+    assert await info.name_to_coin("PURR/USDC") == "PURR/USDC"
+    assert await info.name_to_coin("@1") == "@1"
+    assert await info.name_to_coin("ETH") == "ETH"
+    await info.name_to_coin("PURR/USDC")
+    await info.aclose()
+    
+    assert [p["type"] for p in upstream.payloads] == ["spotMeta"]
+
+@pytest.mark.asyncio
+async def test_http_errors_raise(upstream):
+    info = AsyncInfo("https://api.test", transport=httpx.MockTransport(lambda request: httpx.Response(429)))
+    with pytest.raises(httpx.HTTPStatusError):
+        await info.all_mids()
+    await info.aclose()
+
+def test_client_follows_hyperliquid_env(monkeypatch):
+    monkeypatch.setattr(settings, "HYPERLIQUID_ENV", "MAINNET")
+    client = HyperliquidClient(private_key="")
+    assert client.base_url == client.info.base_url == constants.MAINNET_API_URL
@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.core.bot import BotManager
+from app.domain.schemas import TradeAction, MarketRegime, PortfolioState, TradingSignal, OrderResult
+from app.infrastructure.hyperliquid.stream import HyperliquidStream
+
+SYMBOLS = ["BTC", "ETH", "SOL", "HYPE", "PURR"]
+
+class FakeEngine:
+    """Records how many engines are analyzing at the same time."""
+    active = 0
+    peak = 0
+    execution_timeframe = "1h"
+
+    def __init__(self, symbol=None):
+        self.symbol = symbol
+        self.stream_timeframes = set()
+        self.ingestor = MagicMock()
+
+    async def analyze(self, market_data, portfolio):
+        FakeEngine.active += 1
+        FakeEngine.peak = max(FakeEngine.peak, FakeEngine.active)
+        await asyncio.sleep(0.05)
+        FakeEngine.active -= 1
+        if self.symbol == "SOL":
+            raise RuntimeError("boom")
+        action = TradeAction.BUY if self.symbol == "ETH" else TradeAction.HOLD
+        return TradingSignal(symbol=self.symbol, action=action, price=10.0, confidence=0.8, regime=MarketRegime.BULL)
+
+@pytest.fixture
+def bot():
+    FakeEngine.active = FakeEngine.peak = 0
+    BotManager._instance = None
+    with patch("app.core.bot.settings") as mock_settings, \
+         patch("app.core.bot.StrategyEngine", FakeEngine), \
+         patch("app.core.bot.OrderExecutor") as mock_executor, \
+         patch("app.core.bot.HyperliquidStream"):
+        mock_settings.symbols = SYMBOLS
+        mock_settings.MAX_CONCURRENT_SYMBOLS = 2
+        mock_settings.STRATEGY_MODE = "poll"
+        executor = mock_executor.return_value
+        executor.get_portfolio_state = AsyncMock(return_value=PortfolioState(total_equity=1000, available_balance=1000, positions=[]))
+        executor.execute_order = AsyncMock(return_value=OrderResult(order_id="1", status="FILLED"))
+        bot = BotManager()
+        yield bot
+    BotManager._instance = None
+
+def test_one_engine_per_symbol(bot):
+    assert list(bot.engines) == SYMBOLS
+    assert bot.strategy is bot.engines["BTC"]
+    assert len({id(engine) for engine in bot.engines.values()}) == len(SYMBOLS)
+
+@pytest.mark.asyncio
+async def test_cycle_is_bounded_and_concurrent(bot):
+    await bot._run_cycle()
+    
+    assert FakeEngine.peak == 2
+    # A failing symbol does not stop the others
+    assert set(bot.signals) == {"BTC", "ETH", "HYPE", "PURR"}
+    order = bot.executor.execute_order.call_args[0][0]
+    assert order.symbol == "ETH"
+    assert order.action == TradeAction.BUY
+
+@pytest.mark.asyncio
+async def test_cycle_for_single_symbol(bot):
+    await bot._run_cycle(["BTC"])
+    assert list(bot.signals) == ["BTC"]
+
+def test_stream_subscribes_every_symbol():
+    stream = HyperliquidStream(coins=["BTC", "ETH"], interval="1m")
+    subs = stream.candle_subscriptions()
+    assert [s["subscription"]["coin"] for s in subs] == ["BTC", "ETH"]
+    assert all(s["subscription"]["interval"] == "1m" for s in subs)
+    assert HyperliquidStream(coin="ETH").coins == ["ETH"]
+
+@pytest.mark.asyncio
+async def test_event_cycle_fires_on_the_engine_execution_timeframe(bot):
+    from app.domain.schemas import CandleTick
+    bot.event_driven = bot.running = True
+    bot._schedule_cycle = MagicMock()
+    bot.live_bars = MagicMock(timeframes={"15m", "1h"})
+    tick = CandleTick(0, 1.0, 1.0, 1.0, 1.0, 1.0, "ETH")
+    
+    bot.live_bars.add.return_value = [("15m", tick, True)]
+    await bot._on_candle(tick)
+    bot._schedule_cycle.assert_not_called()
+    
+    bot.live_bars.add.return_value = [("15m", tick, True), ("1h", tick, True)]
+    await bot._on_candle(tick)
+    bot._schedule_cycle.assert_called_once_with("ETH 1h close", ["ETH"])
+
+def test_event_mode_streams_the_execution_timeframe():
+    from app.domain.strategies.dual_core import StrategyEngine
+    engine = StrategyEngine(symbol="BTC")
+    engine.use_stream()
+    assert engine.stream_timeframes == {engine.execution_timeframe, "4h"}
+    assert engine.execution_timeframe in engine.streams
@@ -0,0 +1,84 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import AsyncMock
+from app.infrastructure.archive.candle_archive import CandleArchive, contiguous_rows
+
+TF_MS = 15 * 60 * 1000
+
+def bars(start_index, count):
+    ts = (start_index + np.arange(count)) * TF_MS
+    close = 100.0 + np.arange(count, dtype=float)
+    return {"timestamp": ts, "open": close, "high": close + 1, "low": close - 1, "close": close, "volume": np.ones(count)}
+
+@pytest.fixture
+def archive(tmp_path):
+    return CandleArchive(str(tmp_path))
+
+def test_append_and_read_roundtrip(archive):
+    assert archive.append("BTC", "15m", bars(0, 50)) == 50
+    assert archive.append("BTC", "15m", bars(50, 50)) == 50
+    
+    cols = archive.read("BTC", "15m")
+    assert isinstance(cols["close"], np.memmap)
+    assert len(cols["timestamp"]) == 100
+    assert (np.diff(cols["timestamp"]) == TF_MS).all()
+    assert archive.last_timestamp("BTC", "15m") == 99 * TF_MS
+
+def test_append_skips_already_archived_rows(archive):
+    archive.append("BTC", "15m", bars(0, 50))
+    assert archive.append("BTC", "15m", bars(40, 20)) == 10
+    assert archive.count("BTC", "15m") == 60
+
+def test_read_range_and_limit(archive):
+    archive.append("BTC", "15m", bars(0, 100))
+    cols = archive.read("BTC", "15m", start=10 * TF_MS, end=19 * TF_MS)
+    assert cols["timestamp"].tolist() == [i * TF_MS for i in range(10, 20)]
+    
+    cols = archive.read("BTC", "15m", limit=5)
+    assert cols["timestamp"][0] == 95 * TF_MS
+
+def test_read_missing_series_is_empty(archive):
+    cols = archive.read("ETH", "1d")
+    assert all(len(arr) == 0 for arr in cols.values())
+    assert archive.read_frame("ETH", "1d").empty
+
+def test_uncommitted_tail_is_ignored_and_overwritten(archive, tmp_path):
+    archive.append("BTC", "15m", bars(0, 10))
+    # Simulate a crash after writing column bytes but before the index update
+    with open(os.path.join(str(tmp_path), "BTC", "15m", "close.f8"), "ab") as f:
+        f.write(np.arange(3, dtype="<f8").tobytes())
+    assert len(archive.read("BTC", "15m")["close"]) == 10
+    
+    archive.append("BTC", "15m", bars(10, 5))
+    cols = archive.read("BTC", "15m")
+    assert cols["close"].tolist() == (100.0 + np.concatenate([np.arange(10), np.arange(5)])).tolist()
+
+def test_append_frame_with_datetime_timestamps(archive):
+    df = pd.DataFrame(bars(0, 20))
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    assert archive.append_frame("BTC", "15m", df) == 20
+    frame = archive.read_frame("BTC", "15m")
+    pd.testing.assert_series_equal(frame["timestamp"], df["timestamp"])
+
+def test_contiguous_rows_stops_at_first_gap():
+    ts = np.array([0, 1, 2, 5, 6]) * TF_MS
+    assert contiguous_rows(ts, TF_MS) == 3
+    assert contiguous_rows(ts[:3], TF_MS) == 3
+    assert contiguous_rows([], TF_MS) == 0
+
+@pytest.mark.asyncio
+async def test_load_candles_refetches_after_archive_gap(archive, monkeypatch):
+    from app.api import api_v2
+    archive.append("BTC", "15m", bars(0, 10))
+    archive.append("BTC", "15m", bars(20, 10))  # Downtime: bars 10-19 missing
+    get_candles = AsyncMock(return_value=[{"t": 10 * TF_MS}])
+    monkeypatch.setattr(api_v2, "candle_archive", archive)
+    monkeypatch.setattr(api_v2.settings, "CANDLE_DB_ENABLED", False)
+    monkeypatch.setattr(api_v2.hyperliquid_client, "get_candles", get_candles)
+
+    candles = await api_v2._load_candles("BTC", "15m", 0, 29 * TF_MS)
+
+    assert [c["t"] for c in candles] == [i * TF_MS for i in range(11)]
+    get_candles.assert_awaited_once_with("BTC", "15m", 10 * TF_MS, 29 * TF_MS)
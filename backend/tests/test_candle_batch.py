@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.domain.schemas import CandleBatch, CandleTick
+from app.domain.strategies.indicators import StreamingIndicators
+from app.infrastructure.hyperliquid.stream import HyperliquidStream
+
+RAW = [
+    {"t": 120_000, "T": 179_999, "s": "BTC", "i": "1m", "o": "101.5", "h": "103", "l": "100", "c": "102", "v": "3.5", "n": 9},
+    {"t": 60_000, "T": 119_999, "s": "BTC", "i": "1m", "o": "100", "h": "102", "l": "99", "c": "101.5", "v": "1.25", "n": 4},
+]
+
+def test_from_raw_parses_and_sorts_columns():
+    batch = CandleBatch.from_raw(RAW)
+    
+    assert batch.symbol == "BTC"
+    assert batch.timestamp.dtype == np.int64 and batch.close.dtype == np.float64
+    assert batch.timestamp.tolist() == [60_000, 120_000]
+    assert batch.close.tolist() == [101.5, 102.0]
+    assert len(CandleBatch.from_raw([])) == 0
+
+def test_single_bars_are_candle_ticks():
+    batch = CandleBatch.from_raw(RAW)
+    bar = batch[-1]
+    
+    assert isinstance(bar, CandleTick)
+    assert (bar.timestamp, bar.high, bar.volume) == (120_000, 103.0, 3.5)
+    assert bar.model_dump() == {
+        "timestamp": 120_000, "open": 101.5, "high": 103.0, "low": 100.0,
+        "close": 102.0, "volume": 3.5, "symbol": "BTC", "state": "chop",
+    }
+    assert type(bar.timestamp) is int and type(bar.close) is float
+    assert [b.model_dump() for b in batch] == [batch[0].model_dump(), bar.model_dump()]
+    assert len(batch[1:]) == 1
+    with pytest.raises(IndexError):
+        batch[2]
+
+def test_frame_round_trip():
+    batch = CandleBatch.from_raw(RAW)
+    df = batch.to_frame()
+    
+    assert df['timestamp'].iloc[0] == pd.Timestamp(60_000, unit='ms')
+    back = CandleBatch.from_frame(df, "BTC")
+    assert back.timestamp.tolist() == batch.timestamp.tolist()
+    assert back.to_raw()[0] == {"t": 60_000, "o": 100.0, "h": 102.0, "l": 99.0, "c": 101.5, "v": 1.25}
+
+@pytest.mark.asyncio
+async def test_stream_emits_candles():
+    received = []
+    stream = HyperliquidStream(on_candle=received.append)
+    await stream.process_message('{"channel": "candle", "data": {"t": 60000, "s": "ETH", "o": "1", "h": "2", "l": "0.5", "c": "1.5", "v": "10"}}')
+    
+    (candle,) = received
+    assert candle.symbol == "ETH" and candle.close == 1.5
+
+def test_indicator_sync_accepts_batches():
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 1, 300))
+    batch = CandleBatch("BTC", np.arange(300) * 900_000, close, close + 1, close - 1, close, np.ones(300))
+    
+    from_batch = StreamingIndicators().sync(batch)
+    from_frame = StreamingIndicators().sync(batch.to_frame())
+    assert from_batch == pytest.approx(from_frame)
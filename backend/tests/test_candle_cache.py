@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.domain.charting import format_candles
+from app.infrastructure.hyperliquid.candle_cache import CandleResponseCache, etag_matches
+
+TF = "1h"
+TF_MS = 3_600_000
+NOW = 1_700_000_000_000 // TF_MS * TF_MS + 600_000  # Ten minutes into a forming bar
+
+class FakeUpstream:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.close = 100.0
+
+    async def __call__(self, symbol, timeframe, start, end):
+        self.calls.append((start, end))
+        await asyncio.sleep(self.delay)
+        first = start if start is not None else NOW // TF_MS * TF_MS - 99 * TF_MS
+        last = NOW // TF_MS * TF_MS if end is None else min(end // TF_MS * TF_MS, NOW // TF_MS * TF_MS)
+        return [
+            {'t': t, 'o': '100', 'h': '101', 'l': '99', 'c': str(self.close if t == NOW // TF_MS * TF_MS else 100.0), 'v': '1'}
+            for t in range(first, last + 1, TF_MS)
+        ]
+
+@pytest.fixture
+def clock():
+    with patch("app.infrastructure.hyperliquid.candle_cache.time.time", return_value=NOW / 1000):
+        yield
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_fetch(clock):
+    upstream = FakeUpstream(delay=0.05)
+    cache = CandleResponseCache(upstream, format_candles, ttl=60)
+    
+    results = await asyncio.gather(*(cache.get("BTC", TF) for _ in range(20)))
+    
+    assert len(upstream.calls) == 1
+    assert len({etag for _, etag in results}) == 1
+    assert all(body is results[0][0] for body, _ in results)
+    assert len(results[0][0]) == 100
+
+@pytest.mark.asyncio
+async def test_only_forming_bar_is_refetched(clock):
+    upstream = FakeUpstream()
+    cache = CandleResponseCache(upstream, format_candles, ttl=0)
+    
+    body, etag = await cache.get("BTC", TF)
+    again, same_etag = await cache.get("BTC", TF)
+    assert same_etag == etag
+    assert again is body  # Unchanged data: formatted body reused
+    
+    forming = NOW // TF_MS * TF_MS
+    assert upstream.calls[-1] == (forming, None)
+    
+    upstream.close = 105.0
+    body, new_etag = await cache.get("BTC", TF)
+    assert new_etag != etag
+    assert body[-1]['close'] == 105.0
+    assert len(body) == 100
+
+@pytest.mark.asyncio
+async def test_ttl_serves_cached_bars(clock):
+    upstream = FakeUpstream()
+    cache = CandleResponseCache(upstream, format_candles, ttl=60)
+    await cache.get("BTC", TF)
+    await cache.get("BTC", TF)
+    assert len(upstream.calls) == 1
+
+@pytest.mark.asyncio
+async def test_closed_range_is_cached_permanently(clock):
+    upstream = FakeUpstream()
+    cache = CandleResponseCache(upstream, format_candles, ttl=0)
+    start, end = NOW - 48 * TF_MS, NOW - 24 * TF_MS
+    
+    body, etag = await cache.get("BTC", TF, start + 5, end + 7)  # Unaligned: same key
+    await cache.get("BTC", TF, start, end)
+    
+    assert len(upstream.calls) == 1
+    assert len(body) == 25
+
+@pytest.mark.asyncio
+async def test_downsampled_response_has_its_own_etag(clock):
+    cache = CandleResponseCache(FakeUpstream(), format_candles, ttl=60)
+    full, etag = await cache.get("BTC", TF)
+    small, small_etag = await cache.get("BTC", TF, max_points=10)
+    assert len(small) == 10
+    assert small_etag != etag
+
+@pytest.mark.asyncio
+async def test_upstream_error_keeps_cached_bars(clock):
+    upstream = FakeUpstream()
+    cache = CandleResponseCache(upstream, format_candles, ttl=0)
+    body, etag = await cache.get("BTC", TF)
+    
+    cache.loader = AsyncMock(return_value=[])
+    again, same_etag = await cache.get("BTC", TF)
+    assert again is body and same_etag == etag
+
+@pytest.mark.asyncio
+async def test_live_overlay_between_refreshes(clock):
+    upstream = FakeUpstream()
+    ticks = {"close": 100.0}
+    def live(symbol, timeframe, candles):
+        return candles[:-1] + [{**candles[-1], 'c': ticks["close"]}]
+    cache = CandleResponseCache(upstream, format_candles, ttl=60, live=live)
+    
+    _, etag = await cache.get("BTC", TF)
+    ticks["close"] = 107.0
+    body, new_etag = await cache.get("BTC", TF)
+    
+    assert len(upstream.calls) == 1
+    assert body[-1]['close'] == 107.0
+    assert new_etag != etag
+    # Closed historical ranges are not overlaid
+    past, _ = await cache.get("BTC", TF, NOW - 48 * TF_MS, NOW - 24 * TF_MS)
+    assert past[-1]['close'] == 100.0
+
+def test_if_none_match_compares_whole_tags():
+    etag = '"abc123"'
+    assert etag_matches('"abc123"', etag)
+    assert etag_matches('"zzz", W/"abc123"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"abc123-10"', etag)  # Downsampled variant of the same data
+    assert not etag_matches('"abc1234", "xabc123"', etag)
+    assert not etag_matches('abc123', etag)
+    assert not etag_matches('"abc123"', "")
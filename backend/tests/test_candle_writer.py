@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from sqlalchemy.dialects import postgresql
+from app.domain.schemas import Candle
+from datetime import datetime
+from types import SimpleNamespace
+from app.infrastructure.database.candles import CandleWriter, read_candles, upsert_statement, to_row
+
+def params(db, index: int) -> dict:
+    statement, _ = db.executed[index]
+    return statement.compile(dialect=postgresql.dialect()).params
+
+def candle(minute: int, close: float = 100.0, symbol: str = "BTC") -> Candle:
+    return Candle(timestamp=minute * 60_000, open=99.0, high=101.0, low=98.0, close=close, volume=1.0, symbol=symbol)
+
+def test_upsert_statement_updates_ohlcv_on_conflict():
+    sql = str(upsert_statement([to_row(candle(0))]).compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (time, symbol) DO UPDATE" in sql
+    for column in ("open", "high", "low", "close", "volume"):
+        assert f"{column} = excluded.{column}" in sql
+
+@pytest.mark.asyncio
+async def test_forming_bar_updates_collapse_to_latest(fake_db):
+    db = fake_db
+    writer = CandleWriter(session_factory=db, max_batch=100, flush_interval=60, enabled=True)
+    for close in (100.0, 101.0, 102.0):
+        writer.add(candle(0, close))
+    writer.add(candle(0, 50.0, symbol="ETH"))
+    
+    assert writer.pending == 2
+    assert await writer.flush() == 2
+    assert len(db.transactions) == 1
+    assert params(db, 0)["close_m0"] == 102.0
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting_for_timer(fake_db):
+    db = fake_db
+    writer = CandleWriter(session_factory=db, max_batch=3, flush_interval=60, enabled=True)
+    for minute in range(3):
+        writer.add(candle(minute))
+    await asyncio.sleep(0)
+    
+    assert writer.pending == 0
+    assert writer.written == 3
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows_but_prefers_newer_versions(fake_db):
+    db = fake_db
+    writer = CandleWriter(session_factory=db, max_batch=100, flush_interval=60, enabled=True)
+    writer.add(candle(0, 100.0))
+    db.fail = True
+    assert await writer.flush() == 0
+    assert writer.pending == 1
+    
+    writer.add(candle(0, 105.0))
+    db.fail = False
+    assert await writer.flush() == 1
+    assert params(db, -1)["close_m0"] == 105.0
+
+def test_disabled_writer_ignores_candles(fake_db):
+    writer = CandleWriter(session_factory=fake_db, enabled=False)
+    writer.add(candle(0))
+    assert writer.pending == 0
+
+@pytest.mark.asyncio
+async def test_stop_during_flush_keeps_the_batch(fake_db):
+    db = fake_db
+    db.delay = 0.05
+    writer = CandleWriter(session_factory=db, max_batch=100, flush_interval=0, enabled=True)
+    writer.start()
+    writer.add(candle(0))
+    await asyncio.sleep(0.01)  # Periodic flush is now writing the bar
+    
+    db.delay = 0.0
+    await writer.stop()
+    assert writer.written == 1
+    assert params(db, -1)["close_m0"] == 100.0
+
+@pytest.mark.asyncio
+async def test_read_candles_skips_partial_aggregate_buckets(fake_db):
+    db = fake_db
+    db.rows = [SimpleNamespace(time=datetime(2026, 1, 1), open=1.0, high=2.0, low=0.5, close=1.5, volume=None)]
+    
+    bars = await read_candles("BTC", "1h", 0, 3_600_000, session_factory=db)
+    assert bars == [{"t": 1767225600000, "o": 1.0, "h": 2.0, "l": 0.5, "c": 1.5, "v": 0.0}]
+    query, query_params = db.executed[0]
+    assert "FROM market_candles_1h" in str(query) and "bars >= :bars" in str(query)
+    assert query_params["bars"] == 60
+    
+    await read_candles("BTC", "1m", 0, 60_000, session_factory=db)
+    assert "bars" not in str(db.executed[1][0])
+
+@pytest.mark.asyncio
+async def test_load_candles_uses_stored_bars_up_to_first_gap(monkeypatch):
+    from app.api import api_v2
+    stored = [{"t": minute * 60_000} for minute in (0, 1, 2, 5, 6)]  # Stream was down for minutes 3-4
+    get_candles = AsyncMock(return_value=[{"t": 180_000}])
+    monkeypatch.setattr(api_v2, "candle_archive", None)
+    monkeypatch.setattr(api_v2.settings, "CANDLE_DB_ENABLED", True)
+    monkeypatch.setattr(api_v2, "read_candles", AsyncMock(return_value=stored))
+    monkeypatch.setattr(api_v2.hyperliquid_client, "get_candles", get_candles)
+
+    candles = await api_v2._load_candles("BTC", "1m", 0, 360_000)
+
+    assert [c["t"] for c in candles] == [0, 60_000, 120_000, 180_000]
+    get_candles.assert_awaited_once_with("BTC", "1m", 180_000, 360_000)
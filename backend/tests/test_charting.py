@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from app.domain.charting import format_candles, downsample_ohlc, candle_columns
+from app.domain.strategies.indicators import Indicators
+
+def raw(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return [
+        {'t': 1_700_000_000_000 + i * 3_600_000, 'o': str(c - 0.5), 'h': str(c + 1), 'l': str(c - 1), 'c': str(c), 'v': '1'}
+        for i, c in enumerate(close)
+    ]
+
+def reference(candles):
+    """Previous row-by-row formatter."""
+    df = pd.DataFrame(candles)
+    df['close'] = df['c'].astype(float)
+    if len(df) >= 50:
+        df['ema_50'] = Indicators.ema(df['close'], 50)
+        df['state'] = df.apply(lambda row: "chop" if pd.isna(row['ema_50']) else ("bull" if row['close'] > row['ema_50'] else "bear"), axis=1)
+    else:
+        df['state'] = "chop"
+    return [
+        {"time": int(c['t'] / 1000), "open": float(c['o']), "high": float(c['h']), "low": float(c['l']), "close": float(c['c']), "state": row['state']}
+        for (_, row), c in zip(df.iterrows(), candles)
+    ]
+
+def test_matches_row_by_row_formatter():
+    assert format_candles([]) == []
+    for n in (10, 500):
+        candles = raw(n)
+        assert format_candles(candles) == reference(candles)
+
+def test_output_types_are_plain_python():
+    row = format_candles(raw(60))[-1]
+    assert type(row['time']) is int and type(row['close']) is float and type(row['state']) is str
+
+def test_downsample_buckets():
+    candles = raw(1000)
+    full = format_candles(candles)
+    out = format_candles(candles, max_points=300)
+    
+    size = 4  # ceil(1000 / 300)
+    assert len(out) == 250
+    for i, bucket in enumerate(out):
+        chunk = full[i * size:(i + 1) * size]
+        assert bucket['time'] == chunk[0]['time']
+        assert bucket['open'] == chunk[0]['open']
+        assert bucket['high'] == max(c['high'] for c in chunk)
+        assert bucket['low'] == min(c['low'] for c in chunk)
+        assert bucket['close'] == chunk[-1]['close']
+        assert bucket['state'] == chunk[-1]['state']
+
+def test_downsample_uneven_tail_and_noop():
+    cols = candle_columns(raw(10))
+    out = downsample_ohlc(cols, 3)
+    assert out['time'].tolist() == cols['time'][[0, 4, 8]].tolist()
+    assert out['close'][-1] == cols['close'][-1]
+    assert downsample_ohlc(cols, 50) is cols
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.domain.strategies.indicators import Indicators, StreamingIndicators
+
+TOLERANCE = 1e-6
+
+@pytest.fixture
+def ohlc():
+    # Random walk with realistic candle shapes
+    rng = np.random.default_rng(42)
+    n = 3000
+    close = 2000 + np.cumsum(rng.normal(0, 5, n))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(open_, close) + rng.uniform(0, 4, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 4, n)
+    return pd.DataFrame({
+        'timestamp': np.arange(n) * 900_000,
+        'open': open_, 'high': high, 'low': low, 'close': close,
+        'volume': rng.uniform(1, 10, n),
+    })
+
+def batch_frame(df):
+    out = pd.DataFrame({
+        'ema_9': Indicators.ema(df['close'], 9),
+        'ema_21': Indicators.ema(df['close'], 21),
+        'rsi': Indicators.rsi(df['close'], 14),
+        'adx': Indicators.adx(df['high'], df['low'], df['close'], 14),
+    })
+    return pd.concat([out, Indicators.bollinger_bands(df['close'], 20, 2)], axis=1)
+
+def assert_matches(streamed, expected):
+    for col in expected.columns:
+        np.testing.assert_allclose(streamed[col].to_numpy(), expected[col].to_numpy(), rtol=TOLERANCE, atol=TOLERANCE, equal_nan=True, err_msg=col)
+
+def test_streaming_update_matches_batch(ohlc):
+    engine = StreamingIndicators()
+    streamed = pd.DataFrame([engine.update(row) for row in ohlc.itertuples(index=False)])
+    assert_matches(streamed, batch_frame(ohlc))
+    assert engine.count == len(ohlc)
+
+def test_streaming_peek_does_not_commit(ohlc):
+    engine = StreamingIndicators()
+    for row in ohlc.iloc[:-1].itertuples(index=False):
+        engine.update(row)
+    last_before = dict(engine.last)
+    forming = ohlc.iloc[-1]
+
+    peeked = engine.peek(forming)
+    assert engine.last == last_before
+    assert engine.peek(forming) == peeked
+
+    expected = batch_frame(ohlc).iloc[-1]
+    for col, value in expected.items():
+        assert peeked[col] == pytest.approx(value, rel=TOLERANCE)
+
+def test_sync_processes_only_new_rows(ohlc):
+    engine = StreamingIndicators()
+    engine.sync(ohlc.iloc[:200])
+    assert engine.count == 199  # Last row is the forming bar
+
+    # Sliding window as returned by the ingestor on the next tick
+    current = engine.sync(ohlc.iloc[105:205])
+    assert engine.count == 204
+    expected = batch_frame(ohlc.iloc[:205]).iloc[-1]
+    for col, value in expected.items():
+        assert current[col] == pytest.approx(value, rel=TOLERANCE)
+
+def test_sync_resets_on_history_gap(ohlc):
+    engine = StreamingIndicators(ema_periods=(9,), rsi_period=None, bb_period=None, adx_period=None)
+    engine.sync(ohlc.iloc[:50])
+    current = engine.sync(ohlc.iloc[500:600])
+    assert engine.count == 99
+    assert current['ema_9'] == pytest.approx(Indicators.ema(ohlc['close'].iloc[500:600], 9).iloc[-1])
+
+def test_flat_series_matches_batch_nans():
+    df = pd.DataFrame({'timestamp': range(60), 'high': 100.0, 'low': 100.0, 'close': 100.0})
+    engine = StreamingIndicators()
+    streamed = pd.DataFrame([engine.update(row) for row in df.itertuples(index=False)])
+    assert_matches(streamed, batch_frame(df))
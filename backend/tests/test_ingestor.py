@@ -0,0 +1,135 @@
+import pytest
+import pandas as pd
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.infrastructure.hyperliquid.ingestor import DataIngestor, CandleStore, TIMEFRAME_MS
+from app.domain.schemas import Candle
+from app.infrastructure.archive.candle_archive import CandleArchive
+
+TF = "15m"
+TF_MS = TIMEFRAME_MS[TF]
+NOW = 1_700_000_000_000 // TF_MS * TF_MS + 60_000  # One minute into a forming bar
+
+def raw_candles(start, count, close=100.0):
+    return [
+        {'t': start + i * TF_MS, 'o': str(close), 'h': str(close + 1), 'l': str(close - 1), 'c': str(close + i), 'v': '1.0'}
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def ingestor(tmp_path):
+    info = MagicMock()
+    info.candles_snapshot = AsyncMock()
+    ingestor = DataIngestor(store=CandleStore(max_bars=150), archive=CandleArchive(str(tmp_path)), info=info)
+    ingestor.symbol = "ETH"
+    return ingestor
+
+def window(end, count):
+    first = end // TF_MS * TF_MS - (count - 1) * TF_MS
+    return first
+
+@pytest.mark.asyncio
+async def test_cold_cache_fetches_full_window(ingestor):
+    ingestor.info.candles_snapshot.return_value = raw_candles(window(NOW, 100), 100)
+    with patch("app.infrastructure.hyperliquid.ingestor.time.time", return_value=NOW / 1000):
+        df = await ingestor.get_candles(TF, limit=100)
+
+    assert len(df) == 100
+    _, _, start, end = ingestor.info.candles_snapshot.call_args[0]
+    assert end - start == TF_MS * 100
+
+@pytest.mark.asyncio
+async def test_warm_cache_fetches_only_tail(ingestor):
+    first = window(NOW, 100)
+    ingestor.info.candles_snapshot.return_value = raw_candles(first, 100)
+    with patch("app.infrastructure.hyperliquid.ingestor.time.time", return_value=NOW / 1000):
+        await ingestor.get_candles(TF, limit=100)
+
+    # Two bars later: the previously forming bar closed and a new one started
+    later = NOW + 2 * TF_MS
+    forming_ts = first + 99 * TF_MS
+    ingestor.info.candles_snapshot.return_value = raw_candles(forming_ts, 3, close=200.0)
+    with patch("app.infrastructure.hyperliquid.ingestor.time.time", return_value=later / 1000):
+        df = await ingestor.get_candles(TF, limit=100)
+
+    _, _, start, _ = ingestor.info.candles_snapshot.call_args[0]
+    assert start == forming_ts  # Refetch from the bar that was still forming
+    assert len(df) == 100
+    assert df['timestamp'].is_monotonic_increasing
+    assert df['timestamp'].is_unique
+    assert df['close'].iloc[-3] == 200.0  # Forming bar replaced by its final version
+
+@pytest.mark.asyncio
+async def test_store_evicts_by_bar_count(ingestor):
+    first = window(NOW, 100)
+    ingestor.info.candles_snapshot.return_value = raw_candles(first, 100)
+    with patch("app.infrastructure.hyperliquid.ingestor.time.time", return_value=NOW / 1000):
+        await ingestor.get_candles(TF, limit=100)
+
+    later = NOW + 80 * TF_MS
+    ingestor.info.candles_snapshot.return_value = raw_candles(first + 99 * TF_MS, 81)
+    with patch("app.infrastructure.hyperliquid.ingestor.time.time", return_value=later / 1000):
+        await ingestor.get_candles(TF, limit=100)
+
+    assert len(ingestor.store.get("ETH", TF)) == 150
+
+@pytest.mark.asyncio
+async def test_error_serves_cached_bars(ingestor):
+    ingestor.info.candles_snapshot.return_value = raw_candles(window(NOW, 100), 100)
+    with patch("app.infrastructure.hyperliquid.ingestor.time.time", return_value=NOW / 1000):
+        await ingestor.get_candles(TF, limit=100)
+
+    ingestor.info.candles_snapshot.side_effect = Exception("API Error")
+    df = await ingestor.get_candles(TF, limit=50)
+    assert len(df) == 50
+
+@pytest.mark.asyncio
+async def test_closed_only_skips_network_when_stream_keeps_store_current(ingestor):
+    first = window(NOW, 100)
+    ingestor.info.candles_snapshot.return_value = raw_candles(first, 100)
+    with patch("app.infrastructure.hyperliquid.ingestor.time.time", return_value=NOW / 1000):
+        await ingestor.get_candles(TF, limit=100)
+    
+    # Stream closes the forming bar and pushes it into the store
+    forming_ts = first + 99 * TF_MS
+    bar = Candle(timestamp=forming_ts, open=1.0, high=3.0, low=0.5, close=2.0, volume=5.0, symbol="ETH")
+    assert ingestor.store.append("ETH", TF, bar)
+    
+    ingestor.info.candles_snapshot.reset_mock()
+    later = forming_ts + TF_MS + 1000
+    with patch("app.infrastructure.hyperliquid.ingestor.time.time", return_value=later / 1000):
+        df = await ingestor.get_candles(TF, limit=100, closed_only=True)
+    
+    ingestor.info.candles_snapshot.assert_not_called()
+    assert df['close'].iloc[-1] == 2.0
+
+@pytest.mark.asyncio
+async def test_store_rejects_non_contiguous_bar(ingestor):
+    first = window(NOW, 100)
+    ingestor.info.candles_snapshot.return_value = raw_candles(first, 100)
+    with patch("app.infrastructure.hyperliquid.ingestor.time.time", return_value=NOW / 1000):
+        await ingestor.get_candles(TF, limit=100)
+    
+    bar = Candle(timestamp=first + 105 * TF_MS, open=1.0, high=1.0, low=1.0, close=1.0, volume=1.0, symbol="ETH")
+    assert not ingestor.store.append("ETH", TF, bar)
+
+@pytest.mark.asyncio
+async def test_closed_bars_are_archived_and_used_for_warm_up(ingestor):
+    first = window(NOW, 100)
+    ingestor.info.candles_snapshot.return_value = raw_candles(first, 100)
+    with patch("app.infrastructure.hyperliquid.ingestor.time.time", return_value=NOW / 1000):
+        await ingestor.get_candles(TF, limit=100)
+    
+    # The forming bar is not archived
+    assert ingestor.archive.count("ETH", TF) == 99
+    assert ingestor.archive.last_timestamp("ETH", TF) == first + 98 * TF_MS
+    
+    # A fresh process (empty memory cache) only fetches the tail after the archive
+    ingestor.store.clear()
+    ingestor.info.candles_snapshot.return_value = raw_candles(first + 99 * TF_MS, 1)
+    with patch("app.infrastructure.hyperliquid.ingestor.time.time", return_value=NOW / 1000):
+        df = await ingestor.get_candles(TF, limit=50)
+    
+    _, _, start, _ = ingestor.info.candles_snapshot.call_args[0]
+    assert start == first + 99 * TF_MS
+    assert len(df) == 50
+    assert df['timestamp'].iloc[-1] == pd.to_datetime(first + 99 * TF_MS, unit='ms')
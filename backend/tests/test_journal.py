@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from app.domain.analytics import EquityHistory
+from app.domain.schemas import PortfolioState
+from app.infrastructure.database.journal import JournalWriter
+
+def writer(db, **kwargs) -> JournalWriter:
+    options = dict(session_factory=db, max_queue=10, max_batch=100, flush_interval=60, snapshot_interval=60, spill_path="", enabled=True)
+    options.update(kwargs)
+    return JournalWriter(**options)
+
+@pytest.mark.asyncio
+async def test_logs_and_snapshots_share_one_transaction(fake_db):
+    db = fake_db
+    journal = writer(db)
+    journal.log("SIGNAL", "📊 Analysis BTC", {"action": "BUY"})
+    journal.log("TRADE", "📝 Signing Request", {"coin": "BTC"})
+    journal.snapshot(PortfolioState(total_equity=1000.0, available_balance=800.0), btc_price=50000.0, crypto_value=200.0)
+    journal.snapshot(PortfolioState(total_equity=1000.0, available_balance=800.0))  # Within snapshot_interval
+    
+    assert await journal.flush() == 3
+    (transaction,) = db.transactions
+    assert [(statement.table.name, len(rows)) for statement, rows in transaction] == [("trade_logs", 2), ("portfolio_snapshots", 1)]
+    logs = transaction[0][1]
+    assert logs[0]["time"] < logs[1]["time"]  # 'time' is the primary key
+    assert transaction[1][1][0]["total_equity_usd"] == 1000.0
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_without_spill_file(fake_db):
+    journal = writer(fake_db, max_queue=3)
+    for i in range(5):
+        journal.log("SYSTEM", f"line {i}")
+    
+    assert journal.stats() == {"queued": 3, "written": 0, "spilled": 0, "dropped": 2}
+
+@pytest.mark.asyncio
+async def test_overflow_spills_to_disk_and_replays_after_recovery(tmp_path, fake_db):
+    db = fake_db
+    db.fail = True
+    journal = writer(db, max_queue=3, spill_path=str(tmp_path / "spill.jsonl"))
+    for i in range(5):
+        journal.log("SYSTEM", f"line {i}")
+    assert journal.spilled == 2
+    
+    assert await journal.flush() == 0  # Failed batch is kept in memory
+    assert len(journal.queue) == 3
+    
+    db.fail = False
+    assert await journal.flush() == 3
+    assert len(journal.queue) == 2  # Spilled records are back in the queue
+    assert not (tmp_path / "spill.jsonl").exists()
+    assert await journal.flush() == 2
+    messages = [row["message"] for transaction in db.transactions for _, rows in transaction for row in rows]
+    assert messages == [f"line {i}" for i in range(5)]
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_in_background(fake_db):
+    db = fake_db
+    journal = writer(db, max_batch=2)
+    journal.log("SYSTEM", "a")
+    journal.log("SYSTEM", "b")
+    await asyncio.sleep(0)
+    
+    assert journal.written == 2
+
+@pytest.mark.asyncio
+async def test_snapshot_bags_add_up_to_equity(fake_db):
+    journal = writer(fake_db)
+    journal.snapshot(PortfolioState(total_equity=1000.0, available_balance=800.0), btc_price=50000.0, crypto_value=200.0, btc_amount=0.004)
+    await journal.flush()
+    
+    ((_, (row,)),) = fake_db.transactions[0]
+    cols = {
+        "bucket": [row["time"]], "equity": [row["total_equity_usd"]], "stable": [row["stablecoin_balance"]],
+        "short_term": [row["short_term_equity_usd"]], "long_term": [row["long_term_equity_usd"]],
+    }
+    (composition,) = EquityHistory.from_columns(cols).composition()
+    assert (composition["stable"], composition["short_term"], composition["long_term"]) == (80.0, 0.0, 20.0)
+
+@pytest.mark.asyncio
+async def test_stop_during_flush_keeps_the_records(fake_db):
+    fake_db.delay = 0.05
+    journal = writer(fake_db, flush_interval=0)
+    journal.start()
+    journal.log("SYSTEM", "shutting down")
+    await asyncio.sleep(0.01)  # Periodic flush is now writing the record
+    
+    fake_db.delay = 0.0
+    await journal.stop()
+    assert journal.written == 1
+    assert journal.stats()["dropped"] == 0
+
+@pytest.mark.asyncio
+async def test_bot_snapshot_splits_bags_like_the_dashboard(fake_db, monkeypatch):
+    from app.core import bot as bot_module
+    from app.domain.schemas import Position
+    from app.infrastructure.hyperliquid.mids import MidPriceService
+    prices = MidPriceService(info=object(), max_age=60)
+    prices.update({"BTC": "50000", "ETH": "2500"})
+    journal = writer(fake_db)
+    monkeypatch.setattr(bot_module, "journal", journal)
+    monkeypatch.setattr(bot_module, "mid_prices", prices)
+    state = PortfolioState(total_equity=0.0, available_balance=800.0, positions=[
+        Position(symbol="BTC", side="LONG", size=0.004, entry_price=40000.0),
+        Position(symbol="ETH", side="LONG", size=0.04, entry_price=2000.0),
+    ])
+    
+    bot_module.BotManager._snapshot(None, state)
+    await journal.flush()
+    
+    ((_, (row,)),) = fake_db.transactions[0]
+    assert (row["stablecoin_balance"], row["short_term_equity_usd"], row["long_term_equity_usd"]) == (800.0, 100.0, 200.0)
+    assert row["stablecoin_balance"] + row["short_term_equity_usd"] + row["long_term_equity_usd"] == row["total_equity_usd"] == 1100.0
+    assert (row["long_term_btc_amount"], row["btc_price"]) == (0.004, 50000.0)
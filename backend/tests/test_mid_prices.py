@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.infrastructure.hyperliquid.mids import MidPriceService
+from app.infrastructure.hyperliquid.rate_limit import Priority, request_priority
+from app.infrastructure.hyperliquid.stream import HyperliquidStream
+from app.domain.risk import RiskManager
+from app.domain.schemas import MarketRegime, PortfolioState, Position, TradeAction, TradingSignal
+
+@pytest.fixture
+def info():
+    info = MagicMock()
+    info.all_mids = AsyncMock(return_value={"BTC": "60000.5", "ETH": "3000", "@107": "bad"})
+    return info
+
+@pytest.mark.asyncio
+async def test_stream_updates_shared_dict_without_rest(info):
+    service = MidPriceService(info=info, max_age=60)
+    stream = HyperliquidStream(on_mids=service.on_stream)
+    await stream.process_message('{"channel": "allMids", "data": {"mids": {"BTC": "61000", "SOL": "150.25"}}}')
+    
+    assert service.get("BTC") == 61000.0
+    assert await service.price("SOL") == 150.25
+    assert service.value("BTC", 0.5) == 30500.0
+    assert service.value("DOGE", 10, fallback=0.1) == 1.0
+    info.all_mids.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_falls_back_to_one_rest_call(info):
+    service = MidPriceService(info=info, max_age=60)
+    prices = await asyncio.gather(service.price("BTC"), service.price("ETH"), service.price("XRP"))
+    
+    assert prices == [60000.5, 3000.0, 0.0]
+    assert info.all_mids.call_count == 1
+    assert "@107" not in service.prices  # Unparseable prices are skipped
+    
+    service.updated_at -= 120
+    await service.price("BTC")
+    assert info.all_mids.call_count == 2
+
+@pytest.mark.asyncio
+async def test_shared_refresh_runs_at_the_most_urgent_waiter_priority(info):
+    release = asyncio.Event()
+
+    async def slow_mids(priority=None):
+        await release.wait()
+        return {"BTC": "60000"}
+
+    info.all_mids = AsyncMock(side_effect=slow_mids)
+    service = MidPriceService(info=info, max_age=60)
+
+    async def price(priority):
+        with request_priority(priority):
+            return await service.price("BTC")
+
+    dashboard = asyncio.ensure_future(price(Priority.DASHBOARD))
+    await asyncio.sleep(0)
+    bot = asyncio.ensure_future(price(Priority.BOT))  # Joins the shared call
+    await asyncio.sleep(0)
+    critical = asyncio.ensure_future(price(Priority.CRITICAL))  # Does not queue behind it
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(dashboard, bot, critical) == [60000.0] * 3
+    assert [c.kwargs["priority"] for c in info.all_mids.call_args_list] == [Priority.BOT, Priority.CRITICAL]
+
+@pytest.mark.asyncio
+async def test_risk_values_other_positions_at_mid():
+    risk = RiskManager()
+    risk.prices = MidPriceService(info=MagicMock(), max_age=60)
+    risk.prices.update({"BTC": "50000"})
+    portfolio = PortfolioState(
+        total_equity=10000.0,
+        available_balance=5000.0,
+        positions=[Position(symbol="BTC", side="LONG", size=0.02, entry_price=0.0)],
+    )
+    signal = TradingSignal(symbol="ETH", action=TradeAction.BUY, price=2500.0, confidence=1.0, regime=MarketRegime.BEAR)
+    
+    # Bear cap: 20% of 10000 = 2000, 1000 already held in BTC -> 1000 / 2500 ETH
+    assert await risk.calculate_size(signal, portfolio) == pytest.approx(0.4, rel=1e-3)
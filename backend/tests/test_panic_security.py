@@ -6,7 +6,7 @@ from app.domain.schemas import Position, PortfolioState
 @pytest.mark.asyncio
 async def test_panic_generates_safe_payloads():
     # 1. Setup Mock Executor with Fake Portfolio
-    with patch("app.domain.execution.Info") as mock_info:
+    with patch("app.domain.execution.shared_info") as mock_info:
         # Mock settings if needed, but OrderExecutor reads it at init.
         # We can just instantiate it.
         
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.domain.execution import OrderExecutor
+
+def balances(usdc):
+    return {'balances': [{'coin': 'USDC', 'total': str(usdc)}, {'coin': 'BTC', 'total': '0.5'}]}
+
+@pytest.fixture
+def executor():
+    with patch("app.domain.execution.shared_info") as mock_info:
+        mock_info.return_value.spot_user_state = AsyncMock()
+        executor = OrderExecutor()
+        executor.public_address = "0xTestAddress"
+        executor.cache_ttl = 60.0
+        executor.info.spot_user_state.return_value = balances(1000)
+        yield executor
+
+@pytest.mark.asyncio
+async def test_state_is_reused_within_ttl(executor):
+    first = await executor.get_portfolio_state()
+    second = await executor.get_portfolio_state()
+    
+    assert first.available_balance == 1000.0
+    assert second is first
+    assert executor.info.spot_user_state.call_count == 1
+    
+    await executor.get_portfolio_state(force=True)
+    assert executor.info.spot_user_state.call_count == 2
+
+@pytest.mark.asyncio
+async def test_ttl_expiry_refetches(executor):
+    executor.cache_ttl = 0.0
+    await executor.get_portfolio_state()
+    await executor.get_portfolio_state()
+    assert executor.info.spot_user_state.call_count == 2
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_request(executor):
+    async def slow_state(address, priority=None):
+        await asyncio.sleep(0.05)
+        return balances(1000)
+    executor.info.spot_user_state.side_effect = slow_state
+    
+    states = await asyncio.gather(*(executor.get_portfolio_state() for _ in range(20)))
+    
+    assert executor.info.spot_user_state.call_count == 1
+    assert all(state is states[0] for state in states)
+
+@pytest.mark.asyncio
+async def test_invalidation_during_refresh_is_not_cached(executor):
+    calls = []
+    async def state_at_call(address, priority=None):
+        calls.append(address)
+        state = balances(1000 * len(calls))
+        await asyncio.sleep(0.05)
+        return state
+    executor.info.spot_user_state.side_effect = state_at_call
+    
+    stale = asyncio.ensure_future(executor.get_portfolio_state())
+    await asyncio.sleep(0.01)
+    executor.invalidate_portfolio()  # e.g. a fill arrives on userEvents
+    fresh = await executor.get_portfolio_state()
+    
+    assert (await stale).available_balance == 1000.0
+    assert fresh.available_balance == 2000.0
+    assert await executor.get_portfolio_state() is fresh
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(executor):
+    executor.info.spot_user_state.side_effect = Exception("API Error")
+    state = await executor.get_portfolio_state()
+    assert state.total_equity == 0.0
+    
+    executor.info.spot_user_state.side_effect = None
+    state = await executor.get_portfolio_state()
+    assert state.total_equity == 1000.0
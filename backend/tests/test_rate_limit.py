@@ -0,0 +1,71 @@
+import asyncio
+import httpx
+import pytest
+from app.infrastructure.hyperliquid.async_info import AsyncInfo
+from app.infrastructure.hyperliquid.rate_limit import Priority, RateScheduler, info_weight, request_priority, response_weight
+
+def test_endpoint_weights():
+    assert info_weight({"type": "allMids"}) == 2
+    assert info_weight({"type": "spotClearinghouseState", "user": "0x"}) == 2
+    assert info_weight({"type": "candleSnapshot"}) == 20
+    assert info_weight({"type": "userRole"}) == 60
+    assert response_weight({"type": "candleSnapshot"}, [{}] * 130) == 2
+    assert response_weight({"type": "allMids"}, {"BTC": "1"}) == 0
+
+@pytest.mark.asyncio
+async def test_requests_within_budget_do_not_wait():
+    scheduler = RateScheduler(capacity=100)
+    for _ in range(5):
+        await scheduler.acquire(20)
+    stats = scheduler.stats()
+    assert stats["tokens"] < 1
+    assert stats["waits"]["bot"]["requests"] == 5
+    assert stats["waits"]["bot"]["waited"] == 0
+
+@pytest.mark.asyncio
+async def test_critical_requests_jump_the_queue():
+    # 60 tokens per second: the bucket is empty and each request needs 1/3 s of refill
+    scheduler = RateScheduler(capacity=60, per_seconds=1)
+    await scheduler.acquire(60)
+    order = []
+
+    async def request(name, priority):
+        await scheduler.acquire(20, priority)
+        order.append(name)
+
+    tasks = [asyncio.ensure_future(request(f"dashboard{i}", Priority.DASHBOARD)) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.ensure_future(request("critical", Priority.CRITICAL)))
+    await asyncio.sleep(0)
+    assert scheduler.stats()["queue_depth"] == {"critical": 1, "bot": 0, "dashboard": 3}
+
+    await asyncio.gather(*tasks)
+    assert order == ["critical", "dashboard0", "dashboard1", "dashboard2"]
+    stats = scheduler.stats()
+    assert stats["waits"]["critical"]["waited"] == 1
+    assert stats["waits"]["dashboard"]["max_wait_ms"] > stats["waits"]["critical"]["max_wait_ms"]
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = RateScheduler(capacity=60, per_seconds=1)
+    await scheduler.acquire(60)
+    waiter = asyncio.ensure_future(scheduler.acquire(60))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert scheduler.stats()["queue_depth"]["bot"] == 0
+    await asyncio.wait_for(scheduler.acquire(10), 1)
+
+@pytest.mark.asyncio
+async def test_info_client_uses_context_priority_and_charges_large_responses():
+    scheduler = RateScheduler(capacity=1000)
+    candles = [{"t": i} for i in range(300)]
+    info = AsyncInfo("https://api.test", transport=httpx.MockTransport(lambda request: httpx.Response(200, json=candles)), scheduler=scheduler)
+    with request_priority(Priority.DASHBOARD):
+        await info.candles_snapshot("BTC", "1m", 1, 2)
+    await info.aclose()
+
+    stats = scheduler.stats()
+    assert stats["waits"]["dashboard"]["requests"] == 1
+    assert 974 <= stats["tokens"] < 976  # 20 up front + 300 // 60 after the response
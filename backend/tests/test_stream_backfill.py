@@ -0,0 +1,79 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.infrastructure.hyperliquid.rate_limit import Priority
+from app.infrastructure.hyperliquid.stream import HyperliquidStream
+
+MIN = 60_000
+
+def message(coin, t, close=1.0):
+    return json.dumps({"channel": "candle", "data": {
+        "t": t, "s": coin, "i": "1m", "o": "1", "h": "2", "l": "0.5", "c": str(close), "v": "1",
+    }})
+
+def rest_bars(start, end, close=9.0):
+    return [{"t": t, "s": "?", "o": "1", "h": "2", "l": "0.5", "c": str(close), "v": "1"} for t in range(start, end + 1, MIN)]
+
+@pytest.fixture
+def info():
+    info = MagicMock()
+    info.candles_snapshot = AsyncMock(side_effect=lambda coin, interval, start, end, priority=None: rest_bars(start, end))
+    return info
+
+async def drain(stream):
+    while stream._backfills:
+        await asyncio.gather(*stream._backfills.values())
+
+@pytest.mark.asyncio
+async def test_gap_is_backfilled_before_live_bars(info):
+    received = []
+    stream = HyperliquidStream(on_candle=received.append, coins=["BTC"], info=info)
+    await stream.process_message(message("BTC", 0))
+    await stream.process_message(message("BTC", 4 * MIN))  # Bars 1-3 never arrived
+    await stream.process_message(message("BTC", 4 * MIN, close=2.0))  # Held while backfilling
+    await drain(stream)
+
+    info.candles_snapshot.assert_awaited_once_with("BTC", "1m", 0, 4 * MIN - 1, priority=Priority.BOT)
+    assert [c.timestamp for c in received] == [0, 0, MIN, 2 * MIN, 3 * MIN, 4 * MIN, 4 * MIN]
+    assert received[1].close == 9.0 and received[1].symbol == "BTC"  # Final version of the last live bar
+    assert received[-1].close == 2.0
+    assert stream.backfilled == 4
+
+@pytest.mark.asyncio
+async def test_reconnect_resyncs_every_coin_concurrently(info):
+    received = []
+    started = []
+
+    async def slow_snapshot(coin, interval, start, end, priority=None):
+        started.append(coin)
+        await asyncio.sleep(0.01)
+        return rest_bars(start, end)
+
+    info.candles_snapshot = AsyncMock(side_effect=slow_snapshot)
+    stream = HyperliquidStream(on_candle=received.append, coins=["BTC", "ETH"], info=info)
+    for coin in ("BTC", "ETH"):
+        await stream.process_message(message(coin, 0))
+
+    stream._resync.update(stream._last_ts)  # What connect() does after a reconnect
+    await stream.process_message(message("BTC", MIN))
+    await stream.process_message(message("ETH", MIN))
+    await asyncio.sleep(0)
+    assert started == ["BTC", "ETH"]  # Both requests in flight before either finished
+    await drain(stream)
+
+    for coin in ("BTC", "ETH"):
+        assert [c.timestamp for c in received if c.symbol == coin] == [0, 0, MIN]
+
+@pytest.mark.asyncio
+async def test_no_backfill_without_gap_and_failed_backfill_releases_live_bars(info):
+    received = []
+    stream = HyperliquidStream(on_candle=received.append, coins=["BTC"], info=info)
+    for t in (0, 0, MIN, 2 * MIN):
+        await stream.process_message(message("BTC", t))
+    info.candles_snapshot.assert_not_called()
+
+    info.candles_snapshot.side_effect = RuntimeError("429")
+    await stream.process_message(message("BTC", 5 * MIN))
+    await drain(stream)
+    assert [c.timestamp for c in received][-1] == 5 * MIN
@@ -0,0 +1,47 @@
+import pytest
+from app.domain.schemas import CandleTick
+from app.infrastructure.hyperliquid.stream import HyperliquidStream
+
+CANDLE_MSG = '{"channel": "candle", "data": {"t": 60000, "T": 119999, "s": "ETH", "i": "1m", "o": "1", "h": "2", "l": "0.5", "c": "1.5", "v": "10", "n": 3}}'
+
+@pytest.mark.asyncio
+async def test_candle_decodes_to_tick():
+    received = []
+    stream = HyperliquidStream(on_candle=received.append)
+    await stream.process_message(CANDLE_MSG)
+    await stream.process_message(CANDLE_MSG.encode())  # Raw bytes frames too
+
+    tick, again = received
+    assert isinstance(tick, CandleTick)
+    assert tick.model_dump() == {
+        "timestamp": 60_000, "open": 1.0, "high": 2.0, "low": 0.5,
+        "close": 1.5, "volume": 10.0, "symbol": "ETH", "state": "chop",
+    }
+    assert tick.to_candle().close == 1.5
+    assert again.model_dump() == tick.model_dump()
+    assert stream.messages == 2
+
+@pytest.mark.asyncio
+async def test_dispatch_by_channel():
+    candles, mids = [], []
+
+    async def on_mids(data):
+        mids.append(data)
+
+    stream = HyperliquidStream(on_candle=candles.append, on_mids=on_mids)
+    await stream.process_message('{"channel": "subscriptionResponse", "data": {"method": "subscribe"}}')
+    await stream.process_message('{"channel": "allMids", "data": {"mids": {"ETH": "1.5"}}}')
+
+    assert candles == []
+    assert mids == [{"mids": {"ETH": "1.5"}}]
+
+@pytest.mark.asyncio
+async def test_bad_messages_are_logged_not_raised(caplog):
+    received = []
+    stream = HyperliquidStream(on_candle=received.append)
+    await stream.process_message("not json")
+    await stream.process_message('{"channel": "candle", "data": {"t": 60000, "s": "ETH", "o": "1"}}')
+
+    assert received == []
+    assert "JSON" in caplog.text
+    assert "falta campo" in caplog.text
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import pytest
+from app.infrastructure.hyperliquid import stream as stream_module
+from app.infrastructure.hyperliquid.stream import HyperliquidStream
+
+class FakeSocket:
+    """Records sent frames, replays `incoming` and then drops the connection."""
+    def __init__(self, incoming, stream=None):
+        self.incoming = list(incoming)
+        self.stream = stream
+        self.sent = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        if self.incoming:
+            return self.incoming.pop(0)
+        if self.stream is not None:
+            self.stream.stop()  # Last connection: end the test
+            raise StopAsyncIteration
+        raise OSError("connection reset")
+
+@pytest.fixture
+def fast_sleep(monkeypatch):
+    sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda delay, *a, **kw: sleep(0))
+
+@pytest.mark.asyncio
+async def test_subscriptions_are_replayed_after_reconnect(monkeypatch, fast_sleep):
+    trades = []
+    monkeypatch.setattr(stream_module, "PUBLIC_ADDRESS", None)
+    stream = HyperliquidStream(coins=["BTC", "ETH"], interval="1m")
+
+    first = FakeSocket(['{"channel": "trades", "data": [{"coin": "BTC", "px": "1"}]}'])
+    second = FakeSocket(['{"channel": "trades", "data": [{"coin": "BTC", "px": "2"}]}'], stream=stream)
+    sockets = iter([first, second])
+    monkeypatch.setattr(stream_module.websockets, "connect", lambda url: next(sockets))
+
+    # Added before connecting: sent with the rest on connect
+    assert await stream.subscribe({"type": "trades", "coin": "BTC"}, trades.append)
+    assert not await stream.subscribe({"type": "trades", "coin": "BTC"})  # Already active
+    await stream.connect()
+
+    subscribed = [m["subscription"] for m in second.sent]
+    assert [m["subscription"] for m in first.sent] == subscribed
+    assert subscribed == [
+        {"type": "candle", "coin": "BTC", "interval": "1m"},
+        {"type": "candle", "coin": "ETH", "interval": "1m"},
+        {"type": "trades", "coin": "BTC"},
+    ]
+    assert [t[0]["px"] for t in trades] == ["1", "2"]
+    assert stream.ws is None
+
+@pytest.mark.asyncio
+async def test_subscribe_and_unsubscribe_while_connected():
+    stream = HyperliquidStream(coins=["BTC"])
+    stream.ws = FakeSocket([])
+    books = []
+
+    await stream.subscribe({"type": "l2Book", "coin": "ETH"}, books.append)
+    await stream.process_message('{"channel": "l2Book", "data": {"coin": "ETH", "levels": [[], []]}}')
+    assert await stream.unsubscribe({"coin": "ETH", "type": "l2Book"})  # Key ignores dict order
+    assert not await stream.unsubscribe({"type": "l2Book", "coin": "ETH"})
+
+    assert [m["method"] for m in stream.ws.sent] == ["subscribe", "unsubscribe"]
+    assert books == [{"coin": "ETH", "levels": [[], []]}]
+    assert "l2Book" not in {s["type"] for s in stream.subscriptions.values()}
+
+@pytest.mark.asyncio
+async def test_user_events_dispatch_and_failing_handler_is_isolated():
+    seen = []
+
+    async def broken(_):
+        raise RuntimeError("boom")
+
+    stream = HyperliquidStream()
+    await stream.subscribe({"type": "userEvents", "user": "0xabc"}, broken)
+    stream.on("user", seen.append)
+    await stream.process_message('{"channel": "user", "data": {"fills": []}}')
+
+    assert seen == [{"fills": []}]
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.domain.backtest import BacktestEngine
+from app.domain.strategies.dual_core import DualCoreParams
+from app.domain.sweep import ParameterSweep
+
+BAR_MS = 15 * 60 * 1000
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(3)
+    n = 20 * 96
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    return pd.DataFrame({
+        'timestamp': 1_672_531_200_000 + np.arange(n) * BAR_MS,
+        'high': close * 1.002,
+        'low': close * 0.998,
+        'close': close,
+    })
+
+GRID = {"adx_trend": [20, 30], "ema_fast": [9, 30], "ema_slow": [21]}
+
+def test_combinations_drop_invalid_pairs():
+    sweep = ParameterSweep(grid=GRID)
+    combos = sweep.combinations()
+    assert len(combos) == 2  # ema_fast=30 >= ema_slow=21 is dropped
+    assert all(c["ema_fast"] == 9 for c in combos)
+    assert len(ParameterSweep().combinations(samples=5)) == 5
+
+def test_sweep_matches_direct_backtest_and_ranks(candles):
+    sweep = ParameterSweep(grid=GRID, symbol="ETH", fee_rate=0.0, max_workers=2)
+    results = sweep.run(candles)
+    
+    assert len(results) == 2
+    assert results["sharpe"].is_monotonic_decreasing
+    
+    # Workers read the same bars through shared memory as a direct run
+    best = results.iloc[0]
+    params = DualCoreParams(**{k: best[k] for k in DualCoreParams.model_fields})
+    direct = BacktestEngine(params=params, symbol="ETH", fee_rate=0.0).run(candles).summary()
+    assert best["trades"] == direct["trades"]
+    assert best["final_equity"] == pytest.approx(direct["final_equity"])
+
+def test_sweep_drawdown_filter(candles):
+    sweep = ParameterSweep(grid={"adx_trend": [10, 20, 30, 40]}, symbol="ETH", max_workers=2)
+    results = sweep.run(candles)
+    limit = results["max_drawdown"].median()
+    
+    filtered = sweep.run(candles, max_drawdown=limit)
+    assert 0 < len(filtered) <= len(results)
+    assert (filtered["max_drawdown"] >= limit).all()
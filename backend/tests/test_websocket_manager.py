@@ -0,0 +1,255 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+import msgpack
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+from app.core import websocket as ws_module
+from app.core.websocket import ConnectionManager
+from app.domain.schemas import TradeAction
+
+class FakeSocket:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.frames = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        await self._send(data, json.loads(data))
+
+    async def send_bytes(self, data):
+        await self._send(data, msgpack.unpackb(data))
+
+    async def _send(self, data, message):
+        if self.fail:
+            raise RuntimeError("socket closed")
+        await asyncio.sleep(self.delay)
+        self.frames.append(data)
+        self.sent.append(message)
+
+    async def close(self):
+        self.closed = True
+
+def candle(close, symbol="BTC"):
+    return {"type": "candle", "data": {"symbol": symbol, "close": close}}
+
+@pytest_asyncio.fixture
+async def manager():
+    ConnectionManager._instance = None
+    manager = ConnectionManager()
+    manager.max_queue = 4
+    manager.send_timeout = 1.0
+    yield manager
+    await manager.close()
+    assert not manager.writers
+    ConnectionManager._instance = None
+
+@pytest.mark.asyncio
+async def test_broadcast_does_not_wait_for_slow_client(manager):
+    fast, slow = FakeSocket(), FakeSocket(delay=0.5)
+    await manager.connect(fast)
+    await manager.connect(slow)
+    
+    started = time.perf_counter()
+    for i in range(3):
+        await manager.broadcast({"type": "log", "data": i})
+    assert time.perf_counter() - started < 0.05
+    
+    await asyncio.sleep(0.05)
+    assert [m["data"] for m in fast.sent] == [0, 1, 2]
+    assert slow.sent == []
+
+@pytest.mark.asyncio
+async def test_slow_client_gets_latest_candle_only(manager):
+    slow = FakeSocket(delay=0.05)
+    await manager.connect(slow)
+    await manager.broadcast({"type": "log", "data": "first"})
+    await asyncio.sleep(0)  # Writer picks up the first message
+    for close in range(10):
+        await manager.broadcast(candle(close))
+    
+    await asyncio.sleep(0.2)
+    assert slow.sent == [{"type": "log", "data": "first"}, candle(9)]
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_old_messages_but_keeps_order_requests(manager):
+    stalled = FakeSocket(delay=10)
+    await manager.connect(stalled)
+    client = manager.clients[stalled]
+    await manager.broadcast({"type": "log", "data": "in flight"})
+    await asyncio.sleep(0)
+    
+    await manager.broadcast({"type": "ORDER_REQUEST", "data": 1})
+    for i in range(10):
+        await manager.broadcast({"type": "log", "data": i})
+    await manager.broadcast({"type": "ORDER_REQUEST", "data": 2})
+    
+    pending = [frame.message for frame in client.pending.values()]
+    assert len(pending) <= manager.max_queue
+    assert [m["data"] for m in pending if m["type"] == "ORDER_REQUEST"] == [1, 2]
+    assert pending[-2]["data"] == 9
+    assert client.dropped > 0
+
+@pytest.mark.asyncio
+async def test_dead_and_stalled_clients_are_pruned(manager):
+    manager.send_timeout = 0.05
+    dead, stalled, healthy = FakeSocket(fail=True), FakeSocket(delay=10), FakeSocket()
+    for ws in (dead, stalled, healthy):
+        await manager.connect(ws)
+    
+    await manager.broadcast({"type": "log", "data": "x"})
+    await asyncio.sleep(0.15)
+    
+    assert manager.active_connections == [healthy]
+    assert dead.closed and stalled.closed
+
+@pytest.mark.asyncio
+async def test_message_is_encoded_once_per_format(manager):
+    json_clients = [FakeSocket() for _ in range(5)]
+    binary_clients = [FakeSocket() for _ in range(3)]
+    for ws in json_clients:
+        await manager.connect(ws)
+    for ws in binary_clients:
+        await manager.connect(ws, encoding="msgpack")
+    
+    calls = {"json": 0, "msgpack": 0}
+    def counting(name, encoder):
+        def encode(message):
+            calls[name] += 1
+            return encoder(message)
+        return encode
+    encoders = {name: counting(name, enc) for name, enc in ws_module.ENCODERS.items()}
+    
+    message = {"type": "signal", "data": {"action": TradeAction.BUY, "at": datetime(2024, 1, 1)}}
+    with patch.dict(ws_module.ENCODERS, encoders):
+        await manager.broadcast(message)
+        await asyncio.sleep(0.05)
+    
+    assert calls == {"json": 1, "msgpack": 1}
+    expected = {"type": "signal", "data": {"action": "BUY", "at": "2024-01-01T00:00:00"}}
+    for ws in json_clients:
+        assert isinstance(ws.frames[0], str)
+        assert ws.sent == [expected]
+    for ws in binary_clients:
+        assert isinstance(ws.frames[0], bytes)
+        assert ws.sent == [expected]
+    # Same object handed to every client of a format
+    assert len({id(ws.frames[0]) for ws in json_clients}) == 1
+
+@pytest.mark.asyncio
+async def test_unserializable_message_is_dropped_not_the_clients(manager, caplog):
+    clients = [FakeSocket() for _ in range(3)]
+    for ws in clients:
+        await manager.connect(ws)
+    
+    await manager.broadcast({"type": "log", "data": object()})
+    await manager.broadcast({"type": "log", "data": "next"})
+    await asyncio.sleep(0.05)
+    
+    assert manager.active_connections == clients
+    for ws in clients:
+        assert ws.sent == [{"type": "log", "data": "next"}]
+    assert caplog.text.count("Dropping unserializable") == 1
+
+def test_json_fallback_without_orjson():
+    message = {"type": "portfolio", "data": {"at": datetime(2024, 1, 1), "equity": 1.5}}
+    with patch.object(ws_module, "orjson", None):
+        assert json.loads(ws_module.encode_json(message)) == {"type": "portfolio", "data": {"at": "2024-01-01T00:00:00", "equity": 1.5}}
+
+async def command(manager, ws, **payload):
+    await manager.handle_message(ws, json.dumps(payload))
+
+@pytest.mark.asyncio
+async def test_topic_routing(manager):
+    dashboard, signer, legacy = FakeSocket(), FakeSocket(), FakeSocket()
+    for ws in (dashboard, signer, legacy):
+        await manager.connect(ws)
+    await command(manager, dashboard, action="subscribe", topics=["log", "portfolio"])
+    await command(manager, signer, action="subscribe", topic="ORDER_REQUEST")
+    await asyncio.sleep(0.01)
+    dashboard.sent.clear()
+    signer.sent.clear()
+    
+    await manager.broadcast(candle(1))
+    await manager.broadcast({"type": "log", "data": "hello"})
+    await manager.broadcast({"type": "ORDER_REQUEST", "data": {"coin": "BTC"}})
+    await asyncio.sleep(0.01)
+    
+    assert [m["type"] for m in dashboard.sent] == ["log"]
+    assert [m["type"] for m in signer.sent] == ["ORDER_REQUEST"]
+    assert [m["type"] for m in legacy.sent] == ["candle", "log", "ORDER_REQUEST"]
+
+@pytest.mark.asyncio
+async def test_symbol_filter_and_unsubscribe(manager):
+    ws = FakeSocket()
+    await manager.connect(ws)
+    await command(manager, ws, action="subscribe", topics=["candle", "log"], symbols=["ETH"])
+    await manager.broadcast(candle(1, "BTC"))
+    await manager.broadcast(candle(2, "ETH"))
+    await command(manager, ws, action="unsubscribe", topics=["candle"])
+    await manager.broadcast(candle(3, "ETH"))
+    await manager.broadcast({"type": "log", "data": "no symbol"})
+    await asyncio.sleep(0.01)
+    
+    data = [m for m in ws.sent if m["type"] in ("candle", "log")]
+    assert data == [candle(2, "ETH"), {"type": "log", "data": "no symbol"}]
+    replies = [m for m in ws.sent if m["type"] == "subscriptions"]
+    assert replies[-1]["data"] == {"log": {"symbols": ["ETH"], "throttle_ms": 0.0}}
+
+@pytest.mark.asyncio
+async def test_throttle_per_topic(manager):
+    ws = FakeSocket()
+    await manager.connect(ws)
+    await command(manager, ws, action="subscribe", topics=["candle"], throttle_ms=50)
+    for close in range(5):
+        await manager.broadcast(candle(close))
+    await asyncio.sleep(0.01)
+    assert [m["data"]["close"] for m in ws.sent if m["type"] == "candle"] == [0]
+    
+    # The latest candle of the interval is sent when it elapses, not dropped
+    await asyncio.sleep(0.06)
+    assert [m["data"]["close"] for m in ws.sent if m["type"] == "candle"] == [0, 4]
+    await manager.broadcast(candle(99))
+    await asyncio.sleep(0.07)
+    assert [m["data"]["close"] for m in ws.sent if m["type"] == "candle"] == [0, 4, 99]
+
+@pytest.mark.asyncio
+async def test_throttle_never_drops_logs(manager):
+    ws = FakeSocket()
+    await manager.connect(ws)
+    await command(manager, ws, action="subscribe", topics=["log"], throttle_ms=1000)
+    for i in range(3):
+        await manager.broadcast({"type": "log", "data": i})
+    await asyncio.sleep(0.01)
+    
+    assert [m["data"] for m in ws.sent if m["type"] == "log"] == [0, 1, 2]
+
+@pytest.mark.asyncio
+async def test_unsubscribed_topic_is_never_encoded(manager):
+    ws = FakeSocket()
+    await manager.connect(ws)
+    await command(manager, ws, action="subscribe", topics=["ORDER_REQUEST"])
+    with patch.object(ws_module, "Frame", side_effect=AssertionError("encoded")):
+        await manager.broadcast(candle(1))
+
+@pytest.mark.asyncio
+async def test_invalid_commands_get_an_error(manager):
+    ws = FakeSocket()
+    await manager.connect(ws)
+    await manager.handle_message(ws, "not json")
+    await command(manager, ws, action="subscribe", topics=["nope"])
+    await command(manager, ws, action="ping")
+    await asyncio.sleep(0.01)
+    
+    assert [m["type"] for m in ws.sent] == ["error", "error", "pong"]
+    # Still on the default feed
+    await manager.broadcast({"type": "log", "data": 1})
+    await asyncio.sleep(0.01)
+    assert ws.sent[-1] == {"type": "log", "data": 1}